@@ -5,15 +5,38 @@
 # datetime: for timestamp and datetime
 # source: https://pynative.com/python-timestamp/
 from datetime import datetime
+# os: for the size and modification time of the block files
+import os
+# time: for measuring the throughput of the deep validation
+import time
+# exists: check, if file in a directory exists
+# source: https://www.pythontutorial.net/python-basics/python-check-if-file-exists/
+from os.path import exists
 # hashlib: encryption/decryption module
 # source: https://datagy.io/python-sha256/
 import hashlib
+# contextlib: empty lock, if there is no block folder
+import contextlib
 # blm (block module): Own module for block class
 import blm
 # trm (transaction module). Own module for handeling transactions
 from trm import Transaction
 # fnc (Module for own functions): Own set of functions
 import fnc
+# mnm (mining module): Own module for the nonce search
+import mnm
+# utm (UTXO module): Own module for the UTXO set of the blockchain
+from utm import UtxoSet
+# hcm (header checkpoint module): Own module for the checkpoint of the block headers
+from hcm import HeaderCheckpoint
+# txm (transaction index module). Own module for the index of the transactions in the blocks
+from txm import TxIndex
+# mpm (mempool module): Own module for the transactions in mempool
+from mpm import Mempool
+# btm (block template module): Own module for choosing the transactions of the next block
+from btm import BlockTemplate
+# lkm (lock module): Own module for file locks
+from lkm import FileLock
 
 #########
 # Class #
@@ -26,17 +49,55 @@ class Blockchain:
     ###########
     
     # Constructor: Instance Variables
-    def __init__(self, block_path, mem_path, cred_path, user_path):
+    def __init__(self, block_path, mem_path, cred_path, user_path, idx_path = './idx'):
         # Paths and directories
         self.block_path = block_path
         self.mem_path = mem_path
         self.cred_path = cred_path
         self.user_path = user_path
+        # Folder for index files
+        self.idx_path = idx_path
         # List of all block objects
         self.blocks = []
+        # UTXO set of the blockchain
+        self.utxo_set = UtxoSet(idx_path)
+        # Block headers of the last validated blockchain
+        self.checkpoint = HeaderCheckpoint(idx_path)
+        # Numbers of the blocks, which were changed since the checkpoint was saved
+        # None: checkpoint not used, all blocks need to be validated
+        self.changed_blocks = None
+        # Transaction index: Tx ID -> (block number, position of the transaction in the block)
+        # Stored in the index folder, loaded on first use (see get_tx_index())
+        self.tx_index = TxIndex(idx_path)
+        # Cache for the transactions of the blocks, which were used last
+        # Only the block headers are loaded at start, the transactions are loaded on first access
+        # tx_cache: block number -> [list of transaction objects, size of the block data]
+        # cache_size: size of the block data of all blocks in the cache in bytes
+        # cache_budget: maximum size of the block data in the cache in bytes
+        self.tx_cache = {}
+        self.cache_size = 0
+        self.cache_budget = 64 * 1024 * 1024
+        # Transactions in mempool, loaded only when the mempool file has changed
+        self.mempool = Mempool(user_path, mem_path, block_path)
+        # Checked transactions of the mempool for the next block
+        self.template = BlockTemplate()
+        # Maximum size of a block in bytes (block file)
+        self.max_block_size = 1000000
+        # Version of new blocks (see blm.BLOCK_VERSIONS), 2 = Merkle tree of the transactions
+        self.block_version = blm.MERKLE_VERSION
         # Error handling
         self.bc_valid = True
         # self.errors = []
+        # Mining engine (e.g. mnm.Miner) with a method get_nonce()
+        # If None, the nonce is searched with the static method get_nonce()
+        self.miner = None
+        # Number of processes for verifying signatures (0 = number of cpu cores)
+        self.verify_processes = 0
+        # Block store (e.g. sgm.SegmentStore) with the blocks in segment files
+        # If None, the blocks are read from and written to the block files in block_path
+        self.store = None
+        # Lock of the blocks for all programs (see get_block_lock())
+        self.block_lock = None
                
     # Print Object as formatted string
     def __str__(self):
@@ -55,56 +116,275 @@ class Blockchain:
     # in a list of transaction objects
     @staticmethod
     def load_mempool(user_path, mem_path, block_path):
-        tx_count = Transaction.get_tx_count_mempool(mem_path)
-        tx_mem = []
-        for i in range(tx_count):
-            tx_mem.append(Transaction(user_path, mem_path, block_path))
-            tx_mem[i].load_tx_from_mempool(i) 
-        return tx_mem  
+        return Mempool(user_path, mem_path, block_path).get_txs()
 
     # Find nonce for the given mining difficulty
     # -> actual mining process
     # Concept for "Proof-of-Work"
+    # The nonce search itself is done by the hash kernel in mnm.py,
+    # which hashes the header string only once and adds the nonce to a copy of the hash state
     @staticmethod
-    def get_nonce(number, timestamp, prev_hash, tx_count, tx_hash, difficulty):
+    def get_nonce(number, timestamp, prev_hash, tx_count, tx_hash, difficulty, version = 1):
         # Create header string of the block WITHOUT the nonce and NO whitespaces
-        header_string_1 = f"{number}{timestamp}{prev_hash}{tx_count}{tx_hash}{difficulty}"        
-        found_nonce = False
-        nonce = -1 
-        while not found_nonce: 
-            # The nonce starts at 0 and is incremeted after each loop
-            # until it results in a hash with the desired amount of leading zeros (= difficulty)
-            nonce += 1      
-            # Attach the nonce to the incomplete header string
-            header_string_2 = f"{header_string_1}{nonce}"
-            # Get the SHA-256 Hash in hexadecimal format
-            hash_header = hashlib.sha256(header_string_2.encode()).hexdigest()
-            # Check if the amount of leading zeros is equal to the difficulty
-            if(hash_header[0:difficulty] == '0' * difficulty):
-                found_nonce = True 
-            # print(hash_header)
-        return nonce           
+        header_string_1 = mnm.get_header_string(number, timestamp, prev_hash, tx_count, tx_hash, difficulty, version)
+        # The nonce starts at 0 and the nonces are checked in ranges of one million 
+        # until it results in a hash with the desired amount of leading zeros (= difficulty)
+        start = 0
+        while(True):
+            result = mnm.search_range(header_string_1, difficulty, start, start + 1000000)
+            if(result[1] != -1):
+                return result[1]
+            start += 1000000
     
     ####################
     # Instance Methods #
     ####################
     
     # Method loads a new block into the blockchain
+    # Only the block header is loaded, the transactions are loaded on first access (see get_block_txs())
     def load_block_in_bc(self, block_nr):
         self.blocks.append(blm.Block(self.block_path, self.user_path, self.mem_path)) 
-        self.blocks[block_nr].load_block(block_nr)
+        if(self.store is None):
+            self.blocks[block_nr].load_block(block_nr, False)
+        else:
+            self.store.load_header(block_nr, self.blocks[block_nr])
+        self.blocks[block_nr].tx_loader = self.get_block_txs
+
+    # Method loads a block header from the checkpoint into the blockchain
+    # Returns False if the block is not in the checkpoint or the block data was changed
+    def load_block_from_checkpoint(self, block_nr):
+        header = self.checkpoint.get_header(block_nr, self.get_block_stamp(block_nr))
+        if(header is None):
+            return False
+        bl = blm.Block(self.block_path, self.user_path, self.mem_path)
+        bl.number = block_nr
+        bl.timestamp = header[0]
+        bl.prev_hash = header[1]
+        bl.tx_count = header[2]
+        bl.tx_hash = header[3]
+        bl.difficulty = header[4]
+        bl.nonce = header[5]
+        bl.version = header[8]
+        # Check if the checkpoint entry is corrupted
+        if(bl.get_header_hash() != header[6]):
+            return False
+        bl.block_hash = header[6]
+        bl.block_valid = True
+        bl.tx = None
+        bl.tx_loader = self.get_block_txs
+        self.blocks.append(bl)
+        return True
+
+    # Returns a string, which changes when the data of a block is changed
+    # Block folder: size and modification time of the block file
+    # Block store: segment, offset and length of the block and size and modification time of the segment file
+    # Returns an empty string if the block doesn't exist
+    def get_block_stamp(self, block_nr):
+        if(self.store is None):
+            path = f"{self.block_path}/{block_nr}.bl"
+            if not(exists(path)):
+                return ""
+            stat = os.stat(path)
+            return f"{stat.st_size}:{stat.st_mtime_ns}"
+        else:
+            return self.store.get_block_stamp(block_nr)
+
+    # Method updates the stamps of the blocks in the checkpoint, which are in the same segment file as a block
+    # Appending a block to a segment file of the block store changes their stamps (see SegmentStore.get_block_stamp())
+    def update_segment_stamps(self, block_nr):
+        segment = self.store.get_index_entry(block_nr)[0]
+        for nr in range(block_nr - 1, -1, -1):
+            entry = self.store.get_index_entry(nr)
+            if(entry is None or entry[0] != segment):
+                break
+            self.checkpoint.set_stamp(nr, self.get_block_stamp(nr))
+
+    # Method saves the headers of all blocks as checkpoint
+    # Only called for a valid blockchain
+    def save_checkpoint(self):
+        self.checkpoint.clear()
+        for block in self.blocks:
+            self.checkpoint.add_block(block, self.get_block_stamp(block.number))
+        self.checkpoint.save()
+        self.changed_blocks = []
+
+    # Method returns the transactions of a block in the blockchain
+    # If the transactions are not in the cache, they are loaded from the block file or the block store
+    # The blocks used last are kept in the cache,
+    # if the cache exceeds the budget the blocks used first are removed from the cache
+    def get_block_txs(self, block):
+        if(block.number in self.tx_cache):
+            # Move the block to the end of the cache (= used last)
+            entry = self.tx_cache.pop(block.number)
+        else:
+            if(self.store is None):
+                tx_list = block.load_txs()
+            else:
+                data = self.store.get_block_data(block.number)
+                if(data is None):
+                    block.add_error(f"Block {block.number} not found in block store!")
+                    tx_list = []
+                else:
+                    tx_list = block.load_txs_bytes(data)
+            entry = [tx_list, block.size]
+            self.cache_size += block.size
+        self.tx_cache[block.number] = entry
+        # Remove the blocks used first, but keep at least the current block
+        while(self.cache_size > self.cache_budget and len(self.tx_cache) > 1):
+            self.cache_size -= self.tx_cache.pop(next(iter(self.tx_cache)))[1]
+        return entry[0]
+
+    # Method adds a new block with its transactions to the cache of the blockchain
+    def add_block_to_cache(self, block):
+        block.size = len(block.get_block_string())
+        self.tx_cache[block.number] = [block.tx_list, block.size]
+        self.cache_size += block.size
+        block.tx_loader = self.get_block_txs
+
+    # Returns the hash of the header of a block in the block folder or in the block store
+    def get_block_header_hash(self, block_nr):
+        if(self.store is None):
+            return blm.Block.get_block_header_hash(block_nr, self.block_path)
+        else:
+            return self.store.get_block_header_hash(block_nr)
+
+    # Returns the block folder or the folder of the block store
+    # Returns "" if there is no block folder (e.g. benchmarks with the UTXO set only)
+    def get_block_folder(self):
+        if(self.store is None):
+            return str(self.block_path)
+        else:
+            return str(self.store.store_path)
+
+    # Returns the lock of the blocks for all programs, which use the same block folder or block store
+    # The lock file is in the block folder or in the folder of the block store
+    # Without a block folder there are no blocks to share, so nothing is locked
+    def get_block_lock(self):
+        if(self.get_block_folder() == ""):
+            return contextlib.nullcontext()
+        lock_path = f"{self.get_block_folder()}/blocks.lock"
+        if(self.block_lock is None or self.block_lock.path != lock_path):
+            self.block_lock = FileLock(lock_path)
+        return self.block_lock
+
+    # Method loads the blocks, which were added by other programs since the blockchain was loaded
+    # The new blocks are validated like the changed blocks of the checkpoint
+    # Returns False if a new block is not valid
+    def load_new_blocks(self):
+        # Without a block folder no other program can add blocks
+        if(self.get_block_folder() == ""):
+            return True
+        # With the lock of the blocks, so no block is written and the indexes are not saved at the same time
+        with self.get_block_lock():
+            max_block = self.get_max_block()
+            if(max_block < len(self.blocks)):
+                return True
+            print(f"Loading blocks {len(self.blocks)} to {max_block} added by another program...")
+            new_blocks = list(range(len(self.blocks), max_block + 1))
+            for block_nr in new_blocks:
+                self.load_block_in_bc(block_nr)
+            self.changed_blocks = new_blocks
+            if not(self.validate_changed_blocks()):
+                print("Blocks added by another program are not valid!")
+                self.bc_valid = False
+                return False
+            self.save_checkpoint()
+            for block_nr in new_blocks:
+                self.index_block(self.blocks[block_nr])
+            self.update_utxo_set()
+            return True
+
+    # Returns the number of the highest block in the block folder or in the block store
+    # -1: no block yet, -2: highest block file is missing (only block folder)
+    def get_max_block(self):
+        if(self.store is None):
+            return blm.Block.get_max_block(self.block_path)
+        else:
+            return self.store.get_max_block()
+
+    # Method returns the transaction index: Tx ID -> (block number, position of the transaction in the block)
+    # The index is loaded from the index folder on first use and the blocks, which are not in it yet, are added
+    # If its highest block is not part of the blockchain anymore, the index is built again
+    # Without a block folder the blocks are only in memory (e.g. benchmarks), so the index is not stored
+    def get_tx_index(self):
+        if not(self.tx_index.loaded):
+            with self.get_block_lock():
+                if(self.get_block_folder() != ""):
+                    self.tx_index.load()
+                else:
+                    self.tx_index.clear()
+                    self.tx_index.loaded = True
+                height = self.tx_index.height
+                # Check if the stored index belongs to this blockchain
+                if(height >= len(self.blocks) or (height >= 0 and self.blocks[height].get_header_hash() != self.tx_index.tip_hash)):
+                    self.tx_index.clear()
+                for block in self.blocks[self.tx_index.height + 1:]:
+                    self.tx_index.add_block(block)
+                if(self.get_block_folder() != ""):
+                    self.tx_index.save()
+        return self.tx_index.txs
+
+    # Method adds the transactions of a new block to the transaction index and saves it
+    # Must be called with the lock of the blocks
+    def index_block(self, block):
+        if not(self.tx_index.loaded):
+            return
+        if(self.tx_index.height == block.number - 1):
+            self.tx_index.add_block(block)
+            self.tx_index.save()
+        else:
+            self.tx_index.loaded = False
+
+    # Method returns the transactions in mempool as list of transaction objects
+    # The mempool file is only loaded again, when it was changed (modification time or size)
+    def get_mempool(self):
+        return self.mempool.get_txs()
+
+    # Method returns the output of a transaction in a block or in mempool
+    # Returns a list [Index Output, Address, Volume] or None if the output was not found
+    def get_output(self, tx_id, index):
+        # Look for the output in the UTXO set first
+        # The UTXO set is only up to date if the whole blockchain is loaded
+        if(self.utxo_set.height == len(self.blocks) - 1):
+            utxo = self.utxo_set.get_utxo(tx_id, index)
+            if(utxo is not None):
+                return [index, utxo[0], utxo[2]]
+        # Look for the transaction in the blocks
+        tx_index = self.get_tx_index()
+        if(tx_id in tx_index):
+            position = tx_index[tx_id]
+            tx = self.blocks[position[0]].tx[position[1]]
+        else:
+            # Look for the transaction in mempool
+            tx = self.mempool.get_tx(tx_id)
+            if(tx is None):
+                return None
+        # Find the output with the right index
+        for outputs in tx.outputs:
+            if(outputs[0] == index):
+                return outputs
+        return None
             
     # Method for loading the whole blockchain in block and transaction objects
     def load_bc(self):
         print("\nLoading blockchain from files into memory...")
         # Read the highest block number in the block folder
-        max_block = blm.Block.get_max_block(self.block_path) 
+        max_block = self.get_max_block() 
         # If there is any block file in the block folder
         if(max_block < 0):
             print("No block files in block folder: Blockchain empty!")
         else:   
+            # Use the checkpoint of the block headers, if it doesn't contain more blocks than the block folder
+            self.changed_blocks = None
+            if(self.checkpoint.load() and max(self.checkpoint.headers, default = -1) <= max_block):
+                self.changed_blocks = []
             # Iterate through blocks
             for block_nr in range(max_block + 1):
+                # Unchanged blocks are loaded from the checkpoint
+                if(self.changed_blocks is not None):
+                    if(self.load_block_from_checkpoint(block_nr)):
+                        continue
+                    self.changed_blocks.append(block_nr)
                 self.load_block_in_bc(block_nr)
                 # Check if block is valid
                 if not(self.blocks[block_nr].block_valid):
@@ -126,13 +406,37 @@ class Blockchain:
                                     print(f"> {err_t}")
                 else:
                     print(f"Block {block_nr} of {max_block} successfully loaded...")
+            if(self.changed_blocks is not None):
+                print(f"{max_block + 1 - len(self.changed_blocks)} block headers loaded from checkpoint, {len(self.changed_blocks)} blocks changed")
             print("Loading blocks finished")
             if(self.bc_valid):
                 print("Blockchain successfully loaded")
+                self.update_utxo_set()
             else:
                 print("LOADING BLOCKCHAIN FAILED!")
                 print("\nTerminating program...")
                 
+    # Method brings the UTXO set up to date with the loaded blocks
+    # The stored UTXO set is used, if its highest block is still part of the blockchain
+    # Then only the blocks after it need to be added
+    # Otherwise the UTXO set is rebuilt from all blocks
+    def update_utxo_set(self):
+        height = -1
+        if(self.utxo_set.load()):
+            height = self.utxo_set.height
+            # Check if the stored UTXO set belongs to this blockchain
+            if(height >= len(self.blocks) or (height >= 0 and self.blocks[height].get_header_hash() != self.utxo_set.tip_hash)):
+                height = -1
+        if(height == -1):
+            print("Building UTXO set...")
+            self.utxo_set.clear()
+        # Add all blocks which are not in the UTXO set yet
+        for block in self.blocks[height + 1:]:
+            self.utxo_set.add_block(block)
+        if(height != len(self.blocks) - 1):
+            self.utxo_set.save()
+        print(f"UTXO set loaded ({len(self.utxo_set.utxos)} UTXOs)")
+
     # Method returns the previous hash in the block header of the next block
     # If there is no next block the method returns an empty string
     # Like the method in blm.py, but data is taken from blockchain objects instead of block files
@@ -153,22 +457,39 @@ class Blockchain:
     # 1. Check if the hash of a block matches the hash in the header of the next block
     # 2. Check for every transaction in a block if its hash = ID is correct
     # 3. Check if the transaction hash in the block header is correct 
-    # Does NOT validate transactions in terms of signature checking!!!
+    # Every block header hash and transaction hash is calculated only once (one pass through the blocks)
+    # Does NOT validate transactions in terms of signature checking,
+    # unless the deep validation is switched on (deep = True), see validate_bc_deep()
     # All data comes fron the blockchain object and not from the text files
-    def validate_bc(self): 
+    def validate_bc(self, deep = False): 
         print("\nValidating blockchain...")        
+        # Only the blocks, which were changed since the checkpoint, need to be validated
+        # If they are not valid, the whole blockchain is validated
+        if not(deep) and self.changed_blocks is not None and self.bc_valid:
+            if(self.validate_changed_blocks()):
+                self.save_checkpoint()
+                print("Validating blocks finished")
+                print("Blockchain successfully validated")
+                return
+            print("Blocks changed since the checkpoint are not valid: validating all blocks...")
+        self.changed_blocks = None
         # If there are any block objects in the blockchain
         if not(len(self.blocks)):
             print("No block files in block folder: Blockchain empty!")
         else:   
+            # Previous hash in the header of each block: block number -> previous hash
+            # Replaces the search with get_next_header_hash() for every block
+            prev_hashes = {}
+            for block in self.blocks:
+                prev_hashes[block.number] = block.prev_hash
             # Iterate through blocks
             for block in self.blocks:                
                 # Check if the block hash is the same as the previous hash in the next block header
-                # In case there is no next block the method returns an empty string
+                # In case there is no next block the next hash is an empty string
                 # block_hash = calculated from current block header
                 # next_hash = read from next block header
                 block_hash = block.get_header_hash()
-                next_hash = self.get_next_header_hash(block.number)
+                next_hash = prev_hashes.get(block.number + 1, "")
                 # print(block_hash)
                 # print(next_hash)
                 # If the hash of the block doesn't matche the hash in the header of the next block
@@ -180,6 +501,8 @@ class Blockchain:
                     # Set blockchain as invalid
                     self.bc_valid = False 
                 else:  
+                    # Transaction hash of the block, calculated once for all transactions
+                    tx_hash_block = block.get_tx_hash_block()
                     # Go through all transactions in the block and check,
                     # if the hash = ID of transactions are correct
                     for tx in block.tx:
@@ -197,8 +520,8 @@ class Blockchain:
                         else:
                             # Check if the transaction hash in the block header is correct
                             # print(block.tx_hash)
-                            # print(block.get_tx_hash_block())
-                            if not(block.tx_hash == block.get_tx_hash_block()):
+                            # print(tx_hash_block)
+                            if not(block.tx_hash == tx_hash_block):
                                 tx.error.append(f"Transaction hash in block {block.number} header does not match the actual transaction hash!")
                                 block.block_valid = False 
                                 # Set blockchain as invalid
@@ -226,14 +549,168 @@ class Blockchain:
                     print(f"Block {block.number} of {len(self.blocks) - 1} successfully validated...")  
                 else:
                     print(f"BLOCK {block.number} INVALID!")
+                    # Also for errors while loading the transactions
+                    self.bc_valid = False
+            # Validate transaction inputs and signatures
+            if(deep):
+                self.validate_bc_deep()
             # Output mssages for blockchain
             print("Validating blocks finished")
             if(self.bc_valid):
                 print("Blockchain successfully validated")
+                self.save_checkpoint()
             else:
                 print("VALIDATING BLOCKCHAIN FAILED!")
                 print("\nTerminating program...")                                                   
         
+    # Method validates only the blocks, which were changed since the checkpoint was saved
+    # Same checks as in validate_bc() for these blocks and the links to the neighbouring blocks
+    # The other blocks were already validated, when the checkpoint was saved
+    # Returns False if any changed block is not valid
+    def validate_changed_blocks(self):
+        for block_nr in self.changed_blocks:
+            block = self.blocks[block_nr]
+            if not(block.block_valid):
+                return False
+            block_hash = block.get_header_hash()
+            # Links to the previous and to the next block
+            if(block_nr > 0 and block.prev_hash != self.blocks[block_nr - 1].get_header_hash()):
+                return False
+            if(block_nr < len(self.blocks) - 1 and self.blocks[block_nr + 1].prev_hash != block_hash):
+                return False
+            # Transaction hashes
+            if(block.tx_hash != block.get_tx_hash_block()):
+                return False
+            for tx in block.tx:
+                if(tx.get_tx_id() != tx.tx_id):
+                    return False
+            # Errors while loading the transactions
+            if not(block.block_valid):
+                return False
+            print(f"Block {block_nr} of {len(self.blocks) - 1} successfully validated...")
+        print(f"{len(self.blocks) - len(self.changed_blocks)} blocks validated by checkpoint")
+        return True
+
+    # Method validates all transactions of the blockchain ("deep validation")
+    # That means for every input:
+    # 1. The referenced output exists in an earlier transaction
+    # 2. The referenced output is not spent by any other input in the blockchain (double spend)
+    # 3. The public key leads to the address of the referenced output
+    # 4. The signature is valid
+    # Checks 1-3 are done block by block in this process,
+    # the signatures are verified in a pool of processes (one block per task)
+    # Prints the progress and the throughput
+    # Returns the first failing outpoint (Tx ID, Output index) in the blockchain or None
+    def validate_bc_deep(self):
+        print("\nDeep validation of transactions...")
+        start = time.perf_counter()
+        # Outpoint (Tx ID, Output index) -> Tx ID of the spending transaction
+        spent = {}
+        # Signatures for each block: (public key, signature, Tx ID)
+        groups = []
+        # Position of the transaction in the block and outpoint for each signature
+        # The transaction objects are not kept, as they may be removed from the cache
+        refs = []
+        tx_index = self.get_tx_index()
+        # Failed inputs: (block number, position of the input in the block, outpoint)
+        failures = []
+        for block in self.blocks:
+            items = []
+            block_refs = []
+            for position, tx in enumerate(block.tx):
+                for inp in tx.inputs:
+                    outpoint = (inp[0], inp[1])
+                    error = ""
+                    # 1. Look up the referenced output
+                    outputs = None
+                    location = tx_index.get(inp[0])
+                    if(location is not None and (location[0] < block.number or (location[0] == block.number and location[1] < position))
+                       and self.blocks[location[0]].tx[location[1]].tx_id == inp[0]):
+                        for out in self.blocks[location[0]].tx[location[1]].outputs:
+                            if(out[0] == inp[1]):
+                                outputs = out
+                    if(outputs is None):
+                        error = f"Output {inp[0]}|{inp[1]} referenced in transaction {tx.tx_id} in block {block.number} not found!"
+                    # 2. Check for double spend
+                    elif(outpoint in spent):
+                        error = f"Output {inp[0]}|{inp[1]} is spent in transaction {spent[outpoint]} and in transaction {tx.tx_id} in block {block.number}!"
+                    # 3. Check if public key from inputs leads to same address as in outputs
+                    elif(outputs[1] != fnc.get_wallet_address(inp[2])):
+                        error = f"Public key in input of transaction {tx.tx_id} in block {block.number} does not result in address of output ({outputs[1]})!"
+                    if(error != ""):
+                        tx.error.append(error)
+                        print(f"> {error}")
+                        failures.append((block.number, len(items), outpoint))
+                        tx.tx_valid = False
+                        block.block_valid = False
+                        self.bc_valid = False
+                    spent[outpoint] = tx.tx_id
+                    items.append((inp[2], inp[3], tx.tx_id))
+                    block_refs.append((position, outpoint))
+            groups.append(items)
+            refs.append(block_refs)
+        # 4. Verify signatures in parallel, the results come in the order of the blocks
+        sig_count = 0
+        for n, valid in enumerate(fnc.verify_ECDSA_groups(groups, self.verify_processes)):
+            block = self.blocks[n]
+            for i in range(len(valid)):
+                if not(valid[i]):
+                    tx = block.tx[refs[n][i][0]]
+                    outpoint = refs[n][i][1]
+                    error = f"Signature in input {outpoint[0]}|{outpoint[1]} of transaction {tx.tx_id} in block {block.number} not valid!"
+                    tx.error.append(error)
+                    print(f"> {error}")
+                    failures.append((block.number, i, outpoint))
+                    tx.tx_valid = False
+                    block.block_valid = False
+                    self.bc_valid = False
+            sig_count += len(valid)
+            seconds = time.perf_counter() - start
+            print(f"Block {block.number} of {len(self.blocks) - 1}: {len(valid)} signatures checked ({sig_count / seconds:,.0f} signatures/s)")
+        seconds = time.perf_counter() - start
+        print(f"Deep validation finished: {sig_count} inputs in {seconds:.3f} s ({sig_count / seconds:,.0f} inputs/s)")
+        if not(len(failures)):
+            print("All transaction inputs valid")
+            return None
+        else:
+            first = min(failures)
+            print(f"First failing outpoint: {first[2][0]}|{first[2][1]} (block {first[0]})")
+            return first[2]
+
+    # Method looks up the outputs, which are referenced by the inputs of a transaction
+    # and checks if the public keys in the inputs lead to the addresses of the outputs
+    # Returns a list, which contains for every input: 
+    # verify[0]: input public key
+    # verify[1]: input signature
+    # verify[2]: output address
+    # Returns False if an output was not found or an address doesn't match
+    def get_verify_list(self, tx_id, tx_inputs):
+        verify = []
+        # Iterate through all transaction inputs
+        for inputs in tx_inputs:
+            # Get public key and signature ("unlocking script") from inputs
+            tx_id_inp = inputs[0]
+            index_inp = inputs[1]
+            public_key_inp = inputs[2]
+            signature_inp = inputs[3]
+            # Look for the output of a previous transaction 
+            # where the input is referencing to (in blocks or in mempool)
+            # and get the address to generate the public key hash
+            outputs = self.get_output(tx_id_inp, index_inp)
+            # outputs[0]: Index Output
+            # outputs[1]: Address
+            # outputs[2]: Volume
+            if(outputs is None):
+                print("Output for transaction input could not be found!")
+                return False  
+            # Check if public key from inputs leads to same address as in outputs
+            # -> Output was directed to sender
+            if not(outputs[1] == fnc.get_wallet_address(public_key_inp)):
+                print(f"Public key in transaction input does not result in address of output ({outputs[1]})!")
+                return False  
+            verify.append([public_key_inp, signature_inp, outputs[1]])
+        return verify
+
     # Method validates transactions
     # That means that only the the user who has the private key to an address (public key)
     # in the input UTXOs can transfer the coins to the next address
@@ -243,76 +720,172 @@ class Blockchain:
             # print(f"Transaction {tx_id} is a coinbase transaction and cannot be validated!")
             return True           
         else:
-            # Load mempool transactions into a list
-            mem_tx = self.load_mempool(self.user_path, self.mem_path, self.block_path)  
-            # Get number of inputs
-            tx_input_count = len(tx_inputs)
-            # Generate a list, which contains: 
-            # verify[0]: input public key
-            # verify[1]: input signature
-            # verify[2]: output address
-            verify = []
-            # Iterate through all transaction inputs
-            for inputs in tx_inputs:
-                # Get public key and signature ("unlocking script") from inputs
-                tx_id_inp = inputs[0]
-                index_inp = inputs[1]
-                public_key_inp = inputs[2]
-                signature_inp = inputs[3]
-                # Look for the output of a previous transaction 
-                # where the input is referencing to
-                # and get the address to generate the public key hash
-                # Iterate through all blocks to find the output
-                for block in self.blocks:
-                    # Iterate through all transactions of the block
-                    for tx in block.tx:
-                        # Iterate through all outputs of the transaction
-                        for outputs in tx.outputs:
-                            # outputs[0]: Index Output
-                            # outputs[1]: Address
-                            # outputs[2]: Volume
-                            # If the right output was found
-                            # print(tx_id_inp)
-                            # print(tx.tx_id)
-                            if(tx_id_inp == tx.tx_id and index_inp == outputs[0]):
-                                verify.append([public_key_inp, signature_inp, outputs[1]])
-                                # print("found block")
-                # If not all outputs weren't found in blocks search in mempool
-                if(len(verify) < tx_input_count):
-                    # Iterate through all transactions in mempool
-                    for tx in mem_tx:                    
-                        # Iterate through all outputs of the transaction
-                        for outputs in tx.outputs:                                
-                            # If the right output was found
-                            if(tx_id_inp == tx.tx_id and index_inp == outputs[0]):
-                                verify.append([public_key_inp, signature_inp, outputs[1]])  
-                                # print("found mem")
-            # Check if outputs could be found
-            if(len(verify) != tx_input_count):
-                # print(verify)
-                print("Output for transaction input could not be found!")
-                return False  
+            # Find outputs and check addresses
+            verify = self.get_verify_list(tx_id, tx_inputs)
+            if(verify == False):
+                return False
+            # Ckeck signatures
+            # -> Sender has the private key to spend the output UTXO
+            for ver in verify:
+                if not(fnc.verify_ECDSA_str(ver[0], ver[1], tx_id)):
+                    print(f"Signature ({ver[1]}) not valid!")
+                    return False  
+            return True  
+
+    # Method validates a list of transaction objects like validate_tx()
+    # The signatures of all transactions are verified together in a pool of processes
+    # Returns a list of True/False in the order of the transactions
+    def validate_txs(self, txs):
+        results = []
+        # Signatures of all transactions: (public key, signature, Tx ID)
+        items = []
+        # Position of the transaction for each signature
+        positions = []
+        for position, tx in enumerate(txs):
+            verify = self.get_verify_list(tx.tx_id, tx.inputs)
+            if(verify == False):
+                results.append(False)
             else:
-                # Actual veryfying process
-                # 1. Check if public key from inputs leads to same address as in outputs
-                # -> Output was directed to sender
+                results.append(True)
                 for ver in verify:
-                    if not(ver[2] == fnc.get_wallet_address(ver[0])):
-                        print(f"Public key in transaction input does not result in address of output ({ver[2]})!")
-                        return False  
-                    else:
-                        # 2. Ckeck signature
-                        # -> Sender has the private key to spend the output UTXO
-                        result = fnc.verify_ECDSA_str(public_key_inp, signature_inp, tx_id)
-                        if not(result):
-                            print("Signature ({signature_inp}) not valid!")
-                            return False  
-                        else:
-                            return True  
- 
+                    items.append((ver[0], ver[1], tx.tx_id))
+                    positions.append(position)
+        # Verify all signatures at once
+        valid = fnc.verify_ECDSA_batch(items, self.verify_processes)
+        for i in range(len(items)):
+            if not(valid[i]) and results[positions[i]]:
+                print(f"Signature ({items[i][1]}) not valid!")
+                results[positions[i]] = False
+        return results
+
+    # Returns the reason, why a transaction conflicts with the blockchain or with the mempool
+    # Checked for every input with the indexes of the UTXO set and the mempool (no search):
+    # 1. The output is not spent twice in the transaction itself
+    # 2. The output is not spent by another transaction in mempool
+    # 3. The output is unspent in the blockchain or an output of a transaction in mempool
+    # check_mempool: if False, check 2. is skipped (e.g. the block template checks it with its own transactions)
+    # Returns an empty string if there is no conflict
+    def get_tx_conflict(self, tx, check_mempool = True):
+        # The UTXO set is only up to date if the whole blockchain is loaded
+        utxo_valid = (self.utxo_set.height == len(self.blocks) - 1)
+        outpoints = set()
+        # inp[0]: Tx ID Output
+        # inp[1]: Index Output (UTXO)
+        for inp in tx.inputs:
+            outpoint = (inp[0], int(inp[1]))
+            if(outpoint in outpoints):
+                return f"Output {inp[0]}|{inp[1]} is spent twice in transaction {tx.tx_id}!"
+            outpoints.add(outpoint)
+            spending_tx = self.mempool.get_spending_tx(inp[0], int(inp[1])) if(check_mempool) else None
+            if(spending_tx is not None and spending_tx != tx.tx_id):
+                return f"Output {inp[0]}|{inp[1]} is already spent in transaction {spending_tx} in mempool!"
+            if(utxo_valid and self.utxo_set.get_utxo(inp[0], int(inp[1])) is None):
+                # Output of a transaction in mempool
+                parent = self.mempool.get_tx(inp[0])
+                if(parent is None or int(inp[1]) not in [int(out[0]) for out in parent.outputs]):
+                    return f"Output {inp[0]}|{inp[1]} is already spent or does not exist!"
+        return ""
+
+    # Method adds a transaction with valid signatures to the mempool
+    # Transactions, which are already in mempool or which conflict with other transactions, are rejected
+    # The signatures must be checked before (see validate_tx())
+    # Returns False if the transaction was rejected
+    def submit_tx(self, tx):
+        # With the lock of the blocks and the mempool file, so no other program adds a conflicting transaction
+        # or mines a block in the meantime (always in this order, like in mine_block())
+        with self.get_block_lock(), self.mempool.lock:
+            # Transactions in blocks of other programs are not in mempool anymore
+            if not(self.load_new_blocks()):
+                print("Transaction rejected!")
+                return False
+            if(self.mempool.get_tx(tx.tx_id) is not None):
+                print(f"Transaction {tx.tx_id} is already in mempool!")
+                return False
+            conflict = self.get_tx_conflict(tx)
+            if(conflict != ""):
+                print(conflict)
+                print("Transaction rejected!")
+                return False
+            return self.mempool.add_tx(tx)
+
+    # Method adds a list of transactions to the mempool and writes them to the mempool file at once
+    # Every transaction is checked like in submit_tx() against the blockchain, the mempool
+    # and the transactions before it in the list, so a transaction can spend the change of the one before
+    # The signatures of all transactions are verified together (see validate_txs())
+    # Transactions, which spend an output of a rejected transaction, are rejected too
+    # fsync: if True, the function returns when the transactions are written to the disk
+    # Returns a list with the status for every transaction: "accepted" or the reason of the rejection
+    def submit_txs(self, txs, fsync = True):
+        # With the lock of the blocks and the mempool file, so no other program adds a conflicting transaction
+        # or mines a block in the meantime (always in this order, like in mine_block())
+        with self.get_block_lock(), self.mempool.lock:
+            # Transactions in blocks of other programs are not in mempool anymore
+            if not(self.load_new_blocks()):
+                return ["Blockchain not valid!"] * len(txs)
+            status = []
+            # Signatures of all transactions: (public key, signature, Tx ID)
+            items = []
+            # Position of the transaction for each signature
+            positions = []
+            for position, tx in enumerate(txs):
+                if(self.mempool.get_tx(tx.tx_id) is not None):
+                    status.append(f"Transaction {tx.tx_id} is already in mempool!")
+                    continue
+                conflict = self.get_tx_conflict(tx)
+                if(conflict != ""):
+                    status.append(conflict)
+                    continue
+                verify = self.get_verify_list(tx.tx_id, tx.inputs)
+                if(verify == False):
+                    status.append("Referenced output not found or public key does not match its address!")
+                    continue
+                # Staged transactions are in the mempool in memory, so the next transactions are checked against them
+                if(self.mempool.stage_tx(tx) is None):
+                    status.append("Mempool file not found!")
+                    continue
+                status.append("accepted")
+                for ver in verify:
+                    items.append((ver[0], ver[1], tx.tx_id))
+                    positions.append(position)
+            # Verify all signatures at once
+            valid = fnc.verify_ECDSA_batch(items, self.verify_processes)
+            rejected = set()
+            for i in range(len(items)):
+                if not(valid[i]) and status[positions[i]] == "accepted":
+                    status[positions[i]] = f"Signature ({items[i][1]}) not valid!"
+                    rejected.add(txs[positions[i]].tx_id)
+            # Children of rejected transactions (they come after their parents in the list)
+            if(len(rejected)):
+                for position, tx in enumerate(txs):
+                    if(status[position] == "accepted" and any(inp[0] in rejected for inp in tx.inputs)):
+                        status[position] = "Transaction spends an output of a rejected transaction!"
+                        rejected.add(tx.tx_id)
+                self.mempool.unstage_txs(rejected)
+            # Write all accepted transactions in one append
+            self.mempool.flush(fsync)
+            return status
+
+    # Returns the fee of a transaction = sum of the inputs - sum of the outputs
+    # The fee goes to the miner of the block with the transaction
+    # Rounded to 3 decimals like all volumes
+    # Returns None if an output referenced by an input was not found
+    def get_tx_fee(self, tx):
+        fee = 0
+        # inp[0]: Tx ID Output
+        # inp[1]: Index Output (UTXO)
+        for inp in tx.inputs:
+            output = self.get_output(inp[0], inp[1])
+            if(output is None):
+                return None
+            fee += float(output[2])
+        # out[2]: Volume
+        for out in tx.outputs:
+            fee -= float(out[2])
+        return round(fee, 3)
+
     # Method prints mempool transactions
     def print_mempool(self):
-        tx_mem = self.load_mempool(self.user_path, self.mem_path, self.block_path)
+        tx_mem = self.get_mempool()
         # Check amount of transactions in mempool
         tx_count = len(tx_mem)
         if(tx_count > 0):
@@ -324,84 +897,87 @@ class Blockchain:
             
             
     # Method to mine a block
+    # Several programs can mine with the same blocks and mempool:
+    # Blocks of other programs are loaded first, the mempool is changed only after the block was written
+    # and the block is only written, if no other program has written a block in the meantime
+    # Returns False if no block was written
     def mine_block(self, wallet, difficulty, mining_reward, min_tx_mine):  
+        # Load the blocks, which were mined by other programs
+        if not(self.load_new_blocks()):
+            return False
         ####################################
         # Load and verify txs from mempool #
         ####################################
         # Check, if there are transactions in mempool
-        tx_count_mem = Transaction.get_tx_count_mempool(self.mem_path) 
+        # The mempool file is parsed only once
+        tx_count_mem = len(self.mempool.get_txs()) 
+        # Create a list wit all VALID transactions in mempool
+        tx_mem = []
+        # Sum of the fees of the transactions for the miner
+        fees = 0
         # min_tx_mine ist the least amount of transactions in mempool before a new block can be mined
         # Coinbase transactions do not count here
         if(tx_count_mem < min_tx_mine):
             print(f"Next block cannot be mined: At least {min_tx_mine} valid transactions need to be in mempool!") 
         else:
-            # Create a list wit all VALID transactions in mempool
-            tx_mem = []
-            # Iterate through transactions in mempool
-            for i in range(tx_count_mem):
-                # Create an empty transaction object
-                tx = Transaction(self.user_path, self.mem_path, self.block_path)
-                # Load transaction data in object
-                tx.load_tx_from_mempool(i)
-                # If the transaction couldn't be loaded
-                if not(tx):
-                    print(f"Transaction {i} in mempool is corrupted and cannot be loaded!") 
-                else:
-                    # Validate signature of transaction
-                    if not(self.validate_tx(tx.tx_id, tx.inputs)):
-                        print(f"Signature not valid! Transaction {i} not accepted by the system")   
-                    else:
-                        # Include transaction in validated list
-                        tx_mem.append(tx)
+            # Check the transactions, which arrived since the last update of the block template
+            # (signatures, inputs and fee), the others were already checked
+            self.template.update(self)
+            # Choose the transactions with the highest fee per byte up to the maximum block size
+            tx_mem, fees = self.template.select(self.max_block_size)
         # Check, how many valid transactions are still left
         tx_count_val = len(tx_mem)
         # If there are no valid transactions left
         if(tx_count_val < min_tx_mine):
             print(f"Next block cannot be mined: At least {min_tx_mine} valid transactions need to be in mempool!") 
         else:
+            # The chosen and the rejected transactions are removed from mempool after the block was written,
+            # the other valid transactions stay in mempool for the next block
+            # This way new transactions can be added to mempool during the mining process
+            # Only transactions checked by the template are removed, not the ones added in the meantime
+            chosen = set(tx.tx_id for tx in tx_mem)
+            removed = chosen | self.template.rejected
             if(tx_count_mem):
                 print(f"{tx_count_val} transactions successfully loaded from mempool and verified!") 
-                # As all valid transactions are loaded from mempool it can be cleared
-                # This way new transactions can be added to mempool during the mining process            
-                print("Mempool cleared")  
-            Transaction.clear_mempool(self.mem_path)            
             ####################
             # Create new block #
             ####################           
             # Create a block object                  
             bl = blm.Block(self.block_path, self.user_path, self.mem_path)
             # Read the highest block number in the block folder
-            max_block = blm.Block.get_max_block(self.block_path) 
+            max_block = self.get_max_block() 
             # If the highest block is not present in the directory (-2)
             if(max_block == -2):
                 print(f"Next block {max_block+1} cannot be mined: Last block {max_block} is missing!") 
                 return False
             else:      
                 ### Generate block header data ###                
-                # If there is no block file in the directory yet (-1), genesis block needs to be created
-                if(max_block == -1):
+                # If there is no block yet, genesis block needs to be created
+                if not(len(self.blocks)):
                     bl.number = 0
                     # Hash for previous hash in block header as there is no previous block 
                     bl.prev_hash = bl.get_genesis_hash() 
                 else:
-                    bl.number = max_block + 1
-                    # Generate the hash of the block header of the previous file
-                    bl.prev_hash = bl.get_block_header_hash(max_block, self.block_path)                        
+                    # The block follows the last block of the blockchain in memory,
+                    # which the transactions were checked against (see the check before writing the block)
+                    bl.number = len(self.blocks)
+                    bl.prev_hash = self.blocks[-1].get_header_hash()
             # Add coinbase transaction to transaction count
             bl.tx_count = tx_count_val + 1                     
             # Timestamp of the beginning of the mining process
             bl.timestamp = datetime.timestamp(datetime.now())              
             # Mining difficulty as instance variable
             bl.difficulty = difficulty 
+            # Block version (transaction hash or Merkle tree)
+            bl.version = self.block_version
             # Transfer transaction to block
             # Get conbase transaction
             coinbase = Transaction(self.user_path, self.mem_path, self.block_path) 
-            coinbase.get_coinbase_data(wallet, mining_reward, bl.timestamp)
-            # Add coinbase to block transactions
-            bl.tx.append(coinbase)    
-            # Add the other verified transactions from mempool
-            for tx in tx_mem:
-                bl.tx.append(tx) 
+            # The miner gets the mining reward and the fees of all transactions in the block
+            coinbase.get_coinbase_data(wallet, round(mining_reward + fees, 3), bl.timestamp)
+            # Add coinbase and the other verified transactions from mempool to the block
+            # The Merkle tree of the last block template is updated, if possible (see BlockTemplate.fill_block())
+            self.template.fill_block(bl, coinbase, tx_mem)
             # Get transaction hash and wirte it to block header   
             bl.tx_hash = bl.get_tx_hash_block()
             # Set block to valid
@@ -412,14 +988,58 @@ class Blockchain:
             # Find nonce for the given mining difficulty            
             # -> actual mining process
             print(f"Start minig block {bl.number}...")
-            bl.nonce = self.get_nonce(bl.number, bl.timestamp, bl.prev_hash, bl.tx_count, bl.tx_hash, bl.difficulty)
+            if(self.miner is None):
+                bl.nonce = self.get_nonce(bl.number, bl.timestamp, bl.prev_hash, bl.tx_count, bl.tx_hash, bl.difficulty, bl.version)
+            else:
+                bl.nonce = self.miner.get_nonce(bl.number, bl.timestamp, bl.prev_hash, bl.tx_count, bl.tx_hash, bl.difficulty, bl.version)
             print(f"Block {bl.number} was sucessfully mined!")
             print(f"It took {bl.nonce} attempts at mining difficulty {bl.difficulty}")             
+            if(self.miner is not None):
+                print("Hash rate of mining workers:")
+                print(self.miner.get_stats_string(), end='')
             # print(bl.get_header_hash())  
-            # Write block object to file
-            bl.write_block_to_file()
-            # Add new block to blockchain
-            self.blocks.append(bl)            
+            # Write block object to file or append it to the block store
+            # With the lock of the blocks: the previous block must still be the last block (optimistic check),
+            # if another program has written a block in the meantime, the mined block is discarded
+            # The indexes are also updated with the lock, so other programs don't write them at the same time
+            with self.get_block_lock():
+                max_block = self.get_max_block()
+                if(max_block != bl.number - 1 or (max_block >= 0 and self.get_block_header_hash(max_block) != bl.prev_hash)):
+                    print(f"Block {bl.number} was written by another program in the meantime: mined block discarded!")
+                    return False
+                if(self.store is None):
+                    bl.write_block_to_file()
+                else:
+                    self.store.append_block(bl)
+                # Remove the transactions of the block from mempool
+                # Transactions, which were added by other programs in the meantime, stay in mempool
+                if(len(removed)):
+                    changed = self.mempool.remove_txs(removed)
+                    self.template.remove_txs(self, removed)
+                    if(changed):
+                        self.template.clear()
+                    if(len(self.mempool.txs)):
+                        print(f"{len(self.mempool.txs)} transactions left in mempool")
+                    else:
+                        print("Mempool cleared")
+                # Add new block to blockchain
+                self.blocks.append(bl)            
+                self.add_block_to_cache(bl)
+                self.index_block(bl)
+                # Add new block to the checkpoint, if it contains all previous blocks
+                if(len(self.checkpoint.headers) == bl.number and self.bc_valid):
+                    self.checkpoint.add_block(bl, self.get_block_stamp(bl.number))
+                    if(self.store is not None):
+                        self.update_segment_stamps(bl.number)
+                    self.checkpoint.save()
+                # Add new block to UTXO set
+                # If the UTXO set is not up to date with the previous block, it is updated completely
+                if(self.utxo_set.height == bl.number - 1):
+                    self.utxo_set.add_block(bl)
+                    self.utxo_set.save()
+                else:
+                    self.update_utxo_set()
+            return True
 
 
 
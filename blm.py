@@ -12,6 +12,11 @@ import os
 # exists: check, if file in a directory exists
 # source: https://www.pythontutorial.net/python-basics/python-check-if-file-exists/
 from os.path import exists
+# struct: packing numbers into bytes for the binary block format
+# source: https://docs.python.org/3/library/struct.html
+import struct
+# sys: for reading the command line arguments of the block converter
+import sys
 # hashlib: encryption/decryption module
 # For this project the SHA-256 encryprion function is needed (also used for Bitcoin)
 # It converts a series of bits/bytes (e.g. a text) in a 256 bit long binary number, which is called the hash
@@ -28,6 +33,27 @@ import fnc
 # trm (transaction module). Own module for handeling transactions
 # import like this due to circular import with class transaction
 import trm
+# mnm (mining module): Own module for the header string of the header hash
+import mnm
+
+# Block versions
+# 1: Transaction hash = SHA256 hash of all transaction IDs, block header with 7 elements
+# 2: Transaction hash = root of a Merkle tree of the transaction IDs,
+#    the version is the 8th element of the block header (text format)
+# From version 2 the version is part of the header hash (see mnm.get_header_string()),
+# so it cannot be changed without mining the block again, the header hash of version 1 blocks is unchanged
+BLOCK_VERSIONS = (1, 2)
+MERKLE_VERSION = 2
+
+# Binary block format:
+# Magic bytes "MiCB" and format version = block version (1 byte)
+# Block header (numbers in big-endian byte order):
+# Block number (4 bytes), Timestamp (8 bytes float), Hash of previous block header (32 bytes),
+# Number of transactions (4 bytes), Transaction hash (32 bytes), Difficulty (1 byte), Nonce (8 bytes)
+# Then all transactions in the format of Transaction.get_tx_bytes() (length-prefixed)
+BIN_MAGIC = b"MiCB"
+BIN_HEADER = ">Id32sI32sBQ"
+BIN_HEADER_SIZE = struct.calcsize(BIN_HEADER)
 
 #########
 # Class #
@@ -62,8 +88,21 @@ class Block():
         # Error handling
         self.block_valid = False
         self.error = []
-        # List of all transactions in the block
-        self.tx = []
+        # List of all transactions in the block, empty for a new block without transactions
+        # Set to None by load_block() with load_tx = False: transactions not loaded yet (see property tx)
+        self.tx_list = []
+        # Function, which returns the transactions of the block (e.g. Blockchain.get_block_txs)
+        # If None, the transactions are loaded from the block file on first access
+        self.tx_loader = None
+        # Size of the block data in bytes (block file or binary block format)
+        self.size = 0
+        # Block version (see BLOCK_VERSIONS)
+        self.version = 1
+        # Merkle tree of the transaction IDs (version 2), built on first use (see get_merkle_tree())
+        # List of levels: level 0 = leaf hashes, last level = root (hashes as bytes)
+        self.merkle_tree = None
+        # Transaction list, from which the Merkle tree was built
+        self.merkle_txs = None
                         
     # Print Object as formatted string
     def __str__(self, version = 'long'):
@@ -89,6 +128,7 @@ class Block():
         bl_str += f"\t{'Tx hash':11}: {self.tx_hash}\n"
         bl_str += f"\t{'Difficulty':11}: {self.difficulty}\n"
         bl_str += f"\t{'Nonce':11}: {self.nonce}\n"
+        bl_str += f"\t{'Version':11}: {self.version}\n"
         # Short and long version                         
         bl_str += f"\t{'Block valid':11}: "
         if(self.block_valid):
@@ -106,6 +146,24 @@ class Block():
             # bl_str += t.__str__('short')
         return bl_str
    
+    ##############
+    # Properties #
+    ##############
+
+    # List of all transactions in the block
+    # If the block was loaded without transactions, they are loaded on first access
+    @property
+    def tx(self):
+        if(self.tx_loader is not None):
+            return self.tx_loader(self)
+        if(self.tx_list is None):
+            self.tx_list = self.load_txs()
+        return self.tx_list
+
+    @tx.setter
+    def tx(self, tx_list):
+        self.tx_list = tx_list
+
     ##################
     # Static methods #
     ##################
@@ -117,19 +175,21 @@ class Block():
     # If the block is not present in the folder, return -2
     # Highest block is determined by the amount of files in the block folder
     # In addition it will be checked if there is a file with this name 
+    # ext: file extension of the block files ('bl' for text, 'blb' for binary block files)
     @staticmethod
-    def get_max_block(block_path):
+    def get_max_block(block_path, ext = 'bl'):
         # Iterate block directory
+        # Only block files are counted, not lock files or temporary files of a block being written
         block_count = 0
         for path in os.listdir(block_path):
-            # Check if current path is a file
-            if(os.path.isfile(os.path.join(block_path, path))):
+            # Check if current path is a block file
+            if(path.endswith('.' + ext) and os.path.isfile(os.path.join(block_path, path))):
                 block_count += 1
         # If there is any (block) file in the folder
         if(block_count > 0):
             max_block = block_count - 1           
             # Check here if the filename (the block number in the block header and maybe the latest timestamp) is correct
-            block_exists = exists(block_path + '/' + str(max_block) + '.bl')
+            block_exists = exists(block_path + '/' + str(max_block) + '.' + ext)
             if(block_exists):                
                 return max_block
             else:
@@ -157,37 +217,137 @@ class Block():
             # Read first line of block and remove line break at the end of the line
             header_line = handle.readline().strip()     
         header_list = header_line.split("|")
-        # If header missing entries
-        if(len(header_list) != 7):
+        # If header missing entries (8th element: block version)
+        if(len(header_list) not in (7, 8)):
             print(f"Error: Block header in block {block_nr} corrupted!")
             return False
         else:
-            # Create a string with each element of the header without whitespaces and line breaks
-            header_string = ""
-            ### 0: Block number ###
-            header_string += header_list[0].strip()              
-            ### 1: Timestamp of start mining of the block ### 
-            header_string += header_list[1].strip()
-            ### 2: Hash of the previous block ### 
-            header_string += header_list[2].strip() 
-            ### 3: Number of transactions in block ###
-            header_string += header_list[3].strip()           
-            ### 4: Hash of transactions in the block ###                
-            header_string += header_list[4].strip() 
-            ### 5: Mining difficulty ### 
-            header_string += header_list[5].strip()           
-            ### 6: Nonce ### 
-            header_string += header_list[6].strip()
-            # Return hash                         
-            return hashlib.sha256(header_string.encode()).hexdigest()
+            return Block.get_header_list_hash(header_list)
+
+    # Returns the hash of a block header, which is already split into its elements
+    # SHA-256 Hash in hexadecimal format as string
+    @staticmethod
+    def get_header_list_hash(header_list): 
+        # Create a string with each element of the header without whitespaces and line breaks
+        header_string = ""
+        ### 0: Block number ###
+        header_string += header_list[0].strip()              
+        ### 1: Timestamp of start mining of the block ### 
+        header_string += header_list[1].strip()
+        ### 2: Hash of the previous block ### 
+        header_string += header_list[2].strip() 
+        ### 3: Number of transactions in block ###
+        header_string += header_list[3].strip()           
+        ### 4: Hash of transactions in the block ###                
+        header_string += header_list[4].strip() 
+        ### 5: Mining difficulty ### 
+        header_string += header_list[5].strip()           
+        ### 7: Block version (from version 2) ###
+        if(len(header_list) > 7 and header_list[7].strip() != "1"):
+            header_string += f"v{header_list[7].strip()}"
+        ### 6: Nonce ### 
+        header_string += header_list[6].strip()
+        # Return hash                         
+        return hashlib.sha256(header_string.encode()).hexdigest()
     
     # Method checks, if the block file for a given block number is existent
     @staticmethod
-    def check_block_file(block_path, block_number):
-        if not(exists(f"{block_path}/{block_number}.bl")):  
+    def check_block_file(block_path, block_number, ext = 'bl'):
+        if not(exists(f"{block_path}/{block_number}.{ext}")):  
             return False  
         else: 
             return True                          
+
+    # Returns the hash of a leaf of the Merkle tree (Tx ID) as bytes
+    # Leaves and inner nodes are hashed with a different prefix byte,
+    # so an inner node can't be passed off as a transaction
+    @staticmethod
+    def get_merkle_leaf(tx_id):
+        return hashlib.sha256(b"\x00" + str(tx_id).encode()).digest()
+
+    # Returns the hash of an inner node of the Merkle tree from its two children as bytes
+    @staticmethod
+    def get_merkle_node(left, right):
+        return hashlib.sha256(b"\x01" + left + right).digest()
+
+    # Method checks an inclusion proof of a transaction (see get_merkle_proof())
+    # proof: list of [side, hash] of the sibling nodes from the leaf to the root
+    # side: "L" if the sibling is the left node, "R" if it is the right node
+    # root: transaction hash in the block header (Merkle root, hex)
+    # Returns True if the transaction is part of the Merkle tree
+    @staticmethod
+    def verify_merkle_proof(tx_id, proof, root):
+        node = Block.get_merkle_leaf(tx_id)
+        try:
+            for side, sibling in proof:
+                if(side == "L"):
+                    node = Block.get_merkle_node(bytes.fromhex(sibling), node)
+                elif(side == "R"):
+                    node = Block.get_merkle_node(node, bytes.fromhex(sibling))
+                else:
+                    return False
+        except (ValueError, TypeError):
+            return False
+        return node.hex() == root
+
+    # Method converts all blocks of a folder from the text format (.bl) into the binary format (.blb)
+    # or back from the binary format into the text format
+    # to_format: 'bin' (text -> binary) or 'text' (binary -> text)
+    # The destination folder must be empty or not existing
+    # Every converted block is converted back and compared with the source,
+    # so the conversion stops, if it would not be lossless
+    # Returns True if all blocks were converted
+    @staticmethod
+    def convert_blocks(src_path, dst_path, to_format):
+        if(to_format == 'bin'):
+            src_ext = 'bl'
+        elif(to_format == 'text'):
+            src_ext = 'blb'
+        else:
+            print(f"Unknown block format \"{to_format}\"! Use bin or text")
+            return False
+        os.makedirs(dst_path, exist_ok=True)
+        if(len(os.listdir(dst_path))):
+            print(f"Error: Folder {dst_path} is not empty!")
+            return False
+        max_block = Block.get_max_block(src_path, src_ext)
+        if(max_block < 0):
+            print(f"No block files in folder {src_path}!")
+            return False
+        for block_nr in range(max_block + 1):
+            bl = Block(src_path, "", "")
+            check = Block(dst_path, "", "")
+            # Text -> binary
+            if(to_format == 'bin'):
+                bl.load_block(block_nr)
+                if not(bl.block_valid):
+                    print(f"Error: Block {block_nr} cannot be loaded: {', '.join(bl.error)}")
+                    return False
+                data = bl.get_block_bytes()
+                # Convert back and compare with the source file
+                check.load_block_bytes(block_nr, data)
+                with open(f"{src_path}/{block_nr}.bl", "r") as handle:
+                    lossless = (check.block_valid and check.get_block_string() == handle.read())
+                if(lossless):
+                    check.write_block_to_bin_file()
+            # Binary -> text
+            else:
+                bl.load_block_bin(block_nr)
+                if not(bl.block_valid):
+                    print(f"Error: Block {block_nr} cannot be loaded: {', '.join(bl.error)}")
+                    return False
+                bl.block_path = dst_path
+                bl.write_block_to_file()
+                # Convert back and compare with the source file
+                check.load_block(block_nr)
+                with open(f"{src_path}/{block_nr}.blb", "rb") as handle:
+                    lossless = (check.block_valid and check.get_block_bytes() == handle.read())
+            if not(lossless):
+                print(f"Error: Block {block_nr} cannot be converted without loss!")
+                return False
+            print(f"Block {block_nr} of {max_block} converted...")
+        print(f"{max_block + 1} blocks converted from {src_path} to {dst_path}")
+        return True
            
     ####################
     # Instance Methods #
@@ -195,7 +355,8 @@ class Block():
     
     # Method loads a block from the block file into an block object
     # Validates right formats
-    def load_block(self, block_number):
+    # load_tx: if False, only the block header is loaded, the transactions are loaded on first access
+    def load_block(self, block_number, load_tx = True):
         # Check, if Block file exists
         if not(self.check_block_file(self.block_path, block_number)):
             # Set block as invalid and write error message
@@ -205,13 +366,19 @@ class Block():
         else:
             # Set block number
             self.number = block_number
-            # Open block file for reading and get the header line = first line in block
+            # Open block file for reading and read it at once
+            # The content is also used for loading the transactions
+            # Without transactions only the first line is read
             with open(f"{self.block_path}/{self.number}.bl", "r") as handle: 
-                # Read first line of block, remove line break at the end and create a list from it
-                header_line = handle.readline().strip()
+                if(load_tx):
+                    block_string = handle.read()
+                else:
+                    block_string = handle.readline()
+            # Get the header line = first line in block and remove line break at the end
+            header_line = block_string.split("\n", 1)[0].strip()
             # Split header line into list
             header_list = header_line.split("|")
-            # Check, if the resulting list has exactly 7 elements
+            # Check, if the resulting list has 7 elements (version 1) or 8 elements
             # 0: Block number
             # 1: Timestamp of block creation
             # 2: Hash of previous block header
@@ -219,7 +386,8 @@ class Block():
             # 4: Hash of all transaction hashes in the block
             # 5: Mining difficulty
             # 6: Nonce
-            if(len(header_list) != 7):
+            # 7: Block version (only if not version 1)
+            if(len(header_list) not in (7, 8)):
                 # Set block as invalid and error message
                 self.error.append(f"Corrupted header in block {self.number}! Number of elements in header is wrong")
                 self.block_valid = False
@@ -238,6 +406,13 @@ class Block():
                         self.block_valid = False 
                         return False
                     else:
+                        # 7: Block version
+                        if(len(header_list) == 8):
+                            if not(fnc.check_int(header_list[7])) or int(header_list[7]) not in BLOCK_VERSIONS[1:]:
+                                self.error.append(f"Unknown block version in block {self.number} header!")
+                                self.block_valid = False 
+                                return False
+                            self.version = int(header_list[7])
                         # Load block header data into instance variables
                         # 1: Timestamp of block creation
                         if not(fnc.check_float(header_list[1])):
@@ -277,7 +452,7 @@ class Block():
                             self.nonce = int(header_list[6])  
                             # Check if the block hash is the same as the previous hash in the next block header
                             # In case there is no next block the method returns an empty string
-                            self.block_hash = self.get_block_header_hash(self.number, self.block_path)
+                            self.block_hash = self.get_header_list_hash(header_list)
                             self.next_hash = self.get_next_header_hash()
                             # If next hash cannot be read from file
                             if(self.next_hash == False):
@@ -292,21 +467,47 @@ class Block():
                                     # Set block as invalid and error message
                                     self.error.append(f"Hash of block {self.number} does not match the hash in header of block {self.number + 1}!")
                                     self.block_valid = False  
-                                else:   
+                                elif(load_tx):   
                                     # Load transactions of the block as transaction objects
-                                    for i in range(self.tx_count):
-                                        # Create a transaction object 
-                                        self.tx.append(trm.Transaction(self.user_path, self.mem_path, self.block_path))
-                                        # If loading of transaction object is not possible or if it causes errors
-                                        if not(self.tx[i].load_tx_from_block(self.number, i) or len(self.tx[i].error) == 0):
-                                            # If transaction cannot be loaded, set block as invalid and error message
-                                            self.error.append(f"Transaction {i} in block {self.number} is corrupted!")
-                                            self.block_valid = False
+                                    self.tx = self.load_txs(block_string)
+                                else:
+                                    # Transactions are loaded on first access (see property tx)
+                                    self.tx_list = None
         # If there are no error messages, the block is valid in terms of a correct format
         if not(len(self.error)):                              
             self.block_valid = True
             return True
     
+    # Method loads the transactions of the block from the block file
+    # block_string: content of the block file, if it was already read
+    # The block string is parsed in one pass
+    # Returns a list of transaction objects
+    def load_txs(self, block_string = None):
+        if(block_string is None):
+            if not(self.check_block_file(self.block_path, self.number)):
+                self.add_error(f"Block file for block {self.number} not found!")
+                return []
+            with open(f"{self.block_path}/{self.number}.bl", "r") as handle: 
+                block_string = handle.read()
+        self.size = len(block_string)
+        tx_list = []
+        i = 0
+        for tx in trm.Transaction.load_txs_from_block(self.user_path, self.mem_path, self.block_path, self.number, block_string):
+            tx_list.append(tx)
+            # If loading of transaction object is not possible or if it causes errors
+            if(len(tx.error)):
+                # If transaction cannot be loaded, set block as invalid and error message
+                self.add_error(f"Transaction {i} in block {self.number} is corrupted!")
+            i += 1
+        return tx_list
+
+    # Method adds an error message and sets the block as invalid
+    # If the transactions are loaded again, the same error is not added twice
+    def add_error(self, error):
+        if(error not in self.error):
+            self.error.append(error)
+        self.block_valid = False
+
     # Method returns the hash of the block header written in the next block
     # If there is no next block the method returns an empty string
     # Returns False if the block header is corrupted
@@ -331,8 +532,8 @@ class Block():
                 with open(f"{self.block_path}/{next_number}.bl", "r") as handle:
                     header = handle.readline().strip()
                 header_list = header.split("|")
-                # Check, if the header has exactly 7 elements
-                if(len(header_list) != 7):
+                # Check, if the header has 7 elements (8 with block version)
+                if(len(header_list) not in (7, 8)):
                     return False                
                 else:   
                     # Check, if the hash has 64 characters                  
@@ -343,8 +544,11 @@ class Block():
                                     
     # Method returns the hash value of all transactions hashes in a block
     # Data from blockchain object and not from text files
-    # = SHA256 hash of all transaction IDs
+    # Version 1: SHA256 hash of all transaction IDs
+    # Version 2: root of the Merkle tree of the transaction IDs
     def get_tx_hash_block(self): 
+        if(self.version >= MERKLE_VERSION):
+            return self.get_merkle_root()
         # Generate an empty string for all hashes
         string = ""
         # Iterate through all transactions in the block
@@ -353,29 +557,222 @@ class Block():
         # Return the hash string (hex) of the all transactions
         return hashlib.sha256(string.encode()).hexdigest()   
 
+    # Method returns the Merkle tree of the transaction IDs (list of levels, see __init__)
+    # The tree is kept in the block object and only built again, when the transaction list was replaced
+    # or transactions were added without append_tx()
+    def get_merkle_tree(self):
+        txs = self.tx
+        if(self.merkle_tree is None or self.merkle_txs is not txs or len(self.merkle_tree[0]) != len(txs)):
+            level = [self.get_merkle_leaf(tx.tx_id) for tx in txs]
+            self.merkle_tree = [level]
+            while(len(level) > 1):
+                # An odd node at the end of a level is moved up without hashing
+                level = [self.get_merkle_node(level[i], level[i + 1]) if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)]
+                self.merkle_tree.append(level)
+            self.merkle_txs = txs
+        return self.merkle_tree
+
+    # Returns the root of the Merkle tree as hex string
+    # The root of a block without transactions is the hash of an empty string
+    def get_merkle_root(self):
+        tree = self.get_merkle_tree()
+        if not(len(tree[0])):
+            return hashlib.sha256(b"").hexdigest()
+        return tree[-1][0].hex()
+
+    # Method hashes the nodes on the path from a leaf to the root again
+    # Only these nodes change, when a transaction is replaced or added at the end
+    def update_merkle_path(self, position):
+        tree = self.merkle_tree
+        level_nr = 0
+        while(len(tree[level_nr]) > 1):
+            level = tree[level_nr]
+            if(level_nr + 1 == len(tree)):
+                tree.append([])
+            parent = position // 2
+            left = parent * 2
+            node = self.get_merkle_node(level[left], level[left + 1]) if left + 1 < len(level) else level[left]
+            if(parent < len(tree[level_nr + 1])):
+                tree[level_nr + 1][parent] = node
+            else:
+                tree[level_nr + 1].append(node)
+            position = parent
+            level_nr += 1
+
+    # Method replaces a transaction of the block
+    # The Merkle tree is updated on the path of the transaction (O(log n) hashes)
+    def replace_tx(self, position, tx):
+        tree = self.get_merkle_tree()
+        self.tx[position] = tx
+        tree[0][position] = self.get_merkle_leaf(tx.tx_id)
+        self.update_merkle_path(position)
+
+    # Method adds a transaction at the end of the block
+    # The Merkle tree is updated on the path of the transaction (O(log n) hashes)
+    def append_tx(self, tx):
+        tree = self.get_merkle_tree()
+        self.tx.append(tx)
+        tree[0].append(self.get_merkle_leaf(tx.tx_id))
+        self.update_merkle_path(len(tree[0]) - 1)
+
+    # Returns the inclusion proof of a transaction in the Merkle tree (version 2)
+    # List of [side, hash] of the sibling nodes from the leaf to the root (see verify_merkle_proof())
+    # Returns None if there is no transaction at the position
+    def get_merkle_proof(self, position):
+        tree = self.get_merkle_tree()
+        if(position < 0 or position >= len(tree[0])):
+            return None
+        proof = []
+        for level in tree[:-1]:
+            sibling = position ^ 1
+            # An odd node at the end of a level has no sibling
+            if(sibling < len(level)):
+                proof.append(["L" if sibling < position else "R", level[sibling].hex()])
+            position //= 2
+        return proof
+
     # Method calculates and returns the hash of a block header
     # Data from blockchain object and not from text files
     def get_header_hash(self): 
-        header_string = f"{self.number}{self.timestamp}{self.prev_hash}{self.tx_count}{self.tx_hash}{self.difficulty}{self.nonce}" 
+        header_string = f"{mnm.get_header_string(self.number, self.timestamp, self.prev_hash, self.tx_count, self.tx_hash, self.difficulty, self.version)}{self.nonce}"
         # Return hash                         
         return hashlib.sha256(header_string.encode()).hexdigest()  
 
+    # Method returns the block header as string = first line of the block file (without line break)
+    def get_header_string(self):
+        header_string = f"{self.number}|{self.timestamp}|{self.prev_hash}|{self.tx_count}|{self.tx_hash}|{self.difficulty}|{self.nonce}"
+        # The block version is only written for new block versions, so old blocks stay unchanged
+        if(self.version != 1):
+            header_string += f"|{self.version}"
+        return header_string
+
     # Method returns the string of a block for writing it to a block file
     def get_block_string(self):
         block_string = ""
         # Block header
-        block_string += f"{self.number}|{self.timestamp}|{self.prev_hash}|{self.tx_count}|{self.tx_hash}|{self.difficulty}|{self.nonce}\n"
+        block_string += self.get_header_string() + "\n"
         # Transactions
         for tx in self.tx:
             block_string += tx.get_tx_string()
         return block_string
+
+    # Method returns the block as dict (e.g. for JSON output)
+    # load_tx: if False, only the block header is returned
+    def get_block_dict(self, load_tx = True):
+        block_dict = {"number": self.number, "timestamp": self.timestamp, "prev_hash": self.prev_hash, "tx_count": self.tx_count,
+                      "tx_hash": self.tx_hash, "difficulty": self.difficulty, "nonce": self.nonce, "version": self.version,
+                      "hash": self.get_header_hash()}
+        if(load_tx):
+            block_dict["tx"] = [tx.get_tx_dict() for tx in self.tx]
+        return block_dict
         
     # Method writes an entire block object as block string to a block file
+    # The block is written to a temporary file first and then renamed,
+    # so other programs never read a half written block file
     def write_block_to_file(self):
         # Get String of the entire block data
         block_string = self.get_block_string()
-        with open(f"{self.block_path}/{self.number}.bl", "w+") as handle:
-            handle.write(block_string)        
+        with open(f"{self.block_path}/{self.number}.bl.tmp", "w") as handle:
+            handle.write(block_string)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(f"{self.block_path}/{self.number}.bl.tmp", f"{self.block_path}/{self.number}.bl")
+
+    # Method returns the bytes of a block in the binary block format
+    def get_block_bytes(self):
+        data = BIN_MAGIC + struct.pack(">B", self.version)
+        # Block header
+        data += struct.pack(BIN_HEADER, self.number, self.timestamp, bytes.fromhex(self.prev_hash), self.tx_count, bytes.fromhex(self.tx_hash), self.difficulty, self.nonce)
+        # Transactions
+        for tx in self.tx:
+            data += tx.get_tx_bytes()
+        return data
+
+    # Method writes an entire block object to a binary block file ([block_nr].blb)
+    def write_block_to_bin_file(self):
+        with open(f"{self.block_path}/{self.number}.blb", "wb") as handle:
+            handle.write(self.get_block_bytes())
+
+    # Method loads a block from a binary block file ([block_nr].blb) into the block object
+    def load_block_bin(self, block_number):
+        if not(self.check_block_file(self.block_path, block_number, 'blb')):
+            self.error.append(f"Block file for block {block_number} not found!")
+            self.block_valid = False 
+            return False
+        with open(f"{self.block_path}/{block_number}.blb", "rb") as handle:
+            data = handle.read()
+        return self.load_block_bytes(block_number, data)
+
+    # Method loads a block in the binary block format into the block object
+    # data: bytes, memoryview or mmap of the block
+    # The links to the previous and next block are not checked here, see Blockchain.validate_bc()
+    def load_block_bytes(self, block_number, data):
+        data = memoryview(data)
+        # Block header
+        if not(self.load_header_bytes(block_number, data)):
+            return False
+        self.tx = self.load_txs_bytes(data)
+        # If there are no error messages, the block is valid in terms of a correct format
+        if not(len(self.error)):                              
+            self.block_valid = True
+        return self.block_valid
+
+    # Method loads the transactions of a block in the binary block format
+    # data: bytes, memoryview or mmap of the block, the header must be loaded already
+    # Returns a list of transaction objects
+    def load_txs_bytes(self, data):
+        data = memoryview(data)
+        self.size = len(data)
+        tx_list = []
+        # Transactions: each one is prefixed with its length
+        offset = 5 + BIN_HEADER_SIZE
+        path = "block " + str(self.number)
+        i = 0
+        while(offset < len(data)):
+            if(offset + 4 > len(data)):
+                break
+            length = struct.unpack_from(">I", data, offset)[0]
+            offset += 4
+            tx = trm.Transaction(self.user_path, self.mem_path, self.block_path)
+            tx.parse_tx_bytes(path, data[offset:offset + length], i, self.number)
+            tx_list.append(tx)
+            if(len(tx.error)):
+                self.add_error(f"Transaction {i} in block {self.number} is corrupted!")
+            offset += length
+            i += 1
+        if(offset != len(data) or i != self.tx_count):
+            self.add_error(f"Transaction count in block {self.number} header ({self.tx_count}) does not match the number of transactions in the block {self.number} file ({i})!")
+        return tx_list
+
+    # Method loads only the header of a block in the binary block format into the block object
+    # data: bytes, memoryview or mmap of the block (at least the header)
+    # Returns False if the header is corrupted
+    def load_header_bytes(self, block_number, data):
+        self.number = block_number
+        # Check format and version
+        if(bytes(data[0:4]) != BIN_MAGIC or len(data) < 5 or data[4] not in BLOCK_VERSIONS):
+            self.error.append(f"Block {block_number} is not in the binary block format!")
+            self.block_valid = False
+            return False
+        self.version = data[4]
+        # Block header
+        try:
+            header = struct.unpack_from(BIN_HEADER, data, 5)
+        except struct.error:
+            self.error.append(f"Corrupted header in block {block_number}! Number of elements in header is wrong")
+            self.block_valid = False
+            return False
+        if(header[0] != block_number):
+            self.error.append(f"Contradictory block number in block {block_number}!")
+            self.block_valid = False 
+            return False
+        self.timestamp = header[1]
+        self.prev_hash = header[2].hex()
+        self.tx_count = header[3]
+        self.tx_hash = header[4].hex()
+        self.difficulty = header[5]
+        self.nonce = header[6]
+        return True
 
     # Method clears a block object
     def clear_block(self):
@@ -397,8 +794,27 @@ class Block():
         # Error handling
         self.block_valid = False
         self.error = []
-        # List of all transactions in the block
-        self.tx = []
+        # List of all transactions in the block, empty like a new block (see __init__())
+        self.tx_loader = None
+        self.tx_list = []
+        self.size = 0
+        self.version = 1
+        self.merkle_tree = None
+        self.merkle_txs = None
+
+
+####################
+# Block conversion #
+####################
+
+# Converts the block files of a folder between the text and the binary format
+# Usage: python blm.py <bin|text> <source folder> <destination folder>
+# Example: python blm.py bin ./blocks ./blocks_bin
+if(__name__ == "__main__"):
+    if(len(sys.argv) != 4):
+        print("Usage: python blm.py <bin|text> <source folder> <destination folder>")
+    else:
+        Block.convert_blocks(sys.argv[2], sys.argv[3], sys.argv[1])
 
 
 
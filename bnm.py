@@ -0,0 +1,1031 @@
+###########
+# Modules #
+###########
+
+# sys: for reading the command line arguments
+import sys
+# time: for measuring the run time
+import time
+# hashlib: encryption/decryption module
+# source: https://datagy.io/python-sha256/
+import hashlib
+# os: for creating random data
+import os
+# exists: check, if file in a directory exists
+from os.path import exists
+# random: choose random keys from a pool of keys
+import random
+# io, contextlib: hide the output of the functions during the benchmarks
+import io
+import contextlib
+# tempfile: temporary folders for synthetic blocks
+import tempfile
+# tracemalloc: for measuring the memory usage
+import tracemalloc
+# threading, asyncio: the node runs in a thread of the benchmark
+import threading
+import asyncio
+# Base58 encoding to shorten numbers
+import base58
+# Functions for elyptic curve cryptography
+import ecdsa
+# mnm (mining module): Own module for the nonce search
+import mnm
+# blm (block module): Own module for block class
+import blm
+# trm (transaction module). Own module for handeling transactions
+from trm import Transaction
+# bcm (blockchain module). Own module for blockchain
+from bcm import Blockchain
+# mpm (mempool module): Own module for the transactions in mempool
+from mpm import Mempool
+# wlm (wallet module): Own module for the wallet of a user
+from wlm import Wallet
+# fnc (Module for own functions): Own set of functions
+import fnc
+# csm (coin selection module): Own module for choosing the inputs of a transaction
+from csm import CoinSelector, STRATEGIES
+# usr (user module): Own module for the users of the node
+from usr import User
+# ndm (node module): Own module for the JSON-RPC node
+import ndm
+
+# Benchmarks for the performance critical parts of MilaCoin
+# Usage: python bnm.py <benchmark>
+# Without argument all benchmarks are listed
+# python bnm.py check: runs all benchmarks with small sizes (exit code 1 if one fails)
+
+#######################
+# Reference functions #
+#######################
+
+# Nonce search as it was done in Blockchain.get_nonce() before the midstate kernel:
+# The whole header string is formatted and hashed for every nonce
+# and the leading zeros are checked in the hex digest
+# Stops after max_nonce attempts and returns -1 if no nonce was found
+def legacy_nonce_search(header_string_1, difficulty, max_nonce):
+    nonce = -1
+    while(nonce < max_nonce - 1):
+        nonce += 1
+        header_string_2 = f"{header_string_1}{nonce}"
+        hash_header = hashlib.sha256(header_string_2.encode()).hexdigest()
+        if(hash_header[0:difficulty] == '0' * difficulty):
+            return nonce
+    return -1
+
+# Loads the transactions of a block as it was done in Block.load_block() 
+# before the single pass parser: the block file is read and split once per transaction
+def legacy_load_block_txs(block_path, block_number, tx_count):
+    tx = []
+    for i in range(tx_count):
+        tx.append(Transaction("", "", block_path))
+        tx[i].load_tx_from_block(block_number, i)
+    return tx
+
+# Validates the block and transaction hashes as it was done in Blockchain.validate_bc() 
+# before the one pass validation:
+# The next block is searched in the whole blockchain for every block
+# and the transaction hash of the block is calculated for every transaction
+# Returns True if the blockchain is valid
+def legacy_validate_bc(bc):
+    valid = True
+    for block in bc.blocks:
+        block_hash = block.get_header_hash()
+        next_hash = bc.get_next_header_hash(block.number)
+        if(next_hash != "" and block_hash != next_hash):
+            valid = False
+        else:
+            for tx in block.tx:
+                if not(tx.get_tx_id() == tx.tx_id):
+                    valid = False
+                elif not(block.tx_hash == block.get_tx_hash_block()):
+                    valid = False
+    return valid
+
+# Loads all transactions of the mempool as it was done in Blockchain.load_mempool()
+# before the Mempool class: the mempool file is read and split once per transaction
+def legacy_load_mempool(mem_path):
+    tx_mem = []
+    for i in range(Transaction.get_tx_count_mempool(mem_path)):
+        tx_mem.append(Transaction("", mem_path, ""))
+        tx_mem[i].load_tx_from_mempool(i)
+    return tx_mem
+
+# Checks if a transaction spends an output, which is already spent in mempool,
+# by searching the inputs of all transactions in mempool (without an index)
+# Returns True if there is a conflict
+def legacy_find_conflict(tx_mem, tx):
+    for mem_tx in tx_mem:
+        for inp in mem_tx.inputs:
+            for new_inp in tx.inputs:
+                if(inp[0] == new_inp[0] and inp[1] == new_inp[1]):
+                    return True
+    return False
+
+# Returns the addresses in a wallet file as it was done in Wallet.get_addr_list()
+# before the keystore: the wallet file is read and split every time
+def legacy_get_addr_list(wlt_path):
+    addr_list = []
+    with open(wlt_path, "r") as handle:
+        for line in handle:
+            addr_list.append(line.split("|")[0])
+    return addr_list
+
+# Returns the keys for an address as it was done in Wallet.get_keys_for_address()
+# before the keystore: the wallet file is read and searched for every address
+def legacy_get_keys_for_address(wlt_path, address):
+    with open(wlt_path, "r") as handle:
+        lines = list(handle)
+    for line in lines:
+        elem = line.strip().split("|")
+        if(elem[0].strip() == address.strip()):
+            return (elem[1].strip(), elem[2].strip())
+    return 0
+
+# Returns the UTXOs of a wallet as it was done in Wallet.load_user_utxos() before the wallet scan:
+# every address of the wallet is looked up in the UTXO set of the blockchain
+def legacy_get_wallet_utxos(utxo_set, addr_list):
+    user_outputs = []
+    for addr in addr_list:
+        user_outputs += utxo_set.get_utxos_for_address(addr)
+    user_outputs.sort(key=lambda utxo: utxo[1])
+    return user_outputs
+
+# Signs a string as it was done in fnc.sign_ECDSA_str() before the key cache:
+# the signing key is built from the private key string for every signature
+def legacy_sign_ECDSA_str(private_key, string):
+    sk = ecdsa.SigningKey.from_string(bytes.fromhex(private_key), curve=ecdsa.SECP256k1)
+    return base58.b58encode(sk.sign(string.encode())).decode()
+
+# Verifies a signature as it was done in fnc.verify_ECDSA_str() before the key cache:
+# the verifying key is built from the public key string for every signature
+def legacy_verify_ECDSA_str(public_key, signature, string):
+    vk = ecdsa.VerifyingKey.from_string(base58.b58decode(public_key), curve=ecdsa.SECP256k1)
+    try:
+        vk.verify(base58.b58decode(signature), string.encode())
+        return True
+    except:
+        return False
+
+##################
+# Synthetic data #
+##################
+
+# Returns a random hash in hex format (64 characters)
+def random_hash():
+    return os.urandom(32).hex()
+
+# Returns a random public key or signature (64 bytes, base58 encoded)
+def random_puk_sig():
+    return base58.b58encode(os.urandom(64)).decode()
+
+# Returns a random address (20 bytes, base58 encoded)
+def random_address():
+    return base58.b58encode(os.urandom(20)).decode()
+
+# Pool of random keys and addresses, so not every transaction needs new ones
+key_pool = []
+
+# Returns a random public key, signature and address from the key pool
+def random_keys():
+    if not(len(key_pool)):
+        for i in range(500):
+            key_pool.append((random_puk_sig(), random_puk_sig(), random_address()))
+    return random.choice(key_pool)
+
+# Returns a block object with tx_count synthetic transactions
+# The transactions have the right format, but the hashes and signatures are random
+# Transaction 0 is a coinbase, all others have two inputs and two outputs
+def make_synthetic_block(block_path, block_number, tx_count, prev_hash = None):
+    bl = blm.Block(block_path, "", "")
+    bl.number = block_number
+    bl.timestamp = 1666805141.550495 + block_number
+    bl.prev_hash = random_hash() if prev_hash is None else prev_hash
+    bl.tx_count = tx_count
+    bl.difficulty = 1
+    for i in range(tx_count):
+        tx = Transaction("", "", block_path)
+        tx.timestamp = bl.timestamp
+        keys_1 = random_keys()
+        keys_2 = random_keys()
+        if(i > 0):
+            tx.inputs = [[random_hash(), 0, keys_1[0], keys_1[1]], [random_hash(), 1, keys_2[0], keys_2[1]]]
+            tx.outputs = [[0, keys_1[2], 1.5], [1, keys_2[2], 0.25]]
+        else:
+            tx.outputs = [[0, keys_1[2], 10.0]]
+        tx.input_count = len(tx.inputs)
+        tx.output_count = len(tx.outputs)
+        tx.tx_id = tx.get_tx_id()
+        tx.tx_valid = True
+        bl.tx.append(tx)
+    bl.tx_hash = bl.get_tx_hash_block()
+    bl.block_valid = True
+    return bl
+
+# Writes a block file with tx_count synthetic transactions
+def write_synthetic_block(block_path, block_number, tx_count, prev_hash = None):
+    bl = make_synthetic_block(block_path, block_number, tx_count, prev_hash)
+    bl.write_block_to_file()
+    return bl
+
+# Returns a blockchain object with block_count synthetic blocks (only in memory)
+# The blocks are linked by the hashes of the block headers
+def make_synthetic_bc(block_count, tx_per_block):
+    bc = Blockchain("", "", "", "")
+    prev_hash = blm.Block.get_genesis_hash()
+    for number in range(block_count):
+        bl = make_synthetic_block("", number, tx_per_block, prev_hash)
+        prev_hash = bl.get_header_hash()
+        bc.blocks.append(bl)
+    return bc
+
+##############
+# Benchmarks #
+##############
+
+# Compares the legacy nonce search with the midstate kernel of mnm.py
+# Both search the same header for at most max_nonce attempts
+# For high difficulties the nonce is usually not found within max_nonce attempts,
+# then the hash rate is used to estimate the time for a complete search (16^difficulty hashes)
+def bench_mining(difficulties = (4, 5, 6, 7), max_nonce = 300000):
+    print("\n:BENCHMARK MINING KERNEL:")
+    print(f"Max. attempts per search: {max_nonce}")
+    header_string = f"1{1666805141.550495}{'ab' * 32}1{'cd' * 32}"
+    for difficulty in difficulties:
+        header = f"{header_string}{difficulty}"
+        # Legacy loop
+        start = time.perf_counter()
+        nonce_1 = legacy_nonce_search(header, difficulty, max_nonce)
+        time_1 = time.perf_counter() - start
+        hashes_1 = nonce_1 + 1 if nonce_1 != -1 else max_nonce
+        # Midstate kernel
+        start = time.perf_counter()
+        result = mnm.search_range(header, difficulty, 0, max_nonce)
+        time_2 = time.perf_counter() - start
+        nonce_2 = result[1]
+        hashes_2 = result[2]
+        # Results
+        rate_1 = hashes_1 / time_1
+        rate_2 = hashes_2 / time_2
+        print(f"Difficulty {difficulty}:")
+        if(nonce_1 != nonce_2):
+            print(f"> ERROR: Different nonces (legacy: {nonce_1}, midstate: {nonce_2})!")
+        elif(nonce_1 == -1):
+            print(f"> No nonce in the first {max_nonce} attempts")
+        else:
+            print(f"> Nonce: {nonce_1}")
+        print(f"> {'Legacy':8}: {time_1:8.3f} s, {rate_1:12,.0f} hashes/s, est. full search {16 ** difficulty / rate_1:10.1f} s")
+        print(f"> {'Midstate':8}: {time_2:8.3f} s, {rate_2:12,.0f} hashes/s, est. full search {16 ** difficulty / rate_2:10.1f} s")
+        print(f"> Speedup : {rate_2 / rate_1:5.2f}x")
+
+# Compares loading the transactions of a block once per transaction (legacy)
+# with the single pass parser used by Block.load_block()
+# The legacy way is quadratic, so it is only measured up to legacy_max transactions
+# For larger blocks the time is estimated from the largest measured block
+def bench_block_parser(sizes = (1000, 5000, 10000, 50000), legacy_max = 2000):
+    print("\n:BENCHMARK BLOCK PARSER:")
+    with tempfile.TemporaryDirectory() as block_path:
+        legacy_ref = None
+        for tx_count in sizes:
+            write_synthetic_block(block_path, 0, tx_count)
+            size = os.path.getsize(f"{block_path}/0.bl")
+            # Single pass parser
+            start = time.perf_counter()
+            bl = blm.Block(block_path, "", "")
+            bl.load_block(0)
+            time_new = time.perf_counter() - start
+            if not(bl.block_valid):
+                print(f"> ERROR: Synthetic block with {tx_count} transactions not valid!")
+            # Legacy
+            if(tx_count <= legacy_max):
+                start = time.perf_counter()
+                legacy_load_block_txs(block_path, 0, tx_count)
+                time_old = time.perf_counter() - start
+                legacy_ref = (tx_count, time_old)
+                est = ""
+            elif(legacy_ref is not None):
+                time_old = legacy_ref[1] * (tx_count / legacy_ref[0]) ** 2
+                est = " (est.)"
+            else:
+                time_old = 0
+                est = " (not measured)"
+            print(f"{tx_count} transactions ({size / 1024 / 1024:.1f} MB):")
+            print(f"> {'Legacy':11}: {time_old:9.3f} s{est}")
+            print(f"> {'Single pass':11}: {time_new:9.3f} s")
+
+# Compares the one pass validation of Blockchain.validate_bc() with the legacy validation
+# on synthetic blockchains (in memory, no block files)
+# The legacy way is quadratic, so it is only measured up to legacy_max blocks
+# For larger blockchains the time is estimated from the largest measured blockchain
+def bench_validation(sizes = (1000, 5000, 10000, 20000), tx_per_block = 10, legacy_max = 5000):
+    print("\n:BENCHMARK BLOCKCHAIN VALIDATION:")
+    print(f"Transactions per block: {tx_per_block}")
+    legacy_ref = None
+    for block_count in sizes:
+        bc = make_synthetic_bc(block_count, tx_per_block)
+        # One pass validation (output of the method is hidden)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            bc.validate_bc()
+        time_new = time.perf_counter() - start
+        if not(bc.bc_valid):
+            print(f"> ERROR: Synthetic blockchain with {block_count} blocks not valid!")
+        # Legacy
+        if(block_count <= legacy_max):
+            start = time.perf_counter()
+            legacy_validate_bc(bc)
+            time_old = time.perf_counter() - start
+            legacy_ref = (block_count, time_old)
+            est = ""
+        elif(legacy_ref is not None):
+            time_old = legacy_ref[1] * (block_count / legacy_ref[0]) ** 2
+            est = " (est.)"
+        else:
+            time_old = 0
+            est = " (not measured)"
+        print(f"{block_count} blocks:")
+        print(f"> {'Legacy':8}: {time_old:9.3f} s{est}")
+        print(f"> {'One pass':8}: {time_new:9.3f} s")
+
+# Compares the text block format (.bl) with the binary block format (.blb)
+# Synthetic blocks are written as text files, converted into binary files
+# and then all blocks are loaded from both formats
+def bench_block_format(block_count = 20, tx_per_block = 1000):
+    print("\n:BENCHMARK BLOCK FORMAT:")
+    print(f"{block_count} blocks with {tx_per_block} transactions")
+    with tempfile.TemporaryDirectory() as tmp_path:
+        text_path = f"{tmp_path}/text"
+        bin_path = f"{tmp_path}/bin"
+        os.makedirs(text_path)
+        prev_hash = blm.Block.get_genesis_hash()
+        for number in range(block_count):
+            bl = write_synthetic_block(text_path, number, tx_per_block, prev_hash)
+            prev_hash = bl.get_header_hash()
+        # Conversion (output of the method is hidden)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            converted = blm.Block.convert_blocks(text_path, bin_path, 'bin')
+        time_convert = time.perf_counter() - start
+        if not(converted):
+            print("> ERROR: Conversion failed!")
+            return
+        # Load all blocks
+        start = time.perf_counter()
+        for number in range(block_count):
+            blm.Block(text_path, "", "").load_block(number)
+        time_text = time.perf_counter() - start
+        start = time.perf_counter()
+        for number in range(block_count):
+            blm.Block(bin_path, "", "").load_block_bin(number)
+        time_bin = time.perf_counter() - start
+        # Disk footprint
+        size_text = sum(os.path.getsize(f"{text_path}/{f}") for f in os.listdir(text_path))
+        size_bin = sum(os.path.getsize(f"{bin_path}/{f}") for f in os.listdir(bin_path))
+        print(f"> {'Conversion':11}: {time_convert:8.3f} s")
+        print(f"> {'Text':11}: {time_text:8.3f} s load time, {size_text / 1024 / 1024:8.2f} MB")
+        print(f"> {'Binary':11}: {time_bin:8.3f} s load time, {size_bin / 1024 / 1024:8.2f} MB")
+        print(f"> Binary/Text: {time_bin / time_text:5.2f}x load time, {size_bin / size_text:5.2f}x size")
+
+# Compares loading all blocks with all transactions at start (legacy)
+# with loading only the block headers, the transactions are loaded when needed
+# The UTXO set is built before, so the start of the blockchain needs no transactions
+# Also measures the validation of the whole blockchain with a small cache budget
+def bench_startup(block_count = 100, tx_per_block = 20, cache_budget = 256 * 1024):
+    print("\n:BENCHMARK STARTUP:")
+    print(f"{block_count} blocks with {tx_per_block} transactions, cache budget {cache_budget / 1024 / 1024:.2f} MB")
+    with tempfile.TemporaryDirectory() as tmp_path:
+        block_path = f"{tmp_path}/blocks"
+        idx_path = f"{tmp_path}/idx"
+        os.makedirs(block_path)
+        prev_hash = blm.Block.get_genesis_hash()
+        for number in range(block_count):
+            bl = write_synthetic_block(block_path, number, tx_per_block, prev_hash)
+            prev_hash = bl.get_header_hash()
+        # Build the UTXO set (output of the method is hidden)
+        with contextlib.redirect_stdout(io.StringIO()):
+            Blockchain(block_path, "", "", "", idx_path).load_bc()
+        # Legacy: all blocks with all transactions
+        tracemalloc.start()
+        start = time.perf_counter()
+        blocks = []
+        for number in range(block_count):
+            blocks.append(blm.Block(block_path, "", ""))
+            blocks[number].load_block(number)
+        time_old = time.perf_counter() - start
+        mem_old = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del blocks
+        # Only block headers
+        tracemalloc.start()
+        start = time.perf_counter()
+        bc = Blockchain(block_path, "", "", "", idx_path)
+        bc.cache_budget = cache_budget
+        with contextlib.redirect_stdout(io.StringIO()):
+            bc.load_bc()
+        time_new = time.perf_counter() - start
+        mem_new = tracemalloc.get_traced_memory()[1]
+        # Validation through the cache
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            bc.validate_bc()
+        time_val = time.perf_counter() - start
+        mem_val = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"> {'Legacy':10}: {time_old:8.3f} s start, {mem_old / 1024 / 1024:8.2f} MB peak memory")
+        print(f"> {'Headers':10}: {time_new:8.3f} s start, {mem_new / 1024 / 1024:8.2f} MB peak memory")
+        print(f"> {'Validation':10}: {time_val:8.3f} s, {mem_val / 1024 / 1024:8.2f} MB peak memory, {len(bc.tx_cache)} blocks in cache")
+        print(f"> Start: {time_old / time_new:5.1f}x faster, {mem_old / mem_new:5.1f}x less memory")
+
+# Compares the start of the blockchain (loading and validating) without the header checkpoint (cold start)
+# with the start with the checkpoint of the last validation (warm start)
+# Also measures a warm start after one block file was changed
+def bench_checkpoint(block_count = 100, tx_per_block = 20):
+    print("\n:BENCHMARK HEADER CHECKPOINT:")
+    print(f"{block_count} blocks with {tx_per_block} transactions")
+    with tempfile.TemporaryDirectory() as tmp_path:
+        block_path = f"{tmp_path}/blocks"
+        idx_path = f"{tmp_path}/idx"
+        os.makedirs(block_path)
+        prev_hash = blm.Block.get_genesis_hash()
+        for number in range(block_count):
+            bl = write_synthetic_block(block_path, number, tx_per_block, prev_hash)
+            prev_hash = bl.get_header_hash()
+        # Build the UTXO set, so it is the same for all starts (output of the method is hidden)
+        with contextlib.redirect_stdout(io.StringIO()):
+            Blockchain(block_path, "", "", "", idx_path).load_bc()
+        times = []
+        for name in ("Cold", "Warm", "1 changed"):
+            if(name == "Cold" and exists(f"{idx_path}/headers.idx")):
+                os.remove(f"{idx_path}/headers.idx")
+            if(name == "1 changed"):
+                os.utime(f"{block_path}/{block_count // 2}.bl")
+            start = time.perf_counter()
+            bc = Blockchain(block_path, "", "", "", idx_path)
+            with contextlib.redirect_stdout(io.StringIO()):
+                bc.load_bc()
+                bc.validate_bc()
+            times.append(time.perf_counter() - start)
+            if not(bc.bc_valid):
+                print(f"> ERROR: Blockchain not valid at {name.lower()} start!")
+                return
+            print(f"> {name:9}: {times[-1]:8.3f} s")
+        print(f"> Warm start {times[0] / times[1]:5.1f}x faster than cold start")
+
+# Compares loading the mempool once per transaction (legacy) with the Mempool class,
+# which parses the file once and then only reads it again, when it was changed
+def bench_mempool(sizes = (100, 500, 1000, 2000), legacy_max = 1000):
+    print("\n:BENCHMARK MEMPOOL:")
+    with tempfile.TemporaryDirectory() as tmp_path:
+        mem_path = f"{tmp_path}/mempool.mem"
+        for size in sizes:
+            bl = make_synthetic_block("", 0, size)
+            with open(mem_path, "w") as handle:
+                for tx in bl.tx:
+                    handle.write(tx.get_tx_string())
+            # Legacy (only up to legacy_max transactions, as it's O(n^2))
+            if(size <= legacy_max):
+                start = time.perf_counter()
+                legacy_load_mempool(mem_path)
+                time_old = time.perf_counter() - start
+            else:
+                time_old = None
+            # Mempool class: first access parses the file, the second access uses memory
+            mempool = Mempool("", mem_path, "")
+            start = time.perf_counter()
+            mempool.get_txs()
+            time_new = time.perf_counter() - start
+            start = time.perf_counter()
+            mempool.get_txs()
+            time_again = time.perf_counter() - start
+            print(f"{size} transactions:")
+            if(time_old is None):
+                print(f"> {'Legacy':8}: skipped")
+            else:
+                print(f"> {'Legacy':8}: {time_old:9.3f} s ({time_old / time_new:6.1f}x)")
+            print(f"> {'Mempool':8}: {time_new:9.3f} s, again: {time_again * 1000:7.3f} ms")
+
+# Stress test for the admission of transactions to the mempool
+# tx_count synthetic transactions are submitted, a share of conflict_rate spends an output,
+# which is already spent by an earlier transaction (deliberate double spend)
+# Checks that exactly the conflicting transactions are rejected
+# and compares the time with a conflict search through the whole mempool (legacy)
+def bench_conflicts(tx_count = 5000, conflict_rate = 0.2, legacy_max = 2000):
+    print("\n:STRESS TEST MEMPOOL CONFLICTS:")
+    print(f"{tx_count} transactions, {conflict_rate * 100:.0f}% with conflicts")
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as tmp_path:
+        mem_path = f"{tmp_path}/mempool.mem"
+        open(mem_path, "w").close()
+        # Empty block folder, the UTXOs are only in the UTXO set
+        os.makedirs(f"{tmp_path}/blocks")
+        bc = Blockchain(f"{tmp_path}/blocks", mem_path, "", "", f"{tmp_path}/idx")
+        # Two UTXOs in the blockchain for every transaction
+        outpoints = []
+        for i in range(tx_count * 2):
+            outpoints.append((random_hash(), 0))
+            bc.utxo_set.add_utxo(outpoints[i][0], 0, random_keys()[2], 0, 1.0)
+        # Transactions: each one spends two UTXOs, conflicting ones spend one already spent UTXO
+        txs = []
+        # UTXOs spent by the transactions without conflict
+        spent_ok = []
+        for i in range(tx_count):
+            tx = Transaction("", mem_path, "")
+            tx.timestamp = 1666805141.550495 + i
+            keys = random_keys()
+            if(i > 0 and random.random() < conflict_rate):
+                spent = random.choice(spent_ok)
+            else:
+                spent = outpoints[i * 2]
+                spent_ok.append(spent)
+            tx.inputs = [[spent[0], spent[1], keys[0], keys[1]], [outpoints[i * 2 + 1][0], 0, keys[0], keys[1]]]
+            tx.outputs = [[0, keys[2], 1.5]]
+            tx.input_count = len(tx.inputs)
+            tx.output_count = len(tx.outputs)
+            tx.tx_id = tx.get_tx_id()
+            txs.append(tx)
+        expected = len(spent_ok)
+        # Legacy: search through the whole mempool for every transaction
+        legacy_count = min(tx_count, legacy_max)
+        tx_mem = []
+        start = time.perf_counter()
+        for tx in txs[:legacy_count]:
+            if not(legacy_find_conflict(tx_mem, tx)):
+                tx_mem.append(tx)
+        time_old = time.perf_counter() - start
+        # Submit all transactions (output of the method is hidden)
+        start = time.perf_counter()
+        accepted = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            for tx in txs:
+                if(bc.submit_tx(tx)):
+                    accepted += 1
+        time_new = time.perf_counter() - start
+        # Check the mempool file: no output is spent twice
+        mem_txs = Mempool("", mem_path, "").get_txs()
+        spent = set()
+        double = 0
+        for tx in mem_txs:
+            for inp in tx.inputs:
+                if((inp[0], inp[1]) in spent):
+                    double += 1
+                spent.add((inp[0], inp[1]))
+        print(f"> Accepted: {accepted} (expected {expected}), rejected: {tx_count - accepted}")
+        print(f"> Mempool file: {len(mem_txs)} transactions, {double} outputs spent twice")
+        if(accepted != expected or len(mem_txs) != expected or double):
+            print("> ERROR: Conflicts not detected correctly!")
+        print(f"> {'Legacy':8}: {time_old:8.3f} s for {legacy_count} transactions ({time_old / legacy_count * 1000:7.3f} ms/tx, without writing)")
+        print(f"> {'Indexed':8}: {time_new:8.3f} s for {tx_count} transactions ({time_new / tx_count * 1000:7.3f} ms/tx, with writing)")
+
+# Compares writing transactions to the mempool file one by one (one append and fsync per transaction)
+# with the batch writer (staged in memory, one append and one fsync for all)
+# Only the mempool writer is measured, the synthetic transactions have no valid signatures
+def bench_batch_write(sizes = (100, 1000, 5000)):
+    print("\n:BENCHMARK MEMPOOL BATCH WRITE:")
+    with tempfile.TemporaryDirectory() as tmp_path:
+        mem_path = f"{tmp_path}/mempool.mem"
+        for size in sizes:
+            bl = make_synthetic_block("", 0, size)
+            times = []
+            for batch in (False, True):
+                open(mem_path, "w").close()
+                mempool = Mempool("", mem_path, "")
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if(batch):
+                        for tx in bl.tx:
+                            mempool.stage_tx(tx)
+                        mempool.flush(True)
+                    else:
+                        for tx in bl.tx:
+                            mempool.add_tx(tx, True)
+                times.append(time.perf_counter() - start)
+                if(Mempool("", mem_path, "").get_tx_count() != size):
+                    print("> ERROR: Not all transactions written to mempool!")
+            print(f"{size} transactions:")
+            print(f"> {'Single':8}: {times[0]:8.3f} s ({times[0] / size * 1000:7.3f} ms/tx)")
+            print(f"> {'Batch':8}: {times[1]:8.3f} s ({times[1] / size * 1000:7.3f} ms/tx, {times[0] / times[1]:5.1f}x)")
+
+# Compares reading the wallet file for every address list and every key lookup (legacy)
+# with the keystore of the wallet, which reads the file once
+# and keeps the signing key objects for signing several inputs
+# The wallet file has address_count synthetic keys (random private keys, the public keys don't match)
+def bench_keystore(address_count = 100000, lookups = 20, signatures = 200, signing_addresses = 10):
+    print("\n:BENCHMARK WALLET KEYSTORE:")
+    print(f"Wallet with {address_count} addresses")
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as tmp_path:
+        wlt_path = f"{tmp_path}/user.wlt"
+        addresses = []
+        with open(wlt_path, "w") as handle:
+            for i in range(address_count):
+                addresses.append(random_address())
+                handle.write(f"{addresses[i]}|{os.urandom(32).hex()}|{random_puk_sig()}\n")
+        wallet = Wallet(tmp_path, "", "", "user", "user")
+        # Address list (e.g. for every UTXO refresh)
+        start = time.perf_counter()
+        for i in range(lookups):
+            legacy_get_addr_list(wlt_path)
+        time_old = (time.perf_counter() - start) / lookups
+        start = time.perf_counter()
+        wallet.get_addr_list()
+        time_load = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(lookups):
+            wallet.get_addr_list()
+        time_new = (time.perf_counter() - start) / lookups
+        print("Address list:")
+        print(f"> {'Legacy':8}: {time_old * 1000:9.3f} ms per call")
+        print(f"> {'Keystore':8}: {time_new * 1000:9.3f} ms per call ({time_old / time_new:8.1f}x), first load: {time_load * 1000:.3f} ms")
+        # Key lookup for the inputs of a transaction
+        chosen = random.sample(addresses, lookups)
+        start = time.perf_counter()
+        for address in chosen:
+            legacy_get_keys_for_address(wlt_path, address)
+        time_old = (time.perf_counter() - start) / lookups
+        start = time.perf_counter()
+        for address in chosen:
+            if(wallet.get_keys_for_address(address) == 0):
+                print("> ERROR: Address not found in keystore!")
+        time_new = (time.perf_counter() - start) / lookups
+        print("Key lookup:")
+        print(f"> {'Legacy':8}: {time_old * 1000:9.3f} ms per input")
+        print(f"> {'Keystore':8}: {time_new * 1000:9.3f} ms per input ({time_old / time_new:8.1f}x)")
+        # Signatures: private key string for every signature (legacy) or cached signing key
+        chosen = [random.choice(addresses[:signing_addresses]) for i in range(signatures)]
+        tx_id = random_hash()
+        start = time.perf_counter()
+        for address in chosen:
+            fnc.sign_ECDSA_str(legacy_get_keys_for_address(wlt_path, address)[0], tx_id)
+        time_old = (time.perf_counter() - start) / signatures
+        start = time.perf_counter()
+        for address in chosen:
+            fnc.sign_ECDSA_sk(wallet.get_signing_key(address), tx_id)
+        time_new = (time.perf_counter() - start) / signatures
+        print(f"Signing ({signatures} inputs from {signing_addresses} addresses):")
+        print(f"> {'Legacy':8}: {time_old * 1000:9.3f} ms per input")
+        print(f"> {'Keystore':8}: {time_new * 1000:9.3f} ms per input ({time_old / time_new:8.1f}x)")
+
+# Compares looking up every address of a wallet in the UTXO set (legacy)
+# with the wallet scan, which only scans the blocks and addresses, which are new since the last scan
+# The wallet has address_count addresses, wallet_outputs of them receive outputs in the synthetic blocks
+def bench_wallet_scan(address_count = 100000, block_count = 50, tx_per_block = 20, repeats = 10):
+    print("\n:BENCHMARK WALLET SCAN:")
+    print(f"Wallet with {address_count} addresses, {block_count} blocks with {tx_per_block} transactions")
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as tmp_path:
+        bc = make_synthetic_bc(block_count, tx_per_block)
+        for block in bc.blocks[:-1]:
+            bc.utxo_set.add_block(block)
+        # The addresses of the key pool receive the outputs of the synthetic transactions
+        random_keys()
+        with open(f"{tmp_path}/user.wlt", "w") as handle:
+            for keys in key_pool:
+                handle.write(f"{keys[2]}|{os.urandom(32).hex()}|{keys[0]}\n")
+            for i in range(address_count - len(key_pool)):
+                handle.write(f"{random_address()}|{os.urandom(32).hex()}|{random_puk_sig()}\n")
+        wallet = Wallet(tmp_path, "", "", "user", "user")
+        addr_list = wallet.get_addr_list()
+        # The last block arrives after the first scan
+        last_block = bc.blocks.pop()
+        start = time.perf_counter()
+        for i in range(repeats):
+            legacy_get_wallet_utxos(bc.utxo_set, addr_list)
+        time_old = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        wallet.update_scan(bc)
+        time_first = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(repeats):
+            wallet.update_scan(bc)
+            wallet.scan.get_utxos()
+        time_warm = (time.perf_counter() - start) / repeats
+        bc.blocks.append(last_block)
+        bc.utxo_set.add_block(last_block)
+        start = time.perf_counter()
+        wallet.update_scan(bc)
+        time_block = time.perf_counter() - start
+        # New login: the scan is loaded from the checkpoint next to the wallet file
+        wallet_2 = Wallet(tmp_path, "", "", "user", "user")
+        wallet_2.get_keys()
+        start = time.perf_counter()
+        wallet_2.update_scan(bc)
+        time_login = time.perf_counter() - start
+        utxos = wallet_2.scan.get_utxos()
+        expected = legacy_get_wallet_utxos(bc.utxo_set, addr_list)
+        if(sorted(map(tuple, utxos)) != sorted(map(tuple, expected))):
+            print("> ERROR: Wallet scan doesn't match the UTXO set!")
+        print(f"> {'Legacy':10}: {time_old * 1000:9.3f} ms per refresh")
+        print(f"> {'First scan':10}: {time_first * 1000:9.3f} ms")
+        print(f"> {'Refresh':10}: {time_warm * 1000:9.3f} ms per refresh ({time_old / time_warm:8.1f}x)")
+        print(f"> {'New block':10}: {time_block * 1000:9.3f} ms")
+        print(f"> {'New login':10}: {time_login * 1000:9.3f} ms (from checkpoint, {len(utxos)} UTXOs)")
+
+# Compares the coin selection strategies for a wallet with utxo_count random UTXOs
+# payment_count payments are sent one after another: the inputs are removed from the wallet
+# and the change is added as new UTXO, so the fragmentation of the wallet over time can be seen
+# The signing time is estimated with the time of one signature per input
+def bench_coin_selection(utxo_count = 2000, payment_count = 500, max_inputs = 50):
+    print("\n:BENCHMARK COIN SELECTION:")
+    print(f"Wallet with {utxo_count} UTXOs, {payment_count} payments, maximum {max_inputs} inputs")
+    # Time of one signature
+    private_key = fnc.generate_ECDSA_keys()[0]
+    start = time.perf_counter()
+    for i in range(20):
+        fnc.sign_ECDSA_str(private_key, random_hash())
+    time_sign = (time.perf_counter() - start) / 20
+    random.seed(1)
+    start_utxos = [["", 0, random_hash(), 0, random.randint(1, 20000) / 1000] for i in range(utxo_count)]
+    payments = [random.randint(1, 30000) / 1000 for i in range(payment_count)]
+    for strategy in STRATEGIES:
+        selector = CoinSelector(strategy, max_inputs)
+        utxos = list(start_utxos)
+        inputs = 0
+        exact = 0
+        failed = 0
+        time_select = 0
+        for volume in payments:
+            start = time.perf_counter()
+            chosen, change = selector.select(utxos, volume)
+            time_select += time.perf_counter() - start
+            if not(len(chosen)):
+                failed += 1
+                continue
+            inputs += len(chosen)
+            spent = set(id(utxo) for utxo in chosen)
+            utxos = [utxo for utxo in utxos if id(utxo) not in spent]
+            if(change == 0):
+                exact += 1
+            else:
+                utxos.append(["", 0, random_hash(), 1, change])
+        sent = payment_count - failed
+        print(f"> {strategy:11}: {inputs / sent:6.2f} inputs/tx, {exact / sent * 100:5.1f}% without change, {failed} failed, {len(utxos)} UTXOs left, select: {time_select / payment_count * 1000:7.3f} ms/tx, signing: {inputs / sent * time_sign * 1000:7.3f} ms/tx")
+
+# Compares the signature throughput with the key objects built for every signature (legacy)
+# and with the key cache of fnc.py
+# Signatures are made and verified for key_counts different keys,
+# e.g. 1 key for many signatures (repeated address) up to one key per signature
+def bench_signatures(signature_count = 400, key_counts = (1, 10, 400)):
+    print("\n:BENCHMARK SIGNATURE THROUGHPUT:")
+    for key_count in key_counts:
+        keys = [fnc.generate_ECDSA_keys() for i in range(key_count)]
+        messages = [(keys[i % key_count], random_hash()) for i in range(signature_count)]
+        # Empty key caches, so the keys are not known before
+        fnc.signing_key_cache.clear()
+        fnc.verifying_key_cache.clear()
+        results = []
+        for cached in (False, True):
+            start = time.perf_counter()
+            if(cached):
+                signatures = [fnc.sign_ECDSA_str(key[0], message) for key, message in messages]
+            else:
+                signatures = [legacy_sign_ECDSA_str(key[0], message) for key, message in messages]
+            time_sign = time.perf_counter() - start
+            start = time.perf_counter()
+            if(cached):
+                valid = [fnc.verify_ECDSA_str(messages[i][0][1], signatures[i], messages[i][1]) for i in range(signature_count)]
+            else:
+                valid = [legacy_verify_ECDSA_str(messages[i][0][1], signatures[i], messages[i][1]) for i in range(signature_count)]
+            time_verify = time.perf_counter() - start
+            if not(all(valid)):
+                print("> ERROR: Signatures not valid!")
+            results.append((signature_count / time_sign, signature_count / time_verify))
+        print(f"{signature_count} signatures with {key_count} keys:")
+        print(f"> {'Legacy':8}: sign {results[0][0]:7.1f}/s, verify {results[0][1]:7.1f}/s")
+        print(f"> {'Cached':8}: sign {results[1][0]:7.1f}/s ({results[1][0] / results[0][0]:4.1f}x), verify {results[1][1]:7.1f}/s ({results[1][1] / results[0][1]:4.1f}x)")
+
+# Compares the transaction hash of block version 1 (hash of all Tx IDs)
+# with the Merkle tree of block version 2: building the tree, inclusion proofs
+# and replacing a transaction (only the path to the root is hashed again)
+def bench_merkle(sizes = (1000, 10000, 100000), repeats = 100):
+    print("\n:BENCHMARK MERKLE TREE:")
+    for size in sizes:
+        bl = make_synthetic_block("", 0, size)
+        start = time.perf_counter()
+        bl.get_tx_hash_block()
+        time_legacy = time.perf_counter() - start
+        bl.version = blm.MERKLE_VERSION
+        start = time.perf_counter()
+        root = bl.get_merkle_root()
+        time_build = time.perf_counter() - start
+        positions = [random.randrange(size) for i in range(repeats)]
+        start = time.perf_counter()
+        proofs = [bl.get_merkle_proof(position) for position in positions]
+        time_proof = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        valid = [blm.Block.verify_merkle_proof(bl.tx[positions[i]].tx_id, proofs[i], root) for i in range(repeats)]
+        time_verify = (time.perf_counter() - start) / repeats
+        if not(all(valid)):
+            print("> ERROR: Inclusion proof not valid!")
+        # Replace the coinbase transaction (e.g. new fees)
+        coinbase = make_synthetic_block("", 0, 1).tx[0]
+        start = time.perf_counter()
+        bl.replace_tx(0, coinbase)
+        time_replace = time.perf_counter() - start
+        root = bl.get_merkle_root()
+        bl.merkle_tree = None
+        if(bl.get_merkle_root() != root):
+            print("> ERROR: Merkle root after replacing a transaction is wrong!")
+        print(f"{size} transactions:")
+        print(f"> {'Legacy hash':12}: {time_legacy * 1000:9.3f} ms (whole block for every change)")
+        print(f"> {'Merkle tree':12}: {time_build * 1000:9.3f} ms (built once)")
+        print(f"> {'Replace tx':12}: {time_replace * 1000:9.3f} ms ({time_build / time_replace:6.1f}x faster than building)")
+        print(f"> {'Proof':12}: {time_proof * 1000:9.3f} ms, {len(proofs[0])} hashes, verify: {time_verify * 1000:7.3f} ms")
+
+# Mining engine for bench_node(): the nonce search waits until resume is set,
+# so requests can be sent to the node during the search
+class PausedMiner():
+
+    # Constructor: Instance Variables
+    # miner: mining engine for the nonce search (e.g. mnm.Miner)
+    def __init__(self, miner):
+        self.miner = miner
+        # Set when the nonce search has started
+        self.searching = threading.Event()
+        # The nonce search starts, when resume is set
+        self.resume = threading.Event()
+        self.resume.set()
+
+    # Waits for resume and searches the nonce (see Blockchain.mine_block())
+    def get_nonce(self, number, timestamp, prev_hash, tx_count, tx_hash, difficulty, version = 1):
+        self.searching.set()
+        self.resume.wait()
+        return self.miner.get_nonce(number, timestamp, prev_hash, tx_count, tx_hash, difficulty, version)
+
+    # Returns the hash rate of the workers of the last mining process
+    def get_stats_string(self):
+        return self.miner.get_stats_string()
+
+# Checks and times the node in ndm.py with two users
+# 1. A request which doesn't need the blockchain is answered, while another request waits for the lock
+#    (the event loop is not blocked by the lock)
+# 2. A transaction sent during the nonce search is not in the mined block, but in the next block
+# Measures the time of getbalance requests during the nonce search
+def bench_node(requests = 20, difficulty = 1, hold_time = 0.5):
+    print("\n:BENCHMARK NODE:")
+    with tempfile.TemporaryDirectory() as tmp_path:
+        for folder in ("blocks", "mem", "user", "idx"):
+            os.makedirs(f"{tmp_path}/{folder}")
+        open(f"{tmp_path}/mem/mempool.mem", "w").close()
+        users = {"alice": "a", "bob": "b"}
+        login = {name: {"user": name, "password": users[name]} for name in users}
+        errors = []
+        # Transaction sent during the nonce search is in the next block
+        tx_ok = False
+        # Output of the node is hidden
+        with contextlib.redirect_stdout(io.StringIO()):
+            with open(f"{tmp_path}/user/credentials.txt", "w") as handle:
+                for name in users:
+                    handle.write(f"{name}|{hashlib.sha256(users[name].encode()).hexdigest()}\n")
+                    Wallet.new_wallet(f"{tmp_path}/user", User.get_user_id(name))
+            bc = Blockchain(f"{tmp_path}/blocks", f"{tmp_path}/mem/mempool.mem", f"{tmp_path}/user/credentials.txt", f"{tmp_path}/user", f"{tmp_path}/idx")
+            bc.load_bc()
+            bc.validate_bc()
+            miner = PausedMiner(mnm.Miner(1))
+            node = ndm.Node(bc, miner, "127.0.0.1", 0)
+            thread = threading.Thread(target=asyncio.run, args=(node.serve(),))
+            thread.start()
+            while(node.server is None or node.port == 0):
+                time.sleep(0.01)
+            call = lambda method, params = None: ndm.call(method, params, node.host, node.port, 60)
+            try:
+                call("mine", {**login["alice"], "difficulty": difficulty})
+                # 1. Request waiting for the lock and request without the blockchain at the same time
+                # The lock is held in another thread for hold_time (e.g. like the mining thread)
+                held = threading.Event()
+                def hold_lock():
+                    with node.bc_lock:
+                        held.set()
+                        time.sleep(hold_time)
+                holder = threading.Thread(target=hold_lock)
+                holder.start()
+                held.wait()
+                waiting = threading.Thread(target=call, args=("getblock", {"number": 0}))
+                waiting.start()
+                # The node has received the waiting request
+                time.sleep(hold_time / 4)
+                start = time.perf_counter()
+                try:
+                    call("unknown")
+                except RuntimeError:
+                    pass
+                time_free = time.perf_counter() - start
+                holder.join()
+                waiting.join()
+                if(time_free >= hold_time / 2):
+                    errors.append("Event loop blocked by a request waiting for the lock!")
+                # 2. Transaction during the nonce search
+                with node.bc_lock:
+                    wallet = Wallet(bc.user_path, bc.block_path, bc.mem_path, "bob", User.get_user_id("bob"))
+                    wallet.generate_keys()
+                    bob_address = wallet.get_address()
+                miner.resume.clear()
+                miner.searching.clear()
+                mined = {}
+                mining = threading.Thread(target=lambda: mined.update(call("mine", {**login["alice"], "difficulty": difficulty})))
+                mining.start()
+                miner.searching.wait()
+                times = []
+                for i in range(requests):
+                    start = time.perf_counter()
+                    call("getbalance", login["alice"])
+                    times.append(time.perf_counter() - start)
+                sent = call("sendtx", {**login["alice"], "payments": [[bob_address, 1.5]]})
+                miner.resume.set()
+                mining.join()
+                tx_id = sent["txs"][0]["tx_id"]
+                if(sent["accepted"] != 1):
+                    errors.append(f"Transaction during the nonce search not accepted: {sent['txs'][0]['status']}")
+                elif(tx_id in mined.get("tx_ids", [])):
+                    errors.append("Transaction sent during the nonce search is in the mined block!")
+                else:
+                    next_block = call("mine", {**login["alice"], "difficulty": difficulty})
+                    if(tx_id not in next_block["tx_ids"]):
+                        errors.append("Transaction sent during the nonce search is not in the next block!")
+                    elif(call("getbalance", login["bob"])["balance"] != 1.5):
+                        errors.append("Balance of the receiver is wrong!")
+                    else:
+                        tx_ok = True
+            finally:
+                miner.resume.set()
+                call("stop")
+                thread.join()
+                fnc.set_verify_start_method("fork")
+        for error in errors:
+            print(f"> ERROR: {error}")
+        print(f"> {'Free':8}: {time_free * 1000:8.3f} ms for a request without the lock, while the lock was held {hold_time:.1f} s")
+        print(f"> {'Mining':8}: {sum(times) / len(times) * 1000:8.3f} ms per getbalance during the nonce search (max {max(times) * 1000:.3f} ms)")
+        print(f"> Transaction sent during the nonce search: {'in the next block' if(tx_ok) else 'ERROR'}")
+
+##################
+# Run benchmarks #
+##################
+
+# All benchmarks by name
+benchmarks = {
+    "mining": bench_mining,
+    "parser": bench_block_parser,
+    "validation": bench_validation,
+    "format": bench_block_format,
+    "startup": bench_startup,
+    "checkpoint": bench_checkpoint,
+    "mempool": bench_mempool,
+    "conflicts": bench_conflicts,
+    "batch": bench_batch_write,
+    "keystore": bench_keystore,
+    "walletscan": bench_wallet_scan,
+    "coins": bench_coin_selection,
+    "signatures": bench_signatures,
+    "merkle": bench_merkle,
+    "node": bench_node,
+}
+
+# Small sizes for every benchmark, so all benchmarks can be checked in a short time
+check_args = {
+    "mining": {"difficulties": (2,), "max_nonce": 2000},
+    "parser": {"sizes": (100,), "legacy_max": 100},
+    "validation": {"sizes": (100,), "tx_per_block": 10, "legacy_max": 100},
+    "format": {"block_count": 3, "tx_per_block": 50},
+    "startup": {"block_count": 5, "tx_per_block": 10},
+    "checkpoint": {"block_count": 5, "tx_per_block": 10},
+    "mempool": {"sizes": (50,), "legacy_max": 50},
+    "conflicts": {"tx_count": 200, "legacy_max": 200},
+    "batch": {"sizes": (50,)},
+    "keystore": {"address_count": 1000, "lookups": 2, "signatures": 10, "signing_addresses": 2},
+    "walletscan": {"address_count": 1000, "block_count": 5, "tx_per_block": 10, "repeats": 2},
+    "coins": {"utxo_count": 100, "payment_count": 20},
+    "signatures": {"signature_count": 20, "key_counts": (1, 20)},
+    "merkle": {"sizes": (100,), "repeats": 10},
+    "node": {"requests": 5, "hold_time": 0.2},
+}
+
+# Method runs every benchmark with the small sizes of check_args
+# A benchmark fails, if it raises an exception or reports an error
+# Returns the names of the failed benchmarks
+def check_benchmarks():
+    failed = []
+    for name in benchmarks:
+        log = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(log):
+                benchmarks[name](**check_args.get(name, {}))
+            error = "> ERROR" in log.getvalue()
+        except Exception as err:
+            print(f"{name}: {type(err).__name__}: {err}")
+            error = True
+        print(f"{name:12}: {'FAILED' if error else 'ok'}")
+        if(error):
+            print(log.getvalue())
+            failed.append(name)
+    print(f"{len(benchmarks) - len(failed)} of {len(benchmarks)} benchmarks ok")
+    return failed
+
+if(__name__ == "__main__"):
+    if(len(sys.argv) == 2 and sys.argv[1] == "check"):
+        sys.exit(1 if(check_benchmarks()) else 0)
+    elif(len(sys.argv) < 2 or sys.argv[1] not in benchmarks):
+        print("Usage: python bnm.py <benchmark>")
+        print("       python bnm.py check: runs all benchmarks with small sizes")
+        print("Benchmarks: " + ", ".join(benchmarks))
+    else:
+        benchmarks[sys.argv[1]]()
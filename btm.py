@@ -0,0 +1,239 @@
+###########
+# Modules #
+###########
+
+# heapq: priority queue for choosing the transactions with the highest fee rate
+# source: https://docs.python.org/3/library/heapq.html
+import heapq
+# blm (block module): Own module for the block version with Merkle tree
+import blm
+
+# Bytes of a block, which are reserved for the block header and the coinbase transaction
+BLOCK_RESERVE = 1000
+
+#########
+# Class #
+#########
+
+# Template for the next block
+# The transactions of the mempool are checked once, when they arrive (signatures, inputs, fee),
+# so the start of the mining process only needs to choose the transactions
+# The transactions with the highest fee per byte are chosen first, up to a maximum block size
+# A transaction, which spends an output of another transaction in mempool (parent),
+# is only chosen after its parent
+# A transaction, which spends the same output as a transaction in the template, waits in mempool,
+# until the other transaction is in a block (then it is rejected)
+# Only the transactions in the template count: a rejected transaction (e.g. invalid signature) is no conflict
+class BlockTemplate():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    def __init__(self):
+        # Checked transactions: Tx ID -> [transaction object, fee, size in bytes, set of Tx IDs of the parents]
+        # A dict is used to keep the order of arrival
+        self.entries = {}
+        # Number of mempool transactions, which are already checked
+        self.mem_count = 0
+        # Generation of the mempool, when the transactions were checked (see Mempool.generation)
+        self.generation = None
+        # Tx IDs of the checked transactions, which were rejected (removed from mempool with the next block)
+        self.rejected = set()
+        # Outputs spent by the transactions in the template: (Tx ID, Output index) -> Tx ID of the spending transaction
+        self.spent = {}
+        # Transactions, which spend the same output as a transaction in the template, or their children:
+        # Tx ID -> transaction object, they stay in mempool until the conflict is in a block
+        self.conflicts = {}
+        # Transactions and Merkle tree of the last block filled from the template (see fill_block())
+        self.block_txs = None
+        self.block_tree = None
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Block template with {len(self.entries)} transactions"
+        return string
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Method clears the template
+    def clear(self):
+        self.entries = {}
+        self.mem_count = 0
+        self.generation = None
+        self.rejected = set()
+        self.spent = {}
+        self.conflicts = {}
+        self.block_txs = None
+        self.block_tree = None
+
+    # Method checks the transactions, which arrived in mempool since the last update
+    # If the mempool file was changed by another program, all transactions are checked again
+    # Transactions with invalid signatures, unknown inputs or a negative fee are not added
+    def update(self, blockchain):
+        txs = blockchain.mempool.get_txs()
+        if(self.generation != blockchain.mempool.generation):
+            self.clear()
+            self.generation = blockchain.mempool.generation
+        # Transactions, which arrived since the last update: (index in mempool, transaction object)
+        tx_loaded = []
+        for i in range(self.mem_count, len(txs)):
+            if not(txs[i].tx_valid):
+                print(f"Transaction {i} in mempool is corrupted and cannot be loaded!")
+                self.rejected.add(txs[i].tx_id)
+            else:
+                tx_loaded.append((i, txs[i]))
+        self.mem_count = len(txs)
+        # Validate signatures of all new transactions (in parallel)
+        results = blockchain.validate_txs([tx for i, tx in tx_loaded])
+        for n in range(len(tx_loaded)):
+            if not(results[n]):
+                print(f"Signature not valid! Transaction {tx_loaded[n][0]} not accepted by the system")
+                self.rejected.add(tx_loaded[n][1].tx_id)
+            # A second copy of a transaction in the template is not removed, as it would remove the first one
+            # Conflicts with transactions in the template stay in mempool (see remove_txs())
+            elif not(self.add_tx(blockchain, tx_loaded[n][1])) and tx_loaded[n][1].tx_id not in self.entries and tx_loaded[n][1].tx_id not in self.conflicts:
+                self.rejected.add(tx_loaded[n][1].tx_id)
+
+    # Method adds a transaction with valid signatures to the template
+    # Returns False if the transaction is already in the template, conflicts with other transactions,
+    # the fee cannot be calculated or the parent transaction is not in the template
+    # A transaction, which spends an output of a transaction in the template or whose parent waits,
+    # is added to the waiting conflicts
+    def add_tx(self, blockchain, tx):
+        if(tx.tx_id in self.entries or tx.tx_id in self.conflicts):
+            print(f"Transaction {tx.tx_id} is more than once in mempool!")
+            return False
+        for inp in tx.inputs:
+            spending_tx = self.spent.get((inp[0], int(inp[1])))
+            if(spending_tx is not None):
+                print(f"Output {inp[0]}|{inp[1]} is already spent in transaction {spending_tx} in mempool!")
+                self.conflicts[tx.tx_id] = tx
+                return False
+            if(inp[0] in self.conflicts):
+                print(f"Transaction {tx.tx_id} in mempool spends an output of a conflicting transaction!")
+                self.conflicts[tx.tx_id] = tx
+                return False
+        # The other transactions in mempool are checked with the outputs spent in the template
+        conflict = blockchain.get_tx_conflict(tx, False)
+        if(conflict != ""):
+            print(conflict)
+            return False
+        fee = blockchain.get_tx_fee(tx)
+        if(fee is None):
+            print(f"Transaction {tx.tx_id} in mempool references unknown outputs!")
+            return False
+        if(fee < 0):
+            print(f"Outputs of transaction {tx.tx_id} in mempool exceed its inputs!")
+            return False
+        # Parents: transactions in mempool, whose outputs are spent by this transaction
+        parents = set()
+        for inp in tx.inputs:
+            if(blockchain.mempool.get_tx(inp[0]) is not None):
+                if(inp[0] not in self.entries):
+                    print(f"Transaction {tx.tx_id} in mempool spends an output of a rejected transaction!")
+                    return False
+                parents.add(inp[0])
+        self.entries[tx.tx_id] = [tx, fee, len(tx.get_tx_string()), parents]
+        for inp in tx.inputs:
+            self.spent[(inp[0], int(inp[1]))] = tx.tx_id
+        return True
+
+    # Method chooses the transactions for the next block
+    # The transactions with the highest fee per byte come first, parents always before their children
+    # max_size: maximum size of the block in bytes (header and coinbase included)
+    # Returns a tuple with:
+    # 1. List of transaction objects in the order for the block
+    # 2. Sum of the fees
+    def select(self, max_size):
+        max_size -= BLOCK_RESERVE
+        # Priority queue: (negative fee rate, order of arrival, Tx ID)
+        queue = []
+        # Parent Tx ID -> list of Tx IDs of the children
+        children = {}
+        # Tx ID -> number of parents, which are not chosen yet
+        waiting = {}
+        # Tx ID -> order of arrival
+        order_of = {}
+        for order, tx_id in enumerate(self.entries):
+            entry = self.entries[tx_id]
+            order_of[tx_id] = order
+            waiting[tx_id] = len(entry[3])
+            for parent in entry[3]:
+                children.setdefault(parent, []).append(tx_id)
+            if not(len(entry[3])):
+                heapq.heappush(queue, (-entry[1] / entry[2], order, tx_id))
+        txs = []
+        fees = 0
+        size = 0
+        while(len(queue)):
+            tx_id = heapq.heappop(queue)[2]
+            entry = self.entries[tx_id]
+            # Transaction doesn't fit into the block anymore (its children are never added)
+            if(size + entry[2] > max_size):
+                continue
+            txs.append(entry[0])
+            fees += entry[1]
+            size += entry[2]
+            # Children can be chosen, when all their parents are chosen
+            for child in children.get(tx_id, []):
+                waiting[child] -= 1
+                if(waiting[child] == 0):
+                    heapq.heappush(queue, (-self.entries[child][1] / self.entries[child][2], order_of[child], child))
+        return (txs, fees)
+
+    # Method removes transactions, which were added to a block, from the template
+    # The remaining transactions stay in the template and don't need to be checked again
+    # Waiting transactions, which spend an output spent in the block, and their children are rejected now
+    # Must be called after the transactions were removed from the mempool
+    def remove_txs(self, blockchain, tx_ids):
+        removed = set(tx_ids)
+        # Outputs spent in the block
+        spent = set()
+        for tx_id in removed:
+            entry = self.entries.pop(tx_id, None)
+            if(entry is not None):
+                for inp in entry[0].inputs:
+                    outpoint = (inp[0], int(inp[1]))
+                    spent.add(outpoint)
+                    self.spent.pop(outpoint, None)
+        # Parents in the block are not in mempool anymore
+        for tx_id in self.entries:
+            self.entries[tx_id][3] -= removed
+        self.rejected -= removed
+        # Conflicts in the order of the mempool, so parents are rejected before their children
+        for tx_id in list(self.conflicts):
+            for inp in self.conflicts[tx_id].inputs:
+                if((inp[0], int(inp[1])) in spent or inp[0] in self.rejected):
+                    del self.conflicts[tx_id]
+                    self.rejected.add(tx_id)
+                    break
+        self.generation = blockchain.mempool.generation
+        self.mem_count = len(blockchain.mempool.txs)
+
+    # Method adds the coinbase and the chosen transactions to a new block
+    # If the chosen transactions start with the transactions of the last filled block
+    # (e.g. the mined block was discarded or more transactions arrived during mining),
+    # the Merkle tree of the last block is reused: the coinbase with the new fees is replaced
+    # and only the new transactions are appended, so only their paths in the tree are hashed again
+    def fill_block(self, block, coinbase, txs):
+        last = self.block_txs
+        if(block.version >= blm.MERKLE_VERSION and self.block_tree is not None and len(last) - 1 <= len(txs)
+           and all(last[i + 1].tx_id == txs[i].tx_id for i in range(len(last) - 1))):
+            # The tree of the last block is copied, it must not change
+            block.tx = list(last)
+            block.merkle_tree = [list(level) for level in self.block_tree]
+            block.merkle_txs = block.tx
+            block.replace_tx(0, coinbase)
+            for tx in txs[len(last) - 1:]:
+                block.append_tx(tx)
+        else:
+            block.tx = [coinbase] + txs
+        self.block_txs = block.tx
+        if(block.version >= blm.MERKLE_VERSION):
+            self.block_tree = block.get_merkle_tree()
+        else:
+            self.block_tree = None
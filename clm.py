@@ -0,0 +1,214 @@
+###########
+# Modules #
+###########
+
+# sys: for the exit code and the output streams
+import sys
+# os: for reading the password from an environment variable
+import os
+# time: for measuring the run time of the commands
+import time
+# json: output of the commands as JSON
+# source: https://docs.python.org/3/library/json.html
+import json
+# argparse: commands and options of the command line
+# source: https://docs.python.org/3/library/argparse.html
+import argparse
+# io, contextlib: the messages of the classes are written to stderr (or hidden), so stdout only contains JSON
+import io
+import contextlib
+# fnc (Module for own functions): Own set of functions
+import fnc
+# usr (user module): Own module for login/out, session, and user handling
+from usr import User
+# wlm (wallet module). Own module for wallet handling
+from wlm import Wallet
+# bcm (blockchain module). Own module for blockchain
+from bcm import Blockchain
+# mnm (mining module). Own module for the multi-process nonce search
+from mnm import Miner
+# sgm (segment module). Own module for the block store in segment files
+from sgm import SegmentStore
+# csm (coin selection module). Own module for choosing the inputs of a transaction
+from csm import CoinSelector, STRATEGIES
+# stm (settings module). Own module for the settings of the program, the same as in main.py
+import stm
+
+# Command line interface of MilaCoin without menus and input prompts (e.g. scripts and load tests)
+# Every command prints one JSON object to stdout, the messages of the program are written to stderr
+# Usage: python clm.py <command> [options], help: python clm.py -h
+# Commands:
+# mine: mines the next block for a user
+# send: sends one or more payments (<address> <volume> ...) of a user
+# balance: balance and UTXOs of a user
+# address: creates a new receiver address for a user
+# validate: validates the blockchain (--deep: also inputs and signatures)
+# mempool: transactions in mempool
+# export: blocks as JSON (all or --start/--end)
+# Login for mine, send, balance and address: --user <name> and --password <password>
+# or the environment variable MIC_PASSWORD
+
+#############
+# Functions #
+#############
+
+# Returns the parser of the command line
+def get_parser():
+    parser = argparse.ArgumentParser(prog="clm.py", description="MilaCoin command line interface (JSON output)")
+    parser.add_argument("--blocks", default=stm.block_path, help="block folder")
+    parser.add_argument("--mem", default=stm.mem_path, help="mempool file")
+    parser.add_argument("--cred", default=stm.cred_path, help="file with the login credentials")
+    parser.add_argument("--users", default=stm.user_path, help="user folder (wallets)")
+    parser.add_argument("--idx", default=stm.idx_path, help="index folder")
+    parser.add_argument("--store", default=None, help="folder of a block store (segment files) instead of the block folder")
+    parser.add_argument("--quiet", action="store_true", help="hide the messages of the program (stderr)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    # Commands with login
+    login = argparse.ArgumentParser(add_help=False)
+    login.add_argument("--user", required=True, help="user name")
+    login.add_argument("--password", default=None, help="password (default: environment variable MIC_PASSWORD)")
+    mine = commands.add_parser("mine", parents=[login], help="mine the next block")
+    mine.add_argument("--difficulty", type=int, default=stm.mining_diff)
+    mine.add_argument("--reward", type=float, default=stm.mining_reward)
+    mine.add_argument("--min-tx", type=int, default=stm.min_tx_mine)
+    mine.add_argument("--processes", type=int, default=stm.mining_processes, help="mining processes (0 = number of cpu cores)")
+    mine.add_argument("--max-block-size", type=int, default=stm.max_block_size)
+    mine.add_argument("--version", type=int, default=stm.block_version, help="block version")
+    send = commands.add_parser("send", parents=[login], help="send payments: <address> <volume> [<address> <volume> ...]")
+    send.add_argument("payments", nargs="+")
+    send.add_argument("--fee", type=float, default=stm.tx_fee, help="fee of every transaction")
+    send.add_argument("--coins", choices=STRATEGIES, default=stm.coin_selection, help="coin selection")
+    send.add_argument("--max-inputs", type=int, default=stm.max_tx_inputs)
+    send.add_argument("--no-fsync", action="store_true", help="don't wait until the mempool is written to the disk")
+    commands.add_parser("balance", parents=[login], help="balance and UTXOs")
+    commands.add_parser("address", parents=[login], help="new receiver address")
+    validate = commands.add_parser("validate", help="validate the blockchain")
+    validate.add_argument("--deep", action="store_true", help="also validate inputs and signatures of all transactions")
+    validate.add_argument("--processes", type=int, default=stm.verify_processes, help="processes for the signatures (0 = number of cpu cores)")
+    commands.add_parser("mempool", help="transactions in mempool")
+    export = commands.add_parser("export", help="blocks as JSON")
+    export.add_argument("--start", type=int, default=0, help="first block")
+    export.add_argument("--end", type=int, default=None, help="last block (default: last block of the blockchain)")
+    export.add_argument("--headers", action="store_true", help="only the block headers")
+    export.add_argument("--output", default=None, help="write the blocks to a file instead of stdout")
+    return parser
+
+# Returns the blockchain object, loaded and validated like in main.py
+def load_blockchain(args, deep = False):
+    bc = Blockchain(args.blocks, args.mem, args.cred, args.users, args.idx)
+    bc.cache_budget = stm.block_cache_size * 1024 * 1024
+    bc.verify_processes = args.processes if(args.command == "validate") else stm.verify_processes
+    if(args.store is not None):
+        bc.store = SegmentStore(args.store)
+    bc.load_bc()
+    # The blockchain is validated only if it was loaded
+    if(bc.bc_valid):
+        bc.validate_bc(deep)
+    return bc
+
+# Returns the wallet of a user after the login without input prompts
+# Returns None if the login fails
+def load_wallet(args, bc):
+    password = args.password if(args.password is not None) else os.environ.get("MIC_PASSWORD", "")
+    user = User(args.cred, args.users)
+    if not(user.login_as(args.user, password)):
+        return None
+    user_data = user.get_user_data()
+    wallet = Wallet(args.users, args.blocks, args.mem, user_data[0], user_data[1])
+    wallet.coin_selector = CoinSelector(getattr(args, "coins", stm.coin_selection), getattr(args, "max_inputs", stm.max_tx_inputs))
+    wallet.load_user_utxos(bc)
+    return wallet
+
+# Returns the UTXOs of a wallet as list of dicts
+def get_utxo_dicts(wallet):
+    # utxo: [Address, Block, Tx ID, Output index, Volume]
+    return [{"address": utxo[0], "block": utxo[1], "tx_id": utxo[2], "index": int(utxo[3]), "volume": round(utxo[4], 3)} for utxo in wallet.utxo_user]
+
+# Returns the error message, if a volume of the payments is not a number, else an empty string
+# payments: list of (receiver address, volume)
+def get_volume_error(payments):
+    for payment in payments:
+        if not(fnc.check_nr(payment[1])):
+            return f"Volume {payment[1]} is not a number!"
+    return ""
+
+# Returns the report of Wallet.send_batch() as list of dicts
+# The volumes are numbers like the fee and the balance (see get_volume_error())
+def get_tx_dicts(report):
+    return [{"address": entry[0], "volume": float(entry[1]), "tx_id": entry[2], "status": entry[3]} for entry in report]
+
+# Runs a command and returns the result as dict
+# result["ok"]: False if the command failed, the reason is in result["error"]
+def run_command(args):
+    # The blockchain is loaded and validated for every command
+    deep = (args.command == "validate" and args.deep)
+    bc = load_blockchain(args, deep)
+    if(args.command == "validate"):
+        return {"ok": bc.bc_valid, "valid": bc.bc_valid, "deep": deep, "blocks": len(bc.blocks)}
+    if not(bc.bc_valid):
+        return {"ok": False, "error": "Blockchain not valid!"}
+    if(args.command == "mempool"):
+        txs = []
+        for tx in bc.get_mempool():
+            tx_dict = tx.get_tx_dict()
+            tx_dict["fee"] = bc.get_tx_fee(tx)
+            txs.append(tx_dict)
+        return {"ok": True, "count": len(txs), "txs": txs}
+    if(args.command == "export"):
+        end = len(bc.blocks) - 1 if(args.end is None) else min(args.end, len(bc.blocks) - 1)
+        blocks = [bc.blocks[block_nr].get_block_dict(not(args.headers)) for block_nr in range(max(args.start, 0), end + 1)]
+        if(args.output is None):
+            return {"ok": True, "count": len(blocks), "blocks": blocks}
+        with open(args.output, "w") as handle:
+            json.dump(blocks, handle)
+        return {"ok": True, "count": len(blocks), "output": args.output}
+    # Commands with login
+    wallet = load_wallet(args, bc)
+    if(wallet is None):
+        return {"ok": False, "error": f"Login of user {args.user} not successful!"}
+    if(args.command == "balance"):
+        return {"ok": True, "user": args.user, "balance": wallet.get_user_balance(), "utxos": get_utxo_dicts(wallet)}
+    if(args.command == "address"):
+        if not(wallet.generate_keys()):
+            return {"ok": False, "error": f"Wallet of user {args.user} not found!"}
+        return {"ok": True, "user": args.user, "address": wallet.get_address()}
+    if(args.command == "send"):
+        if(len(args.payments) % 2):
+            return {"ok": False, "error": "Payments must be pairs of <address> <volume>!"}
+        payments = [(args.payments[i], args.payments[i + 1]) for i in range(0, len(args.payments), 2)]
+        if(get_volume_error(payments) != ""):
+            return {"ok": False, "error": get_volume_error(payments)}
+        report = wallet.send_batch(bc, payments, args.fee, not(args.no_fsync))
+        txs = get_tx_dicts(report)
+        accepted = sum(1 for entry in report if entry[3] == "accepted")
+        return {"ok": accepted == len(report), "accepted": accepted, "txs": txs, "balance": wallet.get_user_balance()}
+    if(args.command == "mine"):
+        bc.miner = Miner(args.processes)
+        bc.max_block_size = args.max_block_size
+        bc.block_version = args.version
+        block_count = len(bc.blocks)
+        bc.mine_block(wallet, args.difficulty, args.reward, args.min_tx)
+        if(len(bc.blocks) == block_count):
+            return {"ok": False, "error": "Block not mined!"}
+        block = bc.blocks[-1]
+        result = {"ok": True, "block": block.get_block_dict(False)}
+        result["block"]["tx_ids"] = [tx.tx_id for tx in block.tx]
+        wallet.load_user_utxos(bc)
+        result["balance"] = wallet.get_user_balance()
+        return result
+
+# Method runs the command line and prints the result as JSON
+# Returns the exit code: 0 = ok, 1 = command failed
+def main(argv = None):
+    args = get_parser().parse_args(argv)
+    start = time.perf_counter()
+    # Messages of the classes are not mixed with the JSON output
+    log = io.StringIO() if(args.quiet) else sys.stderr
+    with contextlib.redirect_stdout(log):
+        result = run_command(args)
+    result = {"command": args.command, **result, "time": round(time.perf_counter() - start, 6)}
+    print(json.dumps(result, indent=2))
+    return 0 if(result["ok"]) else 1
+
+if(__name__ == "__main__"):
+    sys.exit(main())
@@ -0,0 +1,171 @@
+###########
+# Modules #
+###########
+
+# bisect: binary search in the sorted UTXO volumes
+# source: https://docs.python.org/3/library/bisect.html
+import bisect
+
+# Strategies for choosing the inputs of a transaction
+STRATEGIES = ("order", "largest", "bnb", "consolidate")
+
+#########
+# Class #
+#########
+
+# Coin selection: chooses the UTXOs of a user for the inputs of a transaction
+# Every input needs a signature and makes the transaction bigger, so as few inputs as possible are used
+# Strategies:
+# order: UTXOs in the order of the list (oldest first), as it was done before
+# largest: largest UTXOs first -> fewest inputs
+# bnb: branch and bound search for inputs, which match the volume exactly (no change output),
+#      if there is no exact match, largest first is used
+# consolidate: fewest inputs like largest first, then the smallest UTXOs are added up to the input cap,
+#      so a wallet with many small UTXOs is merged into one change output
+# Volumes are compared as integers in thousandths of a coin (3 decimals), so there are no rounding errors
+class CoinSelector():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    # max_inputs: maximum number of inputs of a transaction
+    # max_tries: maximum number of steps of the branch and bound search
+    def __init__(self, strategy = "bnb", max_inputs = 50, max_tries = 100000):
+        if(strategy not in STRATEGIES):
+            print(f"Error: Unknown coin selection strategy \"{strategy}\", \"bnb\" is used!")
+            strategy = "bnb"
+        self.strategy = strategy
+        self.max_inputs = max_inputs
+        self.max_tries = max_tries
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Coin selection \"{self.strategy}\" with maximum {self.max_inputs} inputs"
+        return string
+
+    ##################
+    # Static methods #
+    ##################
+
+    # Returns a volume in thousandths of a coin as integer
+    @staticmethod
+    def to_milli(volume):
+        return int(round(float(volume) * 1000))
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Method chooses the UTXOs for a transaction
+    # utxos: list of UTXOs [Address, Block, Tx ID, Output index, Volume]
+    # volume: volume of the transaction (with fee)
+    # Returns a tuple with:
+    # 1. List of UTXOs (if empty, not enough coins or too many inputs needed)
+    # 2. Change
+    def select(self, utxos, volume):
+        target = self.to_milli(volume)
+        if(target <= 0 or not(len(utxos))):
+            return ([], 0)
+        if(self.strategy == "order"):
+            chosen = self.select_order(utxos, target)
+        else:
+            # UTXOs sorted by volume (largest first): [volume in thousandths, position in utxos]
+            coins = sorted(([self.to_milli(utxo[4]), position] for position, utxo in enumerate(utxos)), key=lambda coin: -coin[0])
+            chosen = None
+            if(self.strategy == "bnb"):
+                chosen = self.select_bnb(coins, target)
+            if(chosen is None):
+                chosen = self.select_largest(coins, target)
+            if(chosen is not None and self.strategy == "consolidate"):
+                chosen = self.add_smallest(coins, chosen)
+        if(chosen is None):
+            return ([], 0)
+        # Keep the order of the UTXO list
+        chosen.sort()
+        inputs = [utxos[position] for position in chosen]
+        change = sum(self.to_milli(utxo[4]) for utxo in inputs) - target
+        return (inputs, change / 1000)
+
+    # Returns the positions of the UTXOs in the order of the list until the volume is reached
+    # Returns None if there are not enough coins or more inputs than max_inputs would be needed
+    def select_order(self, utxos, target):
+        chosen = []
+        total = 0
+        for position, utxo in enumerate(utxos):
+            if(len(chosen) == self.max_inputs):
+                return None
+            chosen.append(position)
+            total += self.to_milli(utxo[4])
+            if(total >= target):
+                return chosen
+        return None
+
+    # Returns the positions of the largest UTXOs until the volume is reached
+    # Returns None if there are not enough coins or more inputs than max_inputs would be needed
+    def select_largest(self, coins, target):
+        chosen = []
+        total = 0
+        for coin in coins[:self.max_inputs]:
+            chosen.append(coin[1])
+            total += coin[0]
+            if(total >= target):
+                return chosen
+        return None
+
+    # Returns the positions of UTXOs, which match the volume exactly (no change needed)
+    # Depth first search through the UTXOs sorted by volume (largest first)
+    # A branch is cut, if the sum is greater than the volume or the remaining UTXOs cannot reach it
+    # Returns None if there is no exact match within max_inputs and max_tries
+    def select_bnb(self, coins, target):
+        # Single UTXO with the exact volume: binary search in the volumes (ascending)
+        volumes = [coin[0] for coin in reversed(coins)]
+        position = bisect.bisect_left(volumes, target)
+        if(position < len(volumes) and volumes[position] == target):
+            return [coins[len(coins) - 1 - position][1]]
+        # Skip UTXOs, which are greater than the volume
+        first = len(coins) - bisect.bisect_right(volumes, target)
+        coins = coins[first:]
+        # remaining[i]: sum of the volumes of coins[i:]
+        remaining = [0] * (len(coins) + 1)
+        for i in range(len(coins) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + coins[i][0]
+        if(remaining[0] < target):
+            return None
+        tries = 0
+        # Stack of the chosen indexes in coins
+        chosen = []
+        total = 0
+        i = 0
+        while(tries < self.max_tries):
+            tries += 1
+            # Cut the branch: too much, not reachable anymore or too many inputs
+            backtrack = (total > target or total + remaining[i] < target or i == len(coins) or len(chosen) == self.max_inputs)
+            if(total == target):
+                return [coins[index][1] for index in chosen]
+            if(backtrack):
+                if not(len(chosen)):
+                    return None
+                # Remove the last chosen coin and continue without it
+                i = chosen.pop()
+                total -= coins[i][0]
+                i += 1
+            else:
+                # Choose the next coin
+                chosen.append(i)
+                total += coins[i][0]
+                i += 1
+        return None
+
+    # Method adds the smallest UTXOs to the chosen ones up to max_inputs (consolidation)
+    # Returns the positions of the chosen UTXOs
+    def add_smallest(self, coins, chosen):
+        chosen_set = set(chosen)
+        for coin in reversed(coins):
+            if(len(chosen) >= self.max_inputs):
+                break
+            if(coin[1] not in chosen_set):
+                chosen.append(coin[1])
+                chosen_set.add(coin[1])
+        return chosen
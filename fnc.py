@@ -14,6 +14,35 @@ import base58
 # hashlib: encryption/decryption module
 # source: https://datagy.io/python-sha256/
 import hashlib
+# multiprocessing: verify signatures in several processes
+# source: https://docs.python.org/3/library/multiprocessing.html
+import multiprocessing as mp
+# os: for the number of cpu cores
+import os
+# atexit: stops the worker processes for verifying signatures at the end of the program
+import atexit
+# OrderedDict: caches of key objects, the least recently used are removed first
+from collections import OrderedDict
+# PointJacobi: public key point with the order of the curve, needed for the precomputation
+from ecdsa.ellipticcurve import PointJacobi
+
+# Maximum number of key objects in each key cache
+KEY_CACHE_SIZE = 1024
+# Number of verifications with a public key, after which its precomputation table is built
+# Building the table takes as long as several verifications, so it is only done for keys used often
+PRECOMPUTE_USES = 8
+# Caches of key objects
+# Signing keys: private key -> ecdsa.SigningKey
+# Verifying keys: public key -> [ecdsa.VerifyingKey, number of verifications]
+signing_key_cache = OrderedDict()
+verifying_key_cache = OrderedDict()
+# Pool of worker processes for verifying signatures (see get_verify_pool())
+# Created at the first use and kept, so the processes are not started again for every block
+verify_pool = None
+# Number of processes in verify_pool
+verify_pool_size = 0
+# Start method of the worker processes for verifying signatures (see set_verify_start_method())
+verify_start_method = "fork"
 
 #######################################
 # Functions for validating user input #
@@ -214,10 +243,54 @@ def generate_ECDSA_keys():
 # private key as string in hex format 
 # returns the signature: string base58 encoded (88 letters) 
 def sign_ECDSA_str(private_key, string):
+    return sign_ECDSA_sk(get_signing_key(private_key), string)
+
+# Function returns the signing key object of a private key
+# private key as string in hex format 
+# The signing keys, which were used last, are kept in a cache,
+# so the public point is calculated only once for several signatures
+def get_signing_key(private_key):
+    sk = signing_key_cache.get(private_key)
+    if(sk is None):
+        sk = ecdsa.SigningKey.from_string(bytes.fromhex(private_key), curve=ecdsa.SECP256k1)
+        add_to_key_cache(signing_key_cache, private_key, sk)
+    else:
+        signing_key_cache.move_to_end(private_key)
+    return sk
+
+# Function returns the verifying key object of a public key
+# public key as base58 encoded string
+# The verifying keys, which were used last, are kept in a cache
+# When a key was used PRECOMPUTE_USES times, the precomputation table of the key point is built,
+# which makes the following verifications faster
+def get_verifying_key(public_key):
+    entry = verifying_key_cache.get(public_key)
+    if(entry is None):
+        # recover verifying key from string
+        entry = [ecdsa.VerifyingKey.from_string(base58.b58decode(public_key), curve=ecdsa.SECP256k1), 0]
+        add_to_key_cache(verifying_key_cache, public_key, entry)
+    else:
+        verifying_key_cache.move_to_end(public_key)
+    entry[1] += 1
+    if(entry[1] == PRECOMPUTE_USES):
+        # The precomputation needs a point with the order of the curve
+        point = PointJacobi.from_bytes(ecdsa.SECP256k1.curve, base58.b58decode(public_key), order=ecdsa.SECP256k1.order)
+        entry[0] = ecdsa.VerifyingKey.from_public_point(point, curve=ecdsa.SECP256k1)
+        entry[0].precompute()
+    return entry[0]
+
+# Function adds a key object to a key cache
+# If the cache is full, the least recently used key is removed
+def add_to_key_cache(cache, key, value):
+    cache[key] = value
+    if(len(cache) > KEY_CACHE_SIZE):
+        cache.popitem(last=False)
+
+# Function signs a string with a signing key object (see get_signing_key())
+# returns the signature: string base58 encoded (88 letters) 
+def sign_ECDSA_sk(sk, string):
     # encode string to binary
     bstring = string.encode()
-    # Recover signing key from private key string
-    sk = ecdsa.SigningKey.from_string(bytes.fromhex(private_key), curve=ecdsa.SECP256k1)
     # Generate signature
     signature = base58.b58encode(sk.sign(bstring)).decode()
     return signature
@@ -225,16 +298,15 @@ def sign_ECDSA_str(private_key, string):
 # Function verifyes a string with a given public key and a signature
 # public key and signature base58 encoded
 # Returns True or False
+# A malformed public key or signature is not valid, so one bad input doesn't stop a whole batch
 def verify_ECDSA_str(publik_key, signature, string):
     # encode string to binary
     bstring = string.encode()
-    # decode signature back form base58 encoding
-    sig = base58.b58decode(signature) 
-    # decode public key back form base58 encoding
-    pk = base58.b58decode(publik_key)
-    # recover verifying key from string
-    vk = ecdsa.VerifyingKey.from_string(pk, curve=ecdsa.SECP256k1)
     try:
+        # decode signature back form base58 encoding
+        sig = base58.b58decode(signature) 
+        # verifying key from the cache
+        vk = get_verifying_key(publik_key)
         # Verify string
         vk.verify(sig, bstring)
         # print("Validation successful!")
@@ -243,6 +315,79 @@ def verify_ECDSA_str(publik_key, signature, string):
         # print("Validation failed!")
         return False
 
+# Function verifies a list of signatures in a pool of processes
+# items: list of tuples (public key, signature, string), as for verify_ECDSA_str()
+# processes: number of worker processes (0 = number of cpu cores)
+# chunk_size: maximum number of signatures a worker gets at once
+# Returns a list of True/False in the same order as the items
+# Worker processes are started once and kept (see get_verify_pool()),
+# if the platform can't start them the signatures are verified one after another
+def verify_ECDSA_batch(items, processes = 0, chunk_size = 64):
+    if(processes <= 0):
+        processes = os.cpu_count() or 1
+    # Workers, which get signatures of this batch
+    workers = min(processes, len(items))
+    if(workers <= 1 or verify_start_method not in mp.get_all_start_methods()):
+        return verify_ECDSA_list(items)
+    else:
+        # Small batches are split evenly, large batches in chunks of chunk_size
+        chunk = max(1, min(chunk_size, -(-len(items) // workers)))
+        return get_verify_pool(processes).starmap(verify_ECDSA_str, items, chunksize=chunk)
+
+# Function verifies several lists of signatures in a pool of processes
+# Each list is verified by one worker at once (e.g. all signatures of a block)
+# groups: list of lists with tuples (public key, signature, string)
+# Generator: yields a list of True/False for each group, in the order of the groups
+# Worker processes are started once and kept (see get_verify_pool()),
+# if the platform can't start them the signatures are verified one after another
+def verify_ECDSA_groups(groups, processes = 0):
+    if(processes <= 0):
+        processes = os.cpu_count() or 1
+    if(processes <= 1 or verify_start_method not in mp.get_all_start_methods()):
+        for items in groups:
+            yield verify_ECDSA_list(items)
+    else:
+        for result in get_verify_pool(processes).imap(verify_ECDSA_list, groups):
+            yield result
+
+# Function returns the pool of worker processes for verifying signatures
+# The pool is created at the first call and used again by the next calls with the same number of processes
+# Small batches use the pool with all processes, so it is not replaced for every block
+def get_verify_pool(processes):
+    global verify_pool, verify_pool_size
+    if(verify_pool is None or verify_pool_size != processes):
+        close_verify_pool()
+        verify_pool = mp.get_context(verify_start_method).Pool(processes)
+        verify_pool_size = processes
+    return verify_pool
+
+# Function sets the start method of the worker processes for verifying signatures
+# "fork" (default): fast start, only safe if the program has no other threads
+# "spawn": new Python processes, safe in programs with threads (e.g. the node in ndm.py)
+def set_verify_start_method(method):
+    global verify_start_method
+    if(method != verify_start_method):
+        close_verify_pool()
+        verify_start_method = method
+
+# Function stops the worker processes for verifying signatures
+# Called at the end of the program, the next batch starts a new pool
+def close_verify_pool():
+    global verify_pool, verify_pool_size
+    if(verify_pool is not None):
+        verify_pool.terminate()
+        verify_pool.join()
+        verify_pool = None
+        verify_pool_size = 0
+
+atexit.register(close_verify_pool)
+
+# Function verifies a list of signatures one after another
+# items: list of tuples (public key, signature, string)
+# Returns a list of True/False in the same order as the items
+def verify_ECDSA_list(items):
+    return [verify_ECDSA_str(*item) for item in items]
+
 # Function recovers the public key from the string and the signature
 # takes the string as a string
 # takes the signature as a base58 encoded string
@@ -302,6 +447,15 @@ def get_dec(no_str):
     else:
         return 0
 
+# Function returns a volume in MiC as integer in milli-MiC (3 decimals, like the volumes in the binary block format)
+def to_milli(volume):
+    return int(round(float(volume) * 1000))
+
+# Function returns the sum of volumes in MiC
+# The volumes are added in milli-MiC and converted once, so no float errors add up (e.g. 53.75000000000001)
+def sum_volumes(volumes):
+    return sum(to_milli(volume) for volume in volumes) / 1000
+
 
 
 
@@ -0,0 +1,102 @@
+###########
+# Modules #
+###########
+
+# os: for creating the index folder and replacing the checkpoint file
+import os
+# exists: check, if file in a directory exists
+# source: https://www.pythontutorial.net/python-basics/python-check-if-file-exists/
+from os.path import exists
+
+#########
+# Class #
+#########
+
+# Checkpoint of the block headers of a validated blockchain
+# Contains the header of every block, the hash of the header
+# and a stamp of the block data (size and modification time of the block file or of the segment file of the block store)
+# At the next start only the blocks with a changed stamp need to be loaded and validated again
+class HeaderCheckpoint():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    def __init__(self, idx_path):
+        self.idx_path = str(idx_path)
+        self.file_path = f"{self.idx_path}/headers.idx"
+        # Block number -> [Timestamp, Previous hash, Tx count, Tx hash, Difficulty, Nonce, Header hash, Stamp, Version]
+        self.headers = {}
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Header checkpoint with {len(self.headers)} block headers"
+        return string
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Method clears the checkpoint
+    def clear(self):
+        self.headers = {}
+
+    # Method adds the header of a block to the checkpoint
+    # stamp: string, which changes when the block data is changed
+    def add_block(self, block, stamp):
+        self.headers[block.number] = [block.timestamp, block.prev_hash, block.tx_count, block.tx_hash, block.difficulty, block.nonce, block.get_header_hash(), stamp, block.version]
+
+    # Method changes the stamp of a block in the checkpoint
+    def set_stamp(self, block_nr, stamp):
+        if(block_nr in self.headers):
+            self.headers[block_nr][7] = stamp
+
+    # Method returns the header of a block, if the stamp of the block data is unchanged
+    # Returns None if the block is not in the checkpoint or the block data was changed
+    def get_header(self, block_nr, stamp):
+        header = self.headers.get(block_nr)
+        if(header is None or header[7] != stamp):
+            return None
+        else:
+            return header
+
+    # Method loads the checkpoint from the index file
+    # Returns False if there is no checkpoint file or if it is corrupted
+    def load(self):
+        self.clear()
+        if not(exists(self.file_path)):
+            return False
+        with open(self.file_path, "r") as handle:
+            lines = handle.read().split("\n")
+        try:
+            # Lines: Block number|Timestamp|Previous hash|Tx count|Tx hash|Difficulty|Nonce|Header hash|Stamp|Version
+            # Checkpoints without the block version contain only blocks of version 1
+            for line in lines:
+                if(line == ""):
+                    continue
+                elem = line.split("|")
+                if(len(elem) == 9):
+                    elem.append("1")
+                if(len(elem) != 10):
+                    self.clear()
+                    return False
+                self.headers[int(elem[0])] = [float(elem[1]), elem[2], int(elem[3]), elem[4], int(elem[5]), int(elem[6]), elem[7], elem[8], int(elem[9])]
+        except ValueError:
+            self.clear()
+            return False
+        return True
+
+    # Method writes the checkpoint to the index file
+    # The file is written to a temporary file first and then replaced,
+    # so an interrupted write doesn't destroy the checkpoint
+    # Every program uses its own temporary file, so programs can save at the same time
+    def save(self):
+        os.makedirs(self.idx_path, exist_ok=True)
+        lines = []
+        for number in sorted(self.headers):
+            header = self.headers[number]
+            lines.append(f"{number}|" + "|".join(str(elem) for elem in header))
+        with open(f"{self.file_path}.{os.getpid()}.tmp", "w") as handle:
+            handle.write("\n".join(lines) + "\n")
+        os.replace(f"{self.file_path}.{os.getpid()}.tmp", self.file_path)
@@ -0,0 +1,88 @@
+###########
+# Modules #
+###########
+
+# os: for opening the lock file
+import os
+# fcntl: file locks on Linux/macOS, msvcrt: file locks on Windows
+# source: https://docs.python.org/3/library/fcntl.html
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+#########
+# Class #
+#########
+
+# Exclusive lock of a file for several programs (processes), which use the same blocks and mempool
+# The lock is held on a separate lock file (e.g. mempool.mem.lock), so the locked file itself can be replaced
+# The lock is released by the operating system, if the program ends
+# Can be acquired several times by the same object (e.g. a method with the lock calls another one with the lock)
+# Usage: with lock: ...
+class FileLock():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    # path: path of the lock file
+    def __init__(self, path):
+        self.path = str(path)
+        # File descriptor of the lock file, None if not locked
+        self.fd = None
+        # Number of acquisitions by this object
+        self.count = 0
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Lock {self.path} ({'locked' if self.count else 'unlocked'})"
+        return string
+
+    # Acquires the lock at the start of a with statement
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    # Releases the lock at the end of a with statement
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Method waits until the lock is free and acquires it
+    def acquire(self):
+        if(self.count == 0):
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if(fcntl is not None):
+                fcntl.flock(self.fd, fcntl.LOCK_EX)
+            elif(msvcrt is not None):
+                # Locks the first byte of the lock file, waits up to 10 s in every try
+                while(True):
+                    try:
+                        msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+        self.count += 1
+
+    # Method releases the lock
+    def release(self):
+        if(self.count == 0):
+            return
+        self.count -= 1
+        if(self.count == 0):
+            if(fcntl is not None):
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            elif(msvcrt is not None):
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+            os.close(self.fd)
+            self.fd = None
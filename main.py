@@ -14,41 +14,42 @@ from wlm import Wallet
 # from trm import Transaction
 # bcm (blockchain module). Own module for blockchain
 from bcm import Blockchain
+# mnm (mining module). Own module for the multi-process nonce search
+from mnm import Miner
+# sgm (segment module). Own module for the block store in segment files
+from sgm import SegmentStore
+# csm (coin selection module). Own module for choosing the inputs of a transaction
+from csm import CoinSelector
+# stm (settings module). Own module for the settings of the program
+import stm
 
 print("\n.::PROJECT MILACOIN::.")
 
-############
-# Settings #
-############
-
-# File path to blocks folder
-block_path = './blocks'
-# File path to mempool
-mem_path = './mem/mempool.mem'
-# File path to login credentials
-cred_path = "./user/credentials.txt"
-# File path to user folder
-user_path = './user'
-# Set mining difficulty (temporary!)
-mining_diff = 6
-# Set mining reward
-mining_reward = 10.000
-# Number of transactions in mempool (excluding coinbase) in order to mine a block
-# 0 means that a block can be mined without any transactions
-min_tx_mine = 0
-
 ###########
 # Objects #
 ###########
 
 # Create list of all Block-objects
-bc = Blockchain(block_path, mem_path, cred_path, user_path)
+bc = Blockchain(stm.block_path, stm.mem_path, stm.cred_path, stm.user_path, stm.idx_path)
+# Mining engine: spreads the nonce search over several processes
+bc.miner = Miner(stm.mining_processes)
+# Signatures of transactions are verified in several processes
+bc.verify_processes = stm.verify_processes
+# Blocks are filled with transactions up to the maximum block size
+bc.max_block_size = stm.max_block_size
+# New blocks are mined with this block version
+bc.block_version = stm.block_version
+# Blocks, which exceed the memory budget, are removed from the cache
+bc.cache_budget = stm.block_cache_size * 1024 * 1024
+# Blocks are read from and written to segment files
+if(stm.block_store == 'segment'):
+    bc.store = SegmentStore(stm.store_path)
 bc.load_bc()
 # Validate blockchain hashes
-# Does not validate transaction signatures!
-bc.validate_bc()  
+# Validates transaction signatures only with deep validation!
+bc.validate_bc(stm.deep_validation)  
 # create empty user object for user login
-user = User(cred_path, user_path)
+user = User(stm.cred_path, stm.user_path)
 
 #############
 # Main Code #
@@ -77,7 +78,8 @@ if(bc.bc_valid):
                     # Get user name and ID
                     user_data = user.get_user_data()
                     # Create a wallet object for the logged in user
-                    wallet = Wallet(user_path, block_path, mem_path, user_data[0], user_data[1])  
+                    wallet = Wallet(stm.user_path, stm.block_path, stm.mem_path, user_data[0], user_data[1])  
+                    wallet.coin_selector = CoinSelector(stm.coin_selection, stm.max_tx_inputs)
                     print("Wallet successfully loaded") 
                     wallet.load_user_utxos(bc)
                     print(f"UTXO set for {user_data[0]} successfully loaded") 
@@ -119,7 +121,7 @@ if(bc.bc_valid):
                 ##### Send Transaction #####  
                 if(menu2 == 1):       
                     print("\n:SEND TRANSACTION:")  
-                    wallet.send_tx(mem_path, block_path, bc)
+                    wallet.send_tx(stm.mem_path, stm.block_path, bc, stm.tx_fee)
                     # Reload user UTXOs
                     wallet.load_user_utxos(bc)
                     # Print new user balance
@@ -135,7 +137,7 @@ if(bc.bc_valid):
                 ##### Mine Next Block #####            
                 elif(menu2 == 3):
                     print("\n:MINE NEXT BLOCK:") 
-                    bc.mine_block(wallet, mining_diff, mining_reward, min_tx_mine) 
+                    bc.mine_block(wallet, stm.mining_diff, stm.mining_reward, stm.min_tx_mine) 
                     # Reload UTXO set of user
                     wallet.load_user_utxos(bc)
                     # Print new balance
@@ -0,0 +1,191 @@
+###########
+# Modules #
+###########
+
+# hashlib: encryption/decryption module
+# source: https://datagy.io/python-sha256/
+import hashlib
+# multiprocessing: spread the nonce search over several processes
+# source: https://docs.python.org/3/library/multiprocessing.html
+import multiprocessing as mp
+# os: for the number of cpu cores and the process ID of a worker
+import os
+# time: for measuring the hash rate of the workers
+import time
+
+#############################
+# Functions for the workers #
+#############################
+
+# Shared value with the lowest nonce found so far (-1 = not found yet)
+# Set by the pool initializer in every worker process
+found_nonce = None
+
+# Pool initializer: makes the shared nonce value available in the worker
+def init_worker(shared_nonce):
+    global found_nonce
+    found_nonce = shared_nonce
+
+# Returns the header string of a block WITHOUT the nonce and NO whitespaces
+# The header hash is the hash of this string with the nonce at the end (see blm.Block.get_header_hash())
+# From block version 2 the version is part of the string, so it cannot be changed without mining the block again
+def get_header_string(number, timestamp, prev_hash, tx_count, tx_hash, difficulty, version = 1):
+    header_string = f"{number}{timestamp}{prev_hash}{tx_count}{tx_hash}{difficulty}"
+    if(str(version) != "1"):
+        header_string += f"v{version}"
+    return header_string
+
+# Returns the mining target for a difficulty (= number of leading zeros in hex format)
+# A hash has enough leading zeros if its raw digest is lower or equal than the target
+# Both are 32 bytes long, so comparing the bytes is the same as comparing the numbers
+def get_target(difficulty):
+    return ((1 << (256 - 4 * difficulty)) - 1).to_bytes(32, 'big')
+
+# Searches the nonces of the range [start, end) for a valid block hash
+# header_string: header string of the block WITHOUT the nonce and NO whitespaces
+# The header string never changes during the search, so it is hashed only once
+# For every nonce the hash state is copied and only the nonce is added ("midstate")
+# Stops early, when another worker already found a lower nonce
+# Returns a tuple with:
+# 0: start of the range (to identify the chunk)
+# 1: nonce or -1 if no nonce was found in the range
+# 2: number of hashes calculated
+# 3: time needed in seconds
+# 4: process ID of the worker
+def search_range(header_string, difficulty, start, end, check_every = 4096):
+    start_time = time.perf_counter()
+    target = get_target(difficulty)
+    midstate = hashlib.sha256(header_string.encode())
+    result = -1
+    hashes = 0
+    for block_start in range(start, end, check_every):
+        # Check from time to time if a lower nonce was already found
+        if(found_nonce is not None):
+            best = found_nonce.value
+            if(best != -1 and best < block_start):
+                break
+        for nonce in range(block_start, min(block_start + check_every, end)):
+            hash_state = midstate.copy()
+            hash_state.update(b"%d" % nonce)
+            if(hash_state.digest() <= target):
+                result = nonce
+                break
+        if(result != -1):
+            hashes += result - block_start + 1
+            # Tell the other workers about the found nonce
+            if(found_nonce is not None):
+                with found_nonce.get_lock():
+                    if(found_nonce.value == -1 or result < found_nonce.value):
+                        found_nonce.value = result
+            break
+        hashes += min(block_start + check_every, end) - block_start
+    return (start, result, hashes, time.perf_counter() - start_time, os.getpid())
+
+# Helper for pool.apply_async: unpacks the argument tuple
+def search_chunk(args):
+    return search_range(*args)
+
+#########
+# Class #
+#########
+
+class Miner():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    # processes: number of worker processes (0 = number of cpu cores)
+    # chunk_size: number of nonces a worker gets at once
+    # start_method: start method of the worker processes
+    # "fork" (default), so the menu loop in main.py is not started again
+    # "spawn" for programs with threads (e.g. the node in ndm.py), where forking is not safe
+    def __init__(self, processes = 0, chunk_size = 50000, start_method = "fork"):
+        if(processes <= 0):
+            processes = os.cpu_count() or 1
+        # If the platform can't start the workers, the nonce search runs in the main process
+        if(start_method not in mp.get_all_start_methods()):
+            processes = 1
+        self.processes = processes
+        self.start_method = start_method
+        self.chunk_size = chunk_size
+        # Hash rate statistics of the last mining process
+        # Dict: process ID -> [hashes, seconds]
+        self.stats = {}
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Miner with {self.processes} process(es), chunk size {self.chunk_size}"
+        return string
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Find nonce for the given mining difficulty
+    # Same result as Blockchain.get_nonce(): the lowest nonce with enough leading zeros
+    # The nonce space is split into chunks, which are processed by a pool of workers
+    # When a nonce is found, workers with higher chunks stop
+    # Chunks below the found nonce are finished, as they could contain a lower nonce
+    def get_nonce(self, number, timestamp, prev_hash, tx_count, tx_hash, difficulty, version = 1):
+        # Create header string of the block WITHOUT the nonce and NO whitespaces
+        header_string = get_header_string(number, timestamp, prev_hash, tx_count, tx_hash, difficulty, version)
+        self.stats = {}
+        # Search in the main process
+        if(self.processes == 1):
+            start = 0
+            while(True):
+                result = search_range(header_string, difficulty, start, start + self.chunk_size)
+                self.add_stats(result)
+                if(result[1] != -1):
+                    return result[1]
+                start += self.chunk_size
+        # Search with a pool of workers
+        ctx = mp.get_context(self.start_method)
+        shared_nonce = ctx.Value('q', -1)
+        pool = ctx.Pool(self.processes, initializer=init_worker, initargs=(shared_nonce,))
+        try:
+            pending = []
+            next_start = 0
+            # Keep every worker busy with two chunks
+            for i in range(self.processes * 2):
+                pending.append(pool.apply_async(search_chunk, ((header_string, difficulty, next_start, next_start + self.chunk_size),)))
+                next_start += self.chunk_size
+            best = -1
+            while(len(pending)):
+                result = pending.pop(0).get()
+                self.add_stats(result)
+                if(result[1] != -1 and (best == -1 or result[1] < best)):
+                    best = result[1]
+                # Only hand out new chunks as long as no nonce was found
+                if(best == -1):
+                    pending.append(pool.apply_async(search_chunk, ((header_string, difficulty, next_start, next_start + self.chunk_size),)))
+                    next_start += self.chunk_size
+            return best
+        finally:
+            # Stop all workers
+            pool.terminate()
+            pool.join()
+
+    # Adds the result of a chunk to the hash rate statistics
+    def add_stats(self, result):
+        if(result[4] not in self.stats):
+            self.stats[result[4]] = [0, 0.0]
+        self.stats[result[4]][0] += result[2]
+        self.stats[result[4]][1] += result[3]
+
+    # Returns a string with the hash rate of each worker of the last mining process
+    def get_stats_string(self):
+        stats_string = ""
+        total = 0
+        worker = 0
+        for pid in self.stats:
+            hashes = self.stats[pid][0]
+            seconds = self.stats[pid][1]
+            rate = hashes / seconds if seconds > 0 else 0
+            total += rate
+            stats_string += f"> Worker {worker} (PID {pid}): {hashes} hashes, {rate:,.0f} hashes/s\n"
+            worker += 1
+        stats_string += f"> Total: {total:,.0f} hashes/s\n"
+        return stats_string
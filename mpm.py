@@ -0,0 +1,235 @@
+###########
+# Modules #
+###########
+
+# os: for checking, if the mempool file was changed
+import os
+# exists: check, if file in a directory exists
+# source: https://www.pythontutorial.net/python-basics/python-check-if-file-exists/
+from os.path import exists
+# trm (transaction module). Own module for handeling transactions
+from trm import Transaction
+# lkm (lock module): Own module for file locks
+from lkm import FileLock
+
+#########
+# Class #
+#########
+
+# Transactions in the mempool file
+# The file is read and parsed only once, then the transactions are kept in memory
+# Transactions sent in this program are written to the file and added to memory at once
+# The file is only parsed again, when it was changed by another program (modification time or size)
+# All writes to the file are done with a file lock, so several programs can use the same mempool
+class Mempool():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    def __init__(self, user_path, mem_path, block_path):
+        self.user_path = user_path
+        self.mem_path = mem_path
+        self.block_path = block_path
+        # All transactions in the mempool file (in order), also corrupted ones
+        self.txs = []
+        # Tx ID -> transaction object (only transactions without errors)
+        self.tx_index = {}
+        # Outpoint (Tx ID, Output index) -> Tx ID of the transaction in mempool, which spends it
+        # If several transactions spend the same output, the first one is kept (first seen)
+        self.spent_index = {}
+        # (modification time, size) of the mempool file, when it was read
+        self.stamp = None
+        # Increased every time the transactions are replaced (not when a transaction is added)
+        # Used by others to check, if the transactions they know are still in mempool
+        self.generation = 0
+        # Transactions, which are added in memory but not written to the file yet (see stage_tx())
+        self.staged = []
+        # Lock of the mempool file for all programs
+        self.lock = FileLock(f"{mem_path}.lock")
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Mempool with {len(self.get_txs())} transactions"
+        return string
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Returns the (modification time, size) of the mempool file
+    # Returns None if the file doesn't exist
+    def get_file_stamp(self):
+        if not(exists(self.mem_path)):
+            return None
+        stat = os.stat(self.mem_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    # Method loads the mempool file again, if it was changed since it was read
+    def refresh(self):
+        stamp = self.get_file_stamp()
+        if(stamp is None or stamp != self.stamp):
+            self.load()
+
+    # Method reads and parses the whole mempool file
+    # Same checks and error messages as Transaction.load_tx_from_mempool(),
+    # but the file is read and split only once
+    def load(self):
+        self.generation += 1
+        self.txs = []
+        self.tx_index = {}
+        self.spent_index = {}
+        # With the lock of the mempool file, so no half written transaction of another program is read
+        with self.lock:
+            self.stamp = self.get_file_stamp()
+            if(self.stamp is None):
+                print("Error: Mempool file not found!")
+                self.staged = []
+                return
+            with open(self.mem_path, "r") as handle:
+                # remove first line = delimiter {tx:}
+                handle.readline()
+                # read the rest of the file as string
+                mem_string = handle.read()
+        # Split Tx, delimiter: {tx:}
+        # An empty file has no transactions, but the staged transactions are kept
+        if(mem_string != ""):
+            for index, tx_item in enumerate(mem_string.strip().split("{tx:}")):
+                tx = Transaction(self.user_path, self.mem_path, self.block_path)
+                tx.parse_tx("mempool", tx_item, index)
+                self.add_to_index(tx)
+        # Transactions, which are not written yet, stay in memory
+        for tx in self.staged:
+            self.add_to_index(tx)
+
+    # Method adds a parsed transaction to the list and the indexes
+    def add_to_index(self, tx):
+        self.txs.append(tx)
+        # If there are no error messages, the transaction is valid in terms of a correct format
+        if not(len(tx.error)):
+            tx.tx_valid = True
+            self.tx_index[tx.tx_id] = tx
+            # inp[0]: Tx ID Output
+            # inp[1]: Index Output (UTXO)
+            for inp in tx.inputs:
+                self.spent_index.setdefault((inp[0], int(inp[1])), tx.tx_id)
+
+    # Returns a list with all transaction objects in mempool
+    def get_txs(self):
+        self.refresh()
+        return self.txs
+
+    # Returns the number of transactions in mempool
+    def get_tx_count(self):
+        return len(self.get_txs())
+
+    # Returns the transaction object with the Tx ID or None if it is not in mempool
+    def get_tx(self, tx_id):
+        self.refresh()
+        return self.tx_index.get(tx_id)
+
+    # Returns the Tx ID of the transaction in mempool, which spends an output
+    # Returns None if the output is not spent in mempool
+    def get_spending_tx(self, tx_id, index):
+        self.refresh()
+        return self.spent_index.get((tx_id, index))
+
+    # Method writes a transaction to the end of the mempool file and adds it to the mempool in memory
+    # fsync: if True, the function returns when the transaction is written to the disk
+    # Returns False if the mempool file doesn't exist
+    def add_tx(self, tx, fsync = False):
+        if(self.stage_tx(tx) is None):
+            print("Transaction failed!")
+            return False
+        self.flush(fsync)
+        print("Transaction successfully written to mempool!")
+        return True
+
+    # Method adds a transaction to the mempool in memory, but doesn't write it to the file yet
+    # So several transactions can be written at once with flush()
+    # Returns the transaction object in mempool or None if the mempool file doesn't exist
+    def stage_tx(self, tx):
+        # Read changes of other programs first, so they are not missed
+        self.refresh()
+        if(self.stamp is None):
+            return None
+        # Parse the transaction string, so the transaction in memory is the same as in the file
+        mem_tx = Transaction(self.user_path, self.mem_path, self.block_path)
+        mem_tx.parse_tx("mempool", tx.get_tx_string()[len("{tx:}"):], len(self.txs))
+        self.add_to_index(mem_tx)
+        self.staged.append(mem_tx)
+        return mem_tx
+
+    # Method removes transactions, which are not written to the file yet, from the mempool in memory
+    def unstage_txs(self, tx_ids):
+        removed = [tx for tx in self.staged if tx.tx_id in tx_ids]
+        for tx in removed:
+            self.staged.remove(tx)
+            self.txs.remove(tx)
+            if(self.tx_index.get(tx.tx_id) is tx):
+                del self.tx_index[tx.tx_id]
+            for inp in tx.inputs:
+                if(self.spent_index.get((inp[0], int(inp[1]))) == tx.tx_id):
+                    del self.spent_index[(inp[0], int(inp[1]))]
+
+    # Method writes all staged transactions to the end of the mempool file at once
+    # fsync: if True, the function returns when the transactions are written to the disk
+    # If another program has changed the file since it was read, the file is read again at the next access
+    # Returns the number of written transactions
+    def flush(self, fsync = False):
+        if not(len(self.staged)):
+            return 0
+        with self.lock:
+            unchanged = (self.get_file_stamp() == self.stamp)
+            with open(self.mem_path, "a") as handle:
+                handle.write("".join(tx.get_tx_string() for tx in self.staged))
+                if(fsync):
+                    handle.flush()
+                    os.fsync(handle.fileno())
+            if(unchanged):
+                self.stamp = self.get_file_stamp()
+        count = len(self.staged)
+        self.staged = []
+        return count
+
+    # Method clears the mempool file and the mempool in memory
+    def clear(self):
+        with self.lock:
+            Transaction.clear_mempool(self.mem_path)
+            self.stamp = self.get_file_stamp()
+        self.generation += 1
+        self.staged = []
+        self.txs = []
+        self.tx_index = {}
+        self.spent_index = {}
+
+    # Method replaces all transactions in mempool with the given transactions
+    # txs: list of transaction objects of this mempool
+    # The file is written to a temporary file first and then replaced,
+    # so an interrupted write doesn't destroy the mempool and other programs never read a half written file
+    def replace_txs(self, txs):
+        with self.lock:
+            with open(f"{self.mem_path}.tmp", "w") as handle:
+                for tx in txs:
+                    handle.write(tx.get_tx_string())
+            os.replace(f"{self.mem_path}.tmp", self.mem_path)
+            self.stamp = self.get_file_stamp()
+        self.generation += 1
+        self.staged = []
+        self.txs = []
+        self.tx_index = {}
+        self.spent_index = {}
+        for tx in txs:
+            self.add_to_index(tx)
+
+    # Method removes transactions from mempool (e.g. the mined and the rejected ones)
+    # tx_ids: set of Tx IDs
+    # The file is read again with the lock, so transactions added by other programs in the meantime are kept
+    # Returns True if the file was changed by another program since it was read
+    def remove_txs(self, tx_ids):
+        with self.lock:
+            changed = (self.get_file_stamp() != self.stamp)
+            self.refresh()
+            self.replace_txs([tx for tx in self.txs if tx.tx_id not in tx_ids])
+        return changed
@@ -0,0 +1,383 @@
+###########
+# Modules #
+###########
+
+# sys: for the exit code
+import sys
+# time: for measuring the run time of the requests
+import time
+# json: requests and responses in JSON-RPC 2.0 format
+# source: https://www.jsonrpc.org/specification
+import json
+# socket: client for calling the node from scripts
+import socket
+# argparse: options of the command line
+# source: https://docs.python.org/3/library/argparse.html
+import argparse
+# asyncio: serves many connections in one process
+# source: https://docs.python.org/3/library/asyncio-stream.html
+import asyncio
+# threading: lock for the blockchain, the block is mined in a thread
+import threading
+# ThreadPoolExecutor: runs the mining and the requests without blocking the event loop
+from concurrent.futures import ThreadPoolExecutor
+# fnc (Module for own functions): start method of the processes for verifying signatures
+import fnc
+# usr (user module): Own module for login/out, session, and user handling
+from usr import User
+# wlm (wallet module). Own module for wallet handling
+from wlm import Wallet
+# bcm (blockchain module). Own module for blockchain
+from bcm import Blockchain
+# mnm (mining module). Own module for the multi-process nonce search
+from mnm import Miner
+# sgm (segment module). Own module for the block store in segment files
+from sgm import SegmentStore
+# csm (coin selection module). Own module for choosing the inputs of a transaction
+from csm import CoinSelector
+# clm (command line module): Own module for the command line, same JSON output
+import clm
+# stm (settings module). Own module for the settings of the program, the same as in main.py
+import stm
+
+# Error codes of JSON-RPC 2.0
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+# Errors of the node (login failed, block not found, ...)
+NODE_ERROR = -32000
+
+#########
+# Class #
+#########
+
+# Node of MilaCoin: keeps the blockchain, the indexes, the mempool and the wallets in memory
+# and answers JSON-RPC 2.0 requests on a local socket (one JSON object per line)
+# Methods:
+# getbalance: {"user", "password"} or {"address"} -> balance and UTXOs
+# sendtx: {"user", "password", "payments": [[address, volume], ...], "fee"} -> status of the transactions
+# getblock: {"number", "tx"} -> block (with transactions if "tx" is not False)
+# gettx: {"tx_id"} -> transaction with block number and confirmations (block None: in mempool)
+# mine: {"user", "password", "difficulty", "reward", "min_tx"} -> header of the new block
+# getmempool: {} -> transactions in mempool with fees
+# stop: {} -> stops the node
+# The block is mined in a thread, the nonce search in the worker processes of the miner
+# The other requests run one after another in a second thread, so the event loop is never blocked
+# All requests use the blockchain with a lock, which is released during the nonce search,
+# so the node answers requests while mining
+# Worker processes (signatures, nonce search) are started with spawn, as forking a program with threads is not safe
+class Node():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    # bc: loaded and validated blockchain object
+    # miner: mining engine (e.g. mnm.Miner with start_method "spawn"), the node is set as miner of the blockchain
+    def __init__(self, bc, miner, host = "127.0.0.1", port = 8332):
+        self.bc = bc
+        self.miner = miner
+        self.bc.miner = self
+        self.host = host
+        self.port = port
+        fnc.set_verify_start_method("spawn")
+        # Lock for all accesses to the blockchain (mining thread and requests)
+        self.bc_lock = threading.Lock()
+        # One block is mined at a time
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        # Thread for the other requests, they wait for the lock there and not in the event loop
+        self.request_executor = ThreadPoolExecutor(max_workers=1)
+        self.mining = False
+        # Wallets of the users, which were used: user name -> wallet object
+        self.wallets = {}
+        self.server = None
+        # Number of answered requests
+        self.requests = 0
+        # Methods: name -> function
+        self.methods = {"getbalance": self.rpc_getbalance, "sendtx": self.rpc_sendtx, "getblock": self.rpc_getblock,
+                        "gettx": self.rpc_gettx, "mine": self.rpc_mine, "getmempool": self.rpc_getmempool, "stop": self.rpc_stop}
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Node on {self.host}:{self.port} with {len(self.bc.blocks)} blocks, {self.requests} requests answered"
+        return string
+
+    ##################
+    # Static methods #
+    ##################
+
+    # Returns a JSON-RPC error response
+    @staticmethod
+    def get_error(request_id, code, message):
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Mining engine of the blockchain (see Blockchain.mine_block())
+    # The lock of the blockchain is released during the nonce search, so requests are answered while mining
+    # Requests in the meantime can change the mempool (sendtx) or load blocks of other programs,
+    # but not the mined block: its header and transactions are fixed before the search
+    # After the search mine_block() checks again, that the block folder still ends with the previous block,
+    # and removes only the transactions of the block and the ones it rejected from mempool
+    # So transactions sent during the search stay in mempool for the next block
+    # The node keeps no state of its own about the search, it relies on these checks of mine_block()
+    def get_nonce(self, number, timestamp, prev_hash, tx_count, tx_hash, difficulty, version = 1):
+        self.bc_lock.release()
+        try:
+            return self.miner.get_nonce(number, timestamp, prev_hash, tx_count, tx_hash, difficulty, version)
+        finally:
+            self.bc_lock.acquire()
+
+    # Returns the hash rate of the workers of the last mining process
+    def get_stats_string(self):
+        return self.miner.get_stats_string()
+
+    # Returns the wallet of a user after the login (see User.login_as())
+    # The wallets stay in memory with their keystore and their scan of the blocks
+    # Returns None if the login fails
+    def get_wallet(self, params):
+        user = User(self.bc.cred_path, self.bc.user_path)
+        if not(user.login_as(str(params.get("user", "")), str(params.get("password", "")))):
+            return None
+        user_data = user.get_user_data()
+        if(user_data[0] not in self.wallets):
+            wallet = Wallet(self.bc.user_path, self.bc.block_path, self.bc.mem_path, user_data[0], user_data[1])
+            wallet.coin_selector = CoinSelector(stm.coin_selection, stm.max_tx_inputs)
+            self.wallets[user_data[0]] = wallet
+        return self.wallets[user_data[0]]
+
+    # Returns balance and UTXOs of a user or an address (only outputs in blocks)
+    def rpc_getbalance(self, params):
+        if("address" in params):
+            utxos = self.bc.utxo_set.get_utxos_for_address(str(params["address"]))
+            utxos = [{"address": utxo[0], "block": utxo[1], "tx_id": utxo[2], "index": int(utxo[3]), "volume": round(utxo[4], 3)} for utxo in utxos]
+            return {"address": params["address"], "balance": fnc.sum_volumes(utxo["volume"] for utxo in utxos), "utxos": utxos}
+        wallet = self.get_wallet(params)
+        if(wallet is None):
+            raise ValueError("Login not successful!")
+        wallet.load_user_utxos(self.bc)
+        return {"user": wallet.user_name, "balance": wallet.get_user_balance(), "utxos": clm.get_utxo_dicts(wallet)}
+
+    # Sends payments of a user (see Wallet.send_batch())
+    def rpc_sendtx(self, params):
+        wallet = self.get_wallet(params)
+        if(wallet is None):
+            raise ValueError("Login not successful!")
+        payments = params.get("payments", [[params.get("address", ""), params.get("volume", 0)]])
+        if not(isinstance(payments, list) and all(isinstance(payment, list) and len(payment) == 2 for payment in payments)):
+            raise TypeError("payments must be a list of [address, volume]")
+        if(clm.get_volume_error(payments) != ""):
+            raise ValueError(clm.get_volume_error(payments))
+        report = wallet.send_batch(self.bc, payments, float(params.get("fee", stm.tx_fee)), bool(params.get("fsync", True)))
+        txs = clm.get_tx_dicts(report)
+        return {"accepted": sum(1 for tx in txs if tx["status"] == "accepted"), "txs": txs}
+
+    # Returns a block of the blockchain
+    def rpc_getblock(self, params):
+        number = int(params["number"])
+        if(number < 0 or number >= len(self.bc.blocks)):
+            raise ValueError(f"Block {number} not found!")
+        return self.bc.blocks[number].get_block_dict(bool(params.get("tx", True)))
+
+    # Returns a transaction in a block (transaction index) or in mempool
+    def rpc_gettx(self, params):
+        tx_id = str(params["tx_id"])
+        tx_index = self.bc.get_tx_index()
+        if(tx_id in tx_index):
+            block_nr, position = tx_index[tx_id]
+            tx_dict = self.bc.blocks[block_nr].tx[position].get_tx_dict()
+            tx_dict["block"] = block_nr
+            tx_dict["confirmations"] = len(self.bc.blocks) - block_nr
+            return tx_dict
+        tx = self.bc.mempool.get_tx(tx_id)
+        if(tx is None):
+            raise ValueError(f"Transaction {tx_id} not found!")
+        tx_dict = tx.get_tx_dict()
+        tx_dict["block"] = None
+        tx_dict["confirmations"] = 0
+        tx_dict["fee"] = self.bc.get_tx_fee(tx)
+        return tx_dict
+
+    # Returns the transactions in mempool
+    def rpc_getmempool(self, params):
+        txs = []
+        for tx in self.bc.get_mempool():
+            tx_dict = tx.get_tx_dict()
+            tx_dict["fee"] = self.bc.get_tx_fee(tx)
+            txs.append(tx_dict)
+        return {"count": len(txs), "txs": txs}
+
+    # Mines the next block for a user (runs in the mining thread)
+    def rpc_mine(self, params):
+        wallet = self.get_wallet(params)
+        if(wallet is None):
+            raise ValueError("Login not successful!")
+        block_count = len(self.bc.blocks)
+        self.bc.mine_block(wallet, int(params.get("difficulty", stm.mining_diff)), float(params.get("reward", stm.mining_reward)), int(params.get("min_tx", stm.min_tx_mine)))
+        if(len(self.bc.blocks) == block_count):
+            raise ValueError("Block not mined!")
+        block = self.bc.blocks[-1].get_block_dict(False)
+        block["tx_ids"] = [tx.tx_id for tx in self.bc.blocks[-1].tx]
+        return block
+
+    # Stops the node after the answer
+    def rpc_stop(self, params):
+        asyncio.get_running_loop().call_soon(self.server.close)
+        return "Node stopped"
+
+    # Runs a function of the blockchain with the lock
+    def run_locked(self, method, params):
+        with self.bc_lock:
+            return self.methods[method](params)
+
+    # Runs a request in the request thread, the event loop keeps serving the other connections
+    async def run_request(self, method, params):
+        return await asyncio.get_running_loop().run_in_executor(self.request_executor, self.run_locked, method, params)
+
+    # Runs the mining in the mining thread
+    # Only one block is mined at a time
+    async def run_mining(self, params):
+        if(self.mining):
+            raise ValueError("A block is already being mined!")
+        self.mining = True
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self.run_locked, "mine", params)
+        finally:
+            self.mining = False
+
+    # Returns the response to a request (dict) or None for a notification (request without ID)
+    async def process_request(self, request):
+        if not(isinstance(request, dict)) or request.get("jsonrpc") != "2.0" or not(isinstance(request.get("method"), str)):
+            return self.get_error(request.get("id") if isinstance(request, dict) else None, INVALID_REQUEST, "Invalid request")
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params", {})
+        if(method not in self.methods):
+            response = self.get_error(request_id, METHOD_NOT_FOUND, f"Method {method} not found")
+        elif not(isinstance(params, dict)):
+            response = self.get_error(request_id, INVALID_PARAMS, "Params must be an object")
+        else:
+            try:
+                if(method == "mine"):
+                    result = await self.run_mining(params)
+                elif(method == "stop"):
+                    result = self.rpc_stop(params)
+                else:
+                    result = await self.run_request(method, params)
+                response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+            except (KeyError, TypeError) as err:
+                response = self.get_error(request_id, INVALID_PARAMS, f"Invalid params: {err}")
+            except ValueError as err:
+                response = self.get_error(request_id, NODE_ERROR, str(err))
+        self.requests += 1
+        if("id" not in request):
+            return None
+        return response
+
+    # Answers the requests of a connection, one JSON object per line
+    # A line with a JSON array is a batch of requests
+    async def handle_client(self, reader, writer):
+        try:
+            while(True):
+                line = await reader.readline()
+                if not(line):
+                    break
+                if not(line.strip()):
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = self.get_error(None, PARSE_ERROR, "Parse error")
+                else:
+                    if(isinstance(request, list) and len(request)):
+                        response = [res for res in [await self.process_request(req) for req in request] if res is not None]
+                    else:
+                        response = await self.process_request(request)
+                if(response is not None and response != []):
+                    writer.write((json.dumps(response) + "\n").encode())
+                    await writer.drain()
+        # Connection closed by the client or by stopping the node
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    # Method starts the server and answers requests until the node is stopped
+    async def serve(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        # Port 0: the port is chosen by the system
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"Node listening on {self.host}:{self.port}")
+        try:
+            await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.executor.shutdown(wait=True)
+            self.request_executor.shutdown(wait=True)
+            print(f"Node stopped after {self.requests} requests")
+
+##########
+# Client #
+##########
+
+# Sends a request to a node and returns the result
+# Raises a RuntimeError with the error message of the node
+def call(method, params = None, host = "127.0.0.1", port = 8332, timeout = None):
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}
+        sock.sendall((json.dumps(request) + "\n").encode())
+        with sock.makefile("r") as handle:
+            response = json.loads(handle.readline())
+    if("error" in response):
+        raise RuntimeError(response["error"]["message"])
+    return response["result"]
+
+#######
+# CLI #
+#######
+
+# Usage:
+# python ndm.py [--port 8332] [--processes 0]: starts a node for the blocks of the settings in stm.py
+# python ndm.py --call <method> [<params as JSON>]: sends a request to a running node
+if(__name__ == "__main__"):
+    parser = argparse.ArgumentParser(prog="ndm.py", description="MilaCoin node (JSON-RPC 2.0 on a local socket)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8332)
+    parser.add_argument("--blocks", default=stm.block_path, help="block folder")
+    parser.add_argument("--mem", default=stm.mem_path, help="mempool file")
+    parser.add_argument("--cred", default=stm.cred_path, help="file with the login credentials")
+    parser.add_argument("--users", default=stm.user_path, help="user folder (wallets)")
+    parser.add_argument("--idx", default=stm.idx_path, help="index folder")
+    parser.add_argument("--store", default=None, help="folder of a block store (segment files) instead of the block folder")
+    parser.add_argument("--processes", type=int, default=stm.mining_processes, help="mining processes (0 = number of cpu cores)")
+    parser.add_argument("--call", nargs="+", metavar=("METHOD", "PARAMS"), help="send a request to a running node")
+    args = parser.parse_args()
+    if(args.call is not None):
+        try:
+            result = call(args.call[0], json.loads(args.call[1]) if len(args.call) > 1 else {}, args.host, args.port)
+        except (RuntimeError, ConnectionError) as err:
+            print(f"Error: {err}")
+            sys.exit(1)
+        print(json.dumps(result, indent=2))
+        sys.exit(0)
+    start = time.perf_counter()
+    bc = Blockchain(args.blocks, args.mem, args.cred, args.users, args.idx)
+    bc.cache_budget = stm.block_cache_size * 1024 * 1024
+    bc.max_block_size = stm.max_block_size
+    bc.block_version = stm.block_version
+    if(args.store is not None):
+        bc.store = SegmentStore(args.store)
+    bc.load_bc()
+    if(bc.bc_valid):
+        bc.validate_bc()
+    if not(bc.bc_valid):
+        print("Blockchain not valid: node not started!")
+        sys.exit(1)
+    print(f"Blockchain loaded in {time.perf_counter() - start:.3f} s")
+    node = Node(bc, Miner(args.processes, start_method="spawn"), args.host, args.port)
+    asyncio.run(node.serve())
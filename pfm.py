@@ -0,0 +1,267 @@
+###########
+# Modules #
+###########
+
+# exists: check, if file in a directory exists
+# source: https://www.pythontutorial.net/python-basics/python-check-if-file-exists/
+from os.path import exists
+# sys: for reading the command line arguments
+import sys
+# time: for measuring the time of the verification
+import time
+# json: proofs are written and read as JSON
+# source: https://docs.python.org/3/library/json.html
+import json
+# hashlib: encryption/decryption module
+# source: https://datagy.io/python-sha256/
+import hashlib
+# fnc (Module for own functions): Own set of functions
+import fnc
+# blm (block module): Own module for block class
+import blm
+# sgm (segment module): Own module for the block store in segment files
+from sgm import SegmentStore
+# txm (transaction index module): Own module for the index of the transactions in the blocks
+from txm import TxIndex
+# lkm (lock module): Own module for file locks
+from lkm import FileLock
+# stm (settings module): Own module for the settings of the program (mining difficulty)
+import stm
+
+#########
+# Class #
+#########
+
+# Inclusion proofs of transactions for light clients
+# The transaction index of the blockchain (see txm.py) contains the block number and the position in the block
+# of every transaction, it is shared with the blockchain (bcm.py) in the index folder
+# A proof is created from the one block with the transaction, no other block is parsed
+# The proof can be verified only with the block headers (see verify_tx_proof())
+class ProofIndex():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    # block_path: folder with the block files or the segment files of a block store
+    def __init__(self, block_path, idx_path):
+        self.block_path = str(block_path)
+        self.idx_path = str(idx_path)
+        # A folder with an index file of a block store is read as block store
+        if(exists(f"{self.block_path}/blocks.idx")):
+            self.store = SegmentStore(self.block_path)
+        else:
+            self.store = None
+        # Transaction index: Tx ID -> (block number, position of the transaction in the block)
+        self.index = TxIndex(self.idx_path)
+        # Lock of the blocks, the same as in the blockchain (see bcm.Blockchain.get_block_lock())
+        self.lock = FileLock(f"{self.block_path}/blocks.lock")
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Proof index with {len(self.index.txs)} transactions up to block {self.index.height}"
+        return string
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Returns the number of the highest block
+    # If there is no block yet the function will return -1
+    def get_max_block(self):
+        if(self.store is None):
+            return blm.Block.get_max_block(self.block_path)
+        else:
+            return self.store.get_max_block()
+
+    # Returns a block object of the block folder or the block store
+    # load_tx: if False, only the block header is loaded
+    # Returns None if the block cannot be loaded
+    def load_block(self, block_nr, load_tx = True):
+        bl = blm.Block(self.block_path, "", "")
+        if(self.store is None):
+            bl.load_block(block_nr, load_tx)
+        elif(load_tx):
+            self.store.load_block(block_nr, bl)
+        else:
+            self.store.load_header(block_nr, bl)
+        if not(bl.block_valid):
+            print(f"Error: Block {block_nr} cannot be loaded: {', '.join(bl.error)}")
+            return None
+        return bl
+
+    # Method brings the index up to date with the blocks
+    # The index file is loaded again at every call, as other programs can add blocks
+    # If its highest block is not part of the blocks anymore, the index is built again
+    # Returns False if a block cannot be loaded
+    def update(self):
+        with self.lock:
+            self.index.load()
+            max_block = self.get_max_block()
+            # Check if the stored index belongs to these blocks
+            if(self.index.height >= 0):
+                tip = self.load_block(self.index.height, False) if(self.index.height <= max_block) else None
+                if(tip is None or tip.get_header_hash() != self.index.tip_hash):
+                    self.index.clear()
+            for block_nr in range(self.index.height + 1, max_block + 1):
+                bl = self.load_block(block_nr)
+                if(bl is None):
+                    return False
+                self.index.add_block(bl)
+            self.index.save()
+        return True
+
+    # Returns the inclusion proof of a transaction as dict:
+    # tx_id: Tx ID
+    # block: block number
+    # position: position of the transaction in the block
+    # header: block header (first line of the block file)
+    # proof: Merkle proof, list of [side, hash] (block version 2, see blm.Block.get_merkle_proof())
+    # tx_ids: all Tx IDs of the block (block version 1, the transaction hash is the hash of all Tx IDs)
+    # Returns None if the transaction is not in a block
+    def get_tx_proof(self, tx_id):
+        if not(self.update()):
+            return None
+        if(self.index.get_tx(tx_id) is None):
+            return None
+        block_nr, position = self.index.get_tx(tx_id)
+        # Only the block with the transaction is loaded
+        bl = self.load_block(block_nr)
+        if(bl is None or position >= len(bl.tx) or bl.tx[position].tx_id != tx_id):
+            return None
+        proof = {"tx_id": tx_id, "block": block_nr, "position": position, "header": bl.get_header_string()}
+        if(bl.version >= blm.MERKLE_VERSION):
+            proof["proof"] = bl.get_merkle_proof(position)
+        else:
+            proof["tx_ids"] = [tx.tx_id for tx in bl.tx]
+        return proof
+
+    # Returns a list with the headers of all blocks (first line of the block files)
+    # Only the block headers are loaded
+    def get_headers(self):
+        headers = []
+        for block_nr in range(self.get_max_block() + 1):
+            bl = self.load_block(block_nr, False)
+            if(bl is None):
+                return None
+            headers.append(bl.get_header_string())
+        return headers
+
+################
+# Light client #
+################
+
+# Functions for verifying proofs with the block headers only
+
+# Returns a block header split into its elements
+# Returns None if the header is corrupted
+def parse_header(header):
+    header_list = [elem.strip() for elem in header.strip().split("|")]
+    if(len(header_list) not in (7, 8)):
+        return None
+    if not(fnc.check_int(header_list[0]) and fnc.check_float(header_list[1]) and fnc.check_prk_hash(header_list[2])):
+        return None
+    if not(fnc.check_int(header_list[3]) and fnc.check_prk_hash(header_list[4]) and fnc.check_int(header_list[5]) and fnc.check_int(header_list[6])):
+        return None
+    if(len(header_list) == 8 and not(fnc.check_int(header_list[7]) and int(header_list[7]) in blm.BLOCK_VERSIONS[1:])):
+        return None
+    return header_list
+
+# Method checks a chain of block headers:
+# The block numbers start at 0, every header contains the hash of the previous header
+# and every header hash has as many leading zeros as the mining difficulty (proof of work)
+# The difficulty in a header must be at least min_difficulty, otherwise a chain without proof of work
+# (difficulty 0) would be accepted
+# Returns a list with the hashes of the headers or None if the header chain is not valid
+def verify_header_chain(headers, min_difficulty = stm.mining_diff):
+    hashes = []
+    prev_hash = blm.Block.get_genesis_hash()
+    for block_nr, header in enumerate(headers):
+        header_list = parse_header(header)
+        if(header_list is None or int(header_list[0]) != block_nr):
+            print(f"Error: Header of block {block_nr} corrupted!")
+            return None
+        if(header_list[2] != prev_hash):
+            print(f"Error: Previous hash in header of block {block_nr} does not match block {block_nr - 1}!")
+            return None
+        if(int(header_list[5]) < min_difficulty):
+            print(f"Error: Mining difficulty of block {block_nr} is lower than {min_difficulty}!")
+            return None
+        prev_hash = blm.Block.get_header_list_hash(header_list)
+        if(prev_hash[0:int(header_list[5])] != '0' * int(header_list[5])):
+            print(f"Error: Hash of block {block_nr} does not match its mining difficulty!")
+            return None
+        hashes.append(prev_hash)
+    return hashes
+
+# Method checks an inclusion proof of a transaction (see ProofIndex.get_tx_proof())
+# headers: list of the block headers, hashes: hashes of the header chain (see verify_header_chain())
+# Returns the number of confirmations (blocks from the block with the transaction to the last block)
+# or 0 if the proof is not valid
+def verify_tx_proof(proof, headers, hashes):
+    try:
+        block_nr = int(proof["block"])
+        position = int(proof["position"])
+        header_list = parse_header(proof["header"])
+    except (KeyError, ValueError, TypeError):
+        return 0
+    # The header in the proof must be the header in the header chain
+    if(header_list is None or block_nr < 0 or block_nr >= len(hashes) or blm.Block.get_header_list_hash(header_list) != hashes[block_nr]):
+        return 0
+    tx_hash = header_list[4]
+    if(len(header_list) == 8):
+        # Block version 2: Merkle proof
+        if not(blm.Block.verify_merkle_proof(proof["tx_id"], proof.get("proof", []), tx_hash)):
+            return 0
+    else:
+        # Block version 1: all Tx IDs of the block
+        tx_ids = proof.get("tx_ids", [])
+        if(position >= len(tx_ids) or tx_ids[position] != proof["tx_id"] or len(tx_ids) != int(header_list[3])):
+            return 0
+        if(hashlib.sha256("".join(str(tx_id) for tx_id in tx_ids).encode()).hexdigest() != tx_hash):
+            return 0
+    return len(hashes) - block_nr
+
+#######
+# CLI #
+#######
+
+# Usage:
+# python pfm.py prove <Tx ID> [block folder] [index folder]: prints the inclusion proof as JSON
+# python pfm.py headers <headers file> [block folder]: writes the block headers to a file for light clients
+# python pfm.py verify <proof file> <headers file> [min difficulty]: checks a proof only with the block headers
+# (default minimum difficulty of the blocks: mining difficulty of the settings)
+# The block folder can also be the folder of a block store (see sgm.py)
+if(__name__ == "__main__"):
+    if(len(sys.argv) >= 3 and sys.argv[1] == "prove"):
+        index = ProofIndex(sys.argv[3] if len(sys.argv) > 3 else "./blocks", sys.argv[4] if len(sys.argv) > 4 else "./idx")
+        proof = index.get_tx_proof(sys.argv[2])
+        if(proof is None):
+            print(f"Transaction {sys.argv[2]} not found in a block!")
+        else:
+            print(json.dumps(proof, indent=2))
+    elif(len(sys.argv) >= 3 and sys.argv[1] == "headers"):
+        headers = ProofIndex(sys.argv[3] if len(sys.argv) > 3 else "./blocks", "").get_headers()
+        if(headers is not None):
+            with open(sys.argv[2], "w") as handle:
+                handle.write("\n".join(headers) + "\n")
+            print(f"{len(headers)} block headers written to {sys.argv[2]}")
+    elif(len(sys.argv) in (4, 5) and sys.argv[1] == "verify" and (len(sys.argv) == 4 or fnc.check_int(sys.argv[4]))):
+        start = time.perf_counter()
+        with open(sys.argv[2], "r") as handle:
+            proof = json.load(handle)
+        with open(sys.argv[3], "r") as handle:
+            headers = [line for line in handle.read().split("\n") if line.strip() != ""]
+        hashes = verify_header_chain(headers, int(sys.argv[4]) if len(sys.argv) == 5 else stm.mining_diff)
+        confirmations = 0 if hashes is None else verify_tx_proof(proof, headers, hashes)
+        time_verify = time.perf_counter() - start
+        if(confirmations):
+            print(f"Transaction {proof['tx_id']} is in block {proof['block']} ({confirmations} confirmations)")
+        else:
+            print("Proof NOT valid!")
+        print(f"Verified in {time_verify * 1000:.3f} ms")
+    else:
+        print("Usage: python pfm.py prove <Tx ID> [block folder] [index folder]")
+        print("       python pfm.py headers <headers file> [block folder]")
+        print("       python pfm.py verify <proof file> <headers file> [min difficulty]")
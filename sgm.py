@@ -0,0 +1,220 @@
+###########
+# Modules #
+###########
+
+# os: for creating the store folder and the size of the index file
+import os
+# exists: check, if file in a directory exists
+# source: https://www.pythontutorial.net/python-basics/python-check-if-file-exists/
+from os.path import exists
+# mmap: read blocks from the segment files without loading the whole file
+# source: https://docs.python.org/3/library/mmap.html
+import mmap
+# struct: packing numbers into bytes for the index file
+# source: https://docs.python.org/3/library/struct.html
+import struct
+# sys: for reading the command line arguments of the block import
+import sys
+# blm (block module): Own module for block class
+import blm
+
+# Index entry for each block: Segment number (4 bytes), Offset (8 bytes), Length (4 bytes)
+# The entry of block n is at position n * INDEX_SIZE in the index file
+INDEX_ENTRY = ">IQI"
+INDEX_SIZE = struct.calcsize(INDEX_ENTRY)
+
+#########
+# Class #
+#########
+
+# Append-only block store
+# All blocks are written in the binary block format (see blm.py) one after another
+# into segment files (blk00000.dat, blk00001.dat, ...)
+# A new segment file is started when the current one exceeds segment_size
+# The index file (blocks.idx) contains a fixed-width entry for every block,
+# so the position of a block and the highest block number can be read without scanning
+class SegmentStore():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    def __init__(self, store_path, segment_size = 128 * 1024 * 1024):
+        self.store_path = str(store_path)
+        self.index_path = f"{self.store_path}/blocks.idx"
+        self.segment_size = segment_size
+        # Memory maps of the segment files: segment number -> mmap
+        self.maps = {}
+        os.makedirs(self.store_path, exist_ok=True)
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Segment store in {self.store_path} with {self.get_max_block() + 1} blocks"
+        return string
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Returns the file path of a segment file
+    def get_segment_path(self, segment):
+        return f"{self.store_path}/blk{segment:05d}.dat"
+
+    # Returns the number of the highest block in the store
+    # If there is no block yet the function will return -1
+    # Read from the size of the index file
+    def get_max_block(self):
+        if not(exists(self.index_path)):
+            return -1
+        else:
+            return os.path.getsize(self.index_path) // INDEX_SIZE - 1
+
+    # Returns the index entry of a block: (segment, offset, length)
+    # Returns None if the block is not in the store
+    def get_index_entry(self, block_nr):
+        if(block_nr < 0 or block_nr > self.get_max_block()):
+            return None
+        with open(self.index_path, "rb") as handle:
+            handle.seek(block_nr * INDEX_SIZE)
+            return struct.unpack(INDEX_ENTRY, handle.read(INDEX_SIZE))
+
+    # Returns a stamp of a stored block, which changes when the block data is changed:
+    # index entry and size and modification time of the segment file
+    # So a block rewritten in its segment file is noticed, even if the index is unchanged
+    # Appending a block changes the stamp of all blocks in the same segment file
+    # Returns "" if the block is not in the store
+    def get_block_stamp(self, block_nr):
+        entry = self.get_index_entry(block_nr)
+        if(entry is None or not(exists(self.get_segment_path(entry[0])))):
+            return ""
+        stat = os.stat(self.get_segment_path(entry[0]))
+        return f"{entry[0]}:{entry[1]}:{entry[2]}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    # Returns the data of a block from the memory mapped segment file
+    # Only the pages of the segment file, which are accessed, are read from disk
+    # The data is copied out of the memory map (bytes, not a memoryview), so no reference to the map is left
+    # and it can be closed, when the segment file has grown (see append_block())
+    # Returns None if the block is not in the store
+    def get_block_data(self, block_nr):
+        entry = self.get_index_entry(block_nr)
+        if(entry is None):
+            return None
+        segment, offset, length = entry
+        # Map the segment file again, if it has grown since it was mapped
+        if(segment not in self.maps or offset + length > len(self.maps[segment])):
+            self.close_segment(segment)
+            with open(self.get_segment_path(segment), "rb") as handle:
+                self.maps[segment] = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.maps[segment][offset:offset + length]
+
+    # Method closes the memory map of a segment file
+    def close_segment(self, segment):
+        if(segment in self.maps):
+            self.maps.pop(segment).close()
+
+    # Method closes all memory maps
+    def close(self):
+        for segment in list(self.maps):
+            self.close_segment(segment)
+
+    # Method loads a block from the store into a block object
+    # Returns False if the block is not in the store or corrupted
+    def load_block(self, block_nr, block):
+        data = self.get_block_data(block_nr)
+        if(data is None):
+            block.error.append(f"Block {block_nr} not found in block store!")
+            block.block_valid = False
+            return False
+        else:
+            return block.load_block_bytes(block_nr, data)
+
+    # Method loads only the header of a block from the store into a block object
+    # The transactions are loaded on first access
+    # Returns False if the block is not in the store or the header is corrupted
+    def load_header(self, block_nr, block):
+        data = self.get_block_data(block_nr)
+        if(data is None):
+            block.error.append(f"Block {block_nr} not found in block store!")
+            block.block_valid = False
+            return False
+        elif not(block.load_header_bytes(block_nr, data[0:5 + blm.BIN_HEADER_SIZE])):
+            return False
+        else:
+            block.block_valid = True
+            block.tx = None
+            return True
+
+    # Returns the hash of the block header of a block in the store
+    # Returns False if the block is not in the store or the header is corrupted
+    def get_block_header_hash(self, block_nr):
+        bl = blm.Block("", "", "")
+        if not(self.load_header(block_nr, bl)):
+            return False
+        else:
+            return bl.get_header_hash()
+
+    # Method appends a block object to the store
+    # The block number must be the next number after the highest block in the store
+    # The block is written first, then the index entry
+    # Returns False if the block number is wrong
+    def append_block(self, block):
+        max_block = self.get_max_block()
+        if(block.number != max_block + 1):
+            print(f"Error: Block {block.number} cannot be added to the block store after block {max_block}!")
+            return False
+        data = block.get_block_bytes()
+        # Segment of the last block, start a new segment if it is full
+        if(max_block < 0):
+            segment = 0
+        else:
+            segment = self.get_index_entry(max_block)[0]
+        segment_path = self.get_segment_path(segment)
+        if(exists(segment_path) and os.path.getsize(segment_path) + len(data) > self.segment_size and os.path.getsize(segment_path) > 0):
+            segment += 1
+            segment_path = self.get_segment_path(segment)
+        # The memory map of the segment is not valid anymore
+        self.close_segment(segment)
+        with open(segment_path, "ab") as handle:
+            offset = handle.tell()
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        with open(self.index_path, "ab") as handle:
+            handle.write(struct.pack(INDEX_ENTRY, segment, offset, len(data)))
+        return True
+
+    # Method imports all blocks from a folder with text block files (.bl) into the store
+    # Only possible if the store is empty
+    # Returns True if all blocks were imported
+    def import_blocks(self, block_path):
+        if(self.get_max_block() != -1):
+            print(f"Error: Block store in {self.store_path} is not empty!")
+            return False
+        max_block = blm.Block.get_max_block(block_path)
+        if(max_block < 0):
+            print(f"No block files in folder {block_path}!")
+            return False
+        for block_nr in range(max_block + 1):
+            bl = blm.Block(block_path, "", "")
+            bl.load_block(block_nr)
+            if not(bl.block_valid):
+                print(f"Error: Block {block_nr} cannot be loaded: {', '.join(bl.error)}")
+                return False
+            self.append_block(bl)
+            print(f"Block {block_nr} of {max_block} imported...")
+        print(f"{max_block + 1} blocks imported into {self.store_path}")
+        return True
+
+################
+# Block import #
+################
+
+# Imports the text block files of a folder into a segment store
+# Usage: python sgm.py <block folder> <store folder>
+# Example: python sgm.py ./blocks ./chain
+if(__name__ == "__main__"):
+    if(len(sys.argv) != 3):
+        print("Usage: python sgm.py <block folder> <store folder>")
+    else:
+        SegmentStore(sys.argv[2]).import_blocks(sys.argv[1])
@@ -0,0 +1,50 @@
+############
+# Settings #
+############
+
+# Settings of MilaCoin, shared by the menus (main.py), the command line (clm.py) and the node (ndm.py)
+# The command line and the node can change the paths and the mining settings with options
+
+# File path to blocks folder
+block_path = './blocks'
+# File path to mempool
+mem_path = './mem/mempool.mem'
+# File path to login credentials
+cred_path = "./user/credentials.txt"
+# File path to user folder
+user_path = './user'
+# File path to index folder (UTXO set, ...)
+idx_path = './idx'
+# Storage of the blocks: 'text' = one block file per block in block_path
+# 'segment' = append-only segment files in store_path (import with: python sgm.py ./blocks ./chain)
+block_store = 'text'
+# File path to the segment files of the block store
+store_path = './chain'
+# Memory budget for the transactions of the blocks in MB (size of the block data)
+# Only the block headers are kept in memory, the transactions are loaded when needed
+block_cache_size = 64
+# Set mining difficulty (temporary!)
+mining_diff = 6
+# Number of processes for mining (0 = number of cpu cores)
+mining_processes = 0
+# Number of processes for verifying signatures (0 = number of cpu cores)
+verify_processes = 0
+# Set mining reward
+mining_reward = 10.000
+# Fee for sent transactions, paid to the miner of the block
+tx_fee = 0.000
+# Coin selection for the inputs of sent transactions:
+# 'bnb' = exact match without change if possible, else largest first
+# 'largest' = largest UTXOs first, 'consolidate' = also merge small UTXOs, 'order' = oldest first
+coin_selection = 'bnb'
+# Maximum number of inputs of a sent transaction
+max_tx_inputs = 50
+# Version of new blocks: 1 = hash of all transaction IDs, 2 = Merkle tree (inclusion proofs possible)
+block_version = 2
+# Maximum size of a block in bytes, transactions with the highest fee per byte are chosen first
+max_block_size = 1000000
+# Deep validation at program start: validates inputs and signatures of all transactions
+deep_validation = False
+# Number of transactions in mempool (excluding coinbase) in order to mine a block
+# 0 means that a block can be mined without any transactions
+min_tx_mine = 0
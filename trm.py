@@ -11,6 +11,11 @@ from datetime import datetime
 # exists: check, if file in a directory exists
 # source: https://www.pythontutorial.net/python-basics/python-check-if-file-exists/
 from os.path import exists
+# struct: packing numbers into bytes for the binary block format
+# source: https://docs.python.org/3/library/struct.html
+import struct
+# Base58 encoding to shorten numbers
+import base58
 # fnc (Module for own functions): Own set of functions
 import fnc
 # usr (user module): Own module for login/out, session, and user handling
@@ -142,8 +147,67 @@ class Transaction():
     @staticmethod
     def clear_mempool(mem_path):
         with open(mem_path, 'w'):
-            pass  
-    
+            pass
+
+    # Generator: loads all transactions of a block in one pass
+    # Same checks and error messages as load_tx_from_block(), but the block file is read
+    # and split only once instead of once per transaction
+    # block_string: content of the block file, if it was already read by the caller
+    # Yields a transaction object for each transaction in the block (in order)
+    # If the block header is corrupted, one transaction object with the error is yielded
+    # If the number of transactions doesn't match, each transaction object contains the error
+    @staticmethod
+    def load_txs_from_block(user_path, mem_path, block_path, block_number, block_string = None):
+        # Read the block file if its content is not given
+        if(block_string is None):
+            # Check, if Block file exists
+            if not(blm.Block.check_block_file(block_path, block_number)):
+                tx = Transaction(user_path, mem_path, block_path)
+                tx.error.append(f"Block file for block {block_number} not found!")
+                yield tx
+                return
+            with open(f"{block_path}/{block_number}.bl", "r") as handle:
+                block_string = handle.read()
+        # Header line = first line of a block file, second line = first tx delimiter
+        block_lines = block_string.split("\n", 2)
+        bl_header_line = block_lines[0]
+        tx_string = block_lines[2] if len(block_lines) > 2 else ""
+        ### Block header ###
+        bl_header = bl_header_line.strip().split("|")
+        # if header list does not contain 7 elements (8 with block version)
+        if(len(bl_header) not in (7, 8)):
+            tx = Transaction(user_path, mem_path, block_path)
+            tx.error.append(f"Header of block {block_number} corrupted!")
+            yield tx
+            return
+        # Get the number of transactions from the block header
+        # and check if it is an integer number
+        if not(fnc.check_int(bl_header[3].strip())):
+            tx = Transaction(user_path, mem_path, block_path)
+            tx.error.append(f"Number of transactions in header of block {block_number} corrupted!")
+            yield tx
+            return
+        tx_count_header = int(bl_header[3].strip())
+        # Split transactions ONCE, delimiter: {tx:}
+        tx_list = tx_string.strip().split("{tx:}")
+        tx_count_file = len(tx_list)
+        # If the number of transactions in the header and in the file are not the same
+        if(tx_count_header != tx_count_file):
+            for index in range(tx_count_header):
+                tx = Transaction(user_path, mem_path, block_path)
+                tx.error.append(f"Transaction count in block {block_number} header ({tx_count_header}) does not match the number of transactions in the block {block_number} file ({tx_count_file})!")
+                yield tx
+            return
+        # Load transactions into objects
+        path = "block " + str(block_number)
+        for index in range(tx_count_header):
+            tx = Transaction(user_path, mem_path, block_path)
+            tx.parse_tx(path, tx_list[index], index, block_number)
+            # If there are no error messages, the transaction is valid in terms of a correct format
+            if not(len(tx.error)):
+                tx.tx_valid = True
+            yield tx
+
     ####################
     # Instance Methods #
     ####################
@@ -207,6 +271,71 @@ class Transaction():
             tx_string += f"{out[0]}|{out[1]}|{out[2]:5.3f}\n"
         return tx_string 
 
+    # Method returns the transaction as dict (e.g. for JSON output)
+    def get_tx_dict(self):
+        tx_dict = {"tx_id": self.tx_id, "timestamp": self.timestamp, "input_count": self.input_count, "output_count": self.output_count}
+        # inp[0]: Tx ID Output, inp[1]: Index Output (UTXO), inp[2]: Public key, inp[3]: Signature
+        tx_dict["inputs"] = [{"tx_id": inp[0], "index": int(inp[1]), "public_key": inp[2], "signature": inp[3]} for inp in self.inputs]
+        # out[0]: Index Output, out[1]: Address, out[2]: Volume
+        tx_dict["outputs"] = [{"index": int(out[0]), "address": out[1], "volume": round(float(out[2]), 3)} for out in self.outputs]
+        return tx_dict
+
+    # Method returns the transaction in the binary block format (bytes)
+    # The transaction data is prefixed with its length (4 bytes), so it can be skipped
+    # Transaction data (numbers in big-endian byte order):
+    # Tx ID (32 bytes), Timestamp (8 bytes float), Input count (4 bytes), Output count (4 bytes)
+    # Inputs: Tx ID Output (32 bytes), Index Output (4 bytes), Public key (64 bytes), Signature (64 bytes)
+    # Outputs: Index Output (4 bytes), Address (20 bytes), Volume in milli-MiC (8 bytes integer)
+    # Hashes, keys, signatures and addresses are stored as raw bytes instead of hex/base58 strings
+    def get_tx_bytes(self):
+        data = struct.pack(">32sdII", bytes.fromhex(self.tx_id), self.timestamp, self.input_count, self.output_count)
+        for inp in self.inputs:
+            data += struct.pack(">32sI64s64s", bytes.fromhex(inp[0]), inp[1], base58.b58decode(inp[2]), base58.b58decode(inp[3]))
+        for out in self.outputs:
+            data += struct.pack(">I20sq", out[0], base58.b58decode(out[1]), round(out[2] * 1000))
+        return struct.pack(">I", len(data)) + data
+
+    # Method loads a transaction in the binary block format into the transaction object
+    # data: bytes of ONE transaction WITHOUT the length prefix
+    # path: "block x" for the error messages
+    # Index is the index of the transaction within the block (from top to bottom 0-x)
+    def parse_tx_bytes(self, path, data, index, block_number = ''):
+        self.block_nr = block_number
+        try:
+            # Tx header
+            tx_id, self.timestamp, self.input_count, self.output_count = struct.unpack_from(">32sdII", data, 0)
+            self.tx_id = tx_id.hex()
+            offset = 48
+            # Inputs
+            for i in range(self.input_count):
+                tx_id_inp, index_inp, public_key, signature = struct.unpack_from(">32sI64s64s", data, offset)
+                self.inputs.append([tx_id_inp.hex(), index_inp, base58.b58encode(public_key).decode(), base58.b58encode(signature).decode()])
+                offset += 164
+            # Outputs
+            for o in range(self.output_count):
+                index_out, address, volume = struct.unpack_from(">I20sq", data, offset)
+                self.outputs.append([index_out, base58.b58encode(address).decode(), volume / 1000])
+                offset += 32
+        except struct.error:
+            self.error.append(f"Transaction {index} in {path} corrupted!")
+            self.tx_valid = False
+            return False
+        # All bytes of the transaction need to be used
+        if(offset != len(data)):
+            self.error.append(f"Transaction {index} in {path} corrupted!")
+            self.tx_valid = False
+            return False
+        # Transactions (except the coinbase) need inputs and every transaction needs outputs
+        if(self.input_count == 0 and index != 0):
+            self.error.append(f"Transaction {index} in {path} does not have inputs!")
+            self.tx_valid = False
+        if(self.output_count == 0):
+            self.error.append(f"Transaction {index} in {path} does not have outputs!")
+            self.tx_valid = False
+        if not(len(self.error)):
+            self.tx_valid = True
+        return self.tx_valid
+
     # Method loads coinbase data into a transaction object 
     def get_coinbase_data(self, wallet, mining_reward, timestamp):
         # Make a new key pair and create the receiving address for the miner  
@@ -233,18 +362,6 @@ class Transaction():
             ### Transaction valid ###
             self.tx_valid = True
     
-    # Method writes a transaction string to the mempool
-    def tx_to_mempool(self, tx_string):
-        # Check, if mempool file exists
-        if(self.check_mempool_file(self.mem_path)): 
-            # open mempool in append mode
-            with open(self.mem_path, "a") as handle:
-                # add transaction to mempool
-                handle.write(tx_string)
-            print("Transaction successfully written to mempool!")
-        else:
-            print("Transaction failed!")  
-     
     # Method takes a string with one or more transactions in transaction format 
     # from either the mempool or a block
     # Index is the index of the transactions within the block or mempool (from top to bottom 0-x)
@@ -268,154 +385,163 @@ class Transaction():
             print("Loading of transactions failed: No transactions in {path}!")
             return False 
         else:
-            # Split transaction elements (= header line, inputs, outputs), delimiter [x]
-            tx_elements = tx_list[index].strip().split("[x]")   
-            # Check, if tx_elements has 3 elements (= header line, inputs, outputs)
-            if(len(tx_elements) != 3):
-                self.error.append(f"Transaction {index} in {path} corrupted!")
+            # Load the transaction with the given index
+            return self.parse_tx(path, tx_list[index], index, block_number)
+
+    # Method parses a single transaction string into the transaction object
+    # tx_item: the string of ONE transaction without the {tx:} delimiter
+    # path: "block x" or "mempool" for the error messages
+    # Index is the index of the transaction within the block or mempool (from top to bottom 0-x)
+    # Used by load_tx() and by the single pass block parser load_txs_from_block()
+    def parse_tx(self, path, tx_item, index, block_number = ''):
+        # Split transaction elements (= header line, inputs, outputs), delimiter [x]
+        tx_elements = tx_item.strip().split("[x]")   
+        # Check, if tx_elements has 3 elements (= header line, inputs, outputs)
+        if(len(tx_elements) != 3):
+            self.error.append(f"Transaction {index} in {path} corrupted!")
+            self.tx_valid = False  
+            return False 
+        else: 
+            #############
+            # Tx Header #
+            #############
+            # Block number
+            self.block_nr = block_number
+            # Split transaction header data
+            tx_header = tx_elements[0].strip().split("|")
+            # print(tx_header)
+            # Check, if tx header has 4 elements (= ID, Timestamp, input ans output count)
+            if(len(tx_header) != 4):
+                self.error.append(f"Header of transaction {index} in {path} corrupted!")
                 self.tx_valid = False  
                 return False 
-            else: 
-                #############
-                # Tx Header #
-                #############
-                # Block number
-                self.block_nr = block_number
-                # Split transaction header data
-                tx_header = tx_elements[0].strip().split("|")
-                # print(tx_header)
-                # Check, if tx header has 4 elements (= ID, Timestamp, input ans output count)
-                if(len(tx_header) != 4):
-                    self.error.append(f"Header of transaction {index} in {path} corrupted!")
+            else:
+                # Check header elements
+                # 0) The SHA256 double hash of the transaction data = ID
+                if not(fnc.check_prk_hash(tx_header[0].strip())):
+                    self.error.append(f"ID of transaction {index} in {path} is corrupted!")
                     self.tx_valid = False  
-                    return False 
                 else:
-                    # Check header elements
-                    # 0) The SHA256 double hash of the transaction data = ID
-                    if not(fnc.check_prk_hash(tx_header[0].strip())):
-                        self.error.append(f"ID of transaction {index} in {path} is corrupted!")
-                        self.tx_valid = False  
-                    else:
-                        self.tx_id = str(tx_header[0])
-                        # print(tx_header[0])
-                    # 1) Timestamp of transaction
-                    if not(fnc.check_float(tx_header[1])):
-                        self.error.append(f"Timestamp of transaction {index} in {path} is corrupted!")
-                        self.tx_valid = False 
-                    else:                                 
-                        self.timestamp = float(tx_header[1]) 
-                        # print(tx_header[1])
-                    # 2) Input count
-                    if not(fnc.check_int(tx_header[2])):
-                        self.error.append(f"Input count of transaction {index} in {path} is corrupted!")
+                    self.tx_id = str(tx_header[0])
+                    # print(tx_header[0])
+                # 1) Timestamp of transaction
+                if not(fnc.check_float(tx_header[1])):
+                    self.error.append(f"Timestamp of transaction {index} in {path} is corrupted!")
+                    self.tx_valid = False 
+                else:                                 
+                    self.timestamp = float(tx_header[1]) 
+                    # print(tx_header[1])
+                # 2) Input count
+                if not(fnc.check_int(tx_header[2])):
+                    self.error.append(f"Input count of transaction {index} in {path} is corrupted!")
+                    self.tx_valid = False 
+                else:                                 
+                    self.input_count = int(tx_header[2])   
+                    # print(tx_header[2])
+                # 3) Output count
+                if not(fnc.check_int(tx_header[3])):
+                    self.error.append(f"Output count of transaction {index} in {path} is corrupted!")
+                    self.tx_valid = False 
+                else:                                 
+                    self.output_count = int(tx_header[3])
+                    # print(tx_header[3])
+                ##########
+                # Inputs #
+                ########## 
+                # Split inputs
+                inp = tx_elements[1].strip().split("\n")
+                # If there are no inputs in the transaction AND
+                # if the transaction is NOT a coinbase (index 0), an error occures   
+                if(inp == [''] and index != 0):
+                    self.error.append(f"Transaction {index} in {path} does not have inputs!")  
+                    self.tx_valid = False
+                    icount = 0                                                                                           
+                # Coinbase transactions
+                elif(inp == [''] and index == 0):
+                    icount = 0
+                # Normal transactions (must have inputs!)
+                else:
+                    icount = len(inp)                                    
+                    # Check if input count in block header is the same as the actual amount of inputs
+                    if(icount != self.input_count):
+                        self.error.append(f"Number of Inputs in in transaction {index} header does not match the actual number of inputs!")
                         self.tx_valid = False 
-                    else:                                 
-                        self.input_count = int(tx_header[2])   
-                        # print(tx_header[2])
-                    # 3) Output count
-                    if not(fnc.check_int(tx_header[3])):
-                        self.error.append(f"Output count of transaction {index} in {path} is corrupted!")
+                    input_index = -1
+                    # Iterate through all inputs of this transaction
+                    for i in inp:
+                        input_index += 1
+                        # Split input elements
+                        inp[input_index] = i.strip().split("|")
+                        # Check, if all inputs have 4 elements
+                        if(len(inp[input_index]) != 4):
+                            self.error.append(f"Input {input_index} of transaction {index} in {path} is corrupted!")
+                            self.tx_valid = False
+                        else:                                                
+                            # Check all input elements
+                            # 0) Transaction ID of former output (UTXO) = hash
+                            if not(fnc.check_prk_hash(inp[input_index][0].strip())):
+                                self.error.append(f"ID of input {input_index} in transaction {index} in {path} is corrupted!")
+                                self.tx_valid = False  
+                            # 1) Index of UTXO output
+                            if not(fnc.check_int(inp[input_index][1].strip())):
+                                self.error.append(f"Output index of input {input_index} in transaction {index} in {path} is corrupted!")
+                                self.tx_valid = False                                               
+                            # 2) Public key    
+                            if not(fnc.check_puk_sig(inp[input_index][2].strip())):
+                                self.error.append(f"Public key of input {input_index} in transaction {index} in {path} is corrupted!")
+                                self.tx_valid = False 
+                            # 3) Signature                                                  
+                            if not(fnc.check_puk_sig(inp[input_index][3].strip())):
+                                self.error.append(f"Signature of input {input_index} in transaction {index} in {path} is corrupted!")
+                                self.tx_valid = False 
+                            # create intput list                                
+                            self.inputs.append([str(inp[input_index][0].strip()), int(inp[input_index][1].strip()), str(inp[input_index][2].strip()), str(inp[input_index][3].strip())])                                                   
+                ###########
+                # Outputs #
+                ########### 
+                # Split outputs
+                out = tx_elements[2].strip().split("\n")
+                # print(out)
+                # Check for outputs: every transaction has to have outputs! 
+                if(out == ['']):
+                    self.error.append(f"Transaction {index} in {path} does not have outputs!")  
+                    self.tx_valid = False
+                    ocount = 0                                                                                           
+                else:
+                    ocount = len(out)
+                    # print(ocount)
+                    # Check if input count in block header is the same as the actual amount of inputs
+                    if(ocount != self.output_count):
+                        self.error.append(f"Number of Outputs in in transaction {index} header does not match the actual number of outputs!")
                         self.tx_valid = False 
-                    else:                                 
-                        self.output_count = int(tx_header[3])
-                        # print(tx_header[3])
-                    ##########
-                    # Inputs #
-                    ########## 
-                    # Split inputs
-                    inp = tx_elements[1].strip().split("\n")
-                    # If there are no inputs in the transaction AND
-                    # if the transaction is NOT a coinbase (index 0), an error occures   
-                    if(inp == [''] and index != 0):
-                        self.error.append(f"Transaction {index} in {path} does not have inputs!")  
-                        self.tx_valid = False
-                        icount = 0                                                                                           
-                    # Coinbase transactions
-                    elif(inp == [''] and index == 0):
-                        icount = 0
-                    # Normal transactions (must have inputs!)
-                    else:
-                        icount = len(inp)                                    
-                        # Check if input count in block header is the same as the actual amount of inputs
-                        if(icount != self.input_count):
-                            self.error.append(f"Number of Inputs in in transaction {index} header does not match the actual number of inputs!")
-                            self.tx_valid = False 
-                        input_index = -1
-                        # Iterate through all inputs of this transaction
-                        for i in inp:
-                            input_index += 1
-                            # Split input elements
-                            inp[input_index] = i.strip().split("|")
-                            # Check, if all inputs have 4 elements
-                            if(len(inp[input_index]) != 4):
-                                self.error.append(f"Input {input_index} of transaction {index} in {path} is corrupted!")
-                                self.tx_valid = False
-                            else:                                                
-                                # Check all input elements
-                                # 0) Transaction ID of former output (UTXO) = hash
-                                if not(fnc.check_prk_hash(inp[input_index][0].strip())):
-                                    self.error.append(f"ID of input {input_index} in transaction {index} in {path} is corrupted!")
-                                    self.tx_valid = False  
-                                # 1) Index of UTXO output
-                                if not(fnc.check_int(inp[input_index][1].strip())):
-                                    self.error.append(f"Output index of input {input_index} in transaction {index} in {path} is corrupted!")
-                                    self.tx_valid = False                                               
-                                # 2) Public key    
-                                if not(fnc.check_puk_sig(inp[input_index][2].strip())):
-                                    self.error.append(f"Public key of input {input_index} in transaction {index} in {path} is corrupted!")
-                                    self.tx_valid = False 
-                                # 3) Signature                                                  
-                                if not(fnc.check_puk_sig(inp[input_index][3].strip())):
-                                    self.error.append(f"Signature of input {input_index} in transaction {index} in {path} is corrupted!")
-                                    self.tx_valid = False 
-                                # create intput list                                
-                                self.inputs.append([str(inp[input_index][0].strip()), int(inp[input_index][1].strip()), str(inp[input_index][2].strip()), str(inp[input_index][3].strip())])                                                   
-                    ###########
-                    # Outputs #
-                    ########### 
-                    # Split outputs
-                    out = tx_elements[2].strip().split("\n")
-                    # print(out)
-                    # Check for outputs: every transaction has to have outputs! 
-                    if(out == ['']):
-                        self.error.append(f"Transaction {index} in {path} does not have outputs!")  
-                        self.tx_valid = False
-                        ocount = 0                                                                                           
-                    else:
-                        ocount = len(out)
-                        # print(ocount)
-                        # Check if input count in block header is the same as the actual amount of inputs
-                        if(ocount != self.output_count):
-                            self.error.append(f"Number of Outputs in in transaction {index} header does not match the actual number of outputs!")
-                            self.tx_valid = False 
-                        output_index = -1
-                        # Iterate through all outputs of this transaction
-                        for o in out:
-                            # print(o)
-                            output_index += 1
-                            # Split output elements
-                            out[output_index] = o.strip().split("|")
-                            # print(out[output_index])
-                            # Check, if all oututs have 3 elements
-                            if(len(out[output_index]) != 3):
-                                self.error.append(f"Output {output_index} of transaction {index} in {path} is corrupted!")
-                                self.tx_valid = False     
-                            else:
-                                # Check all output elements    
-                                # 0) UTXO = Output index
-                                if not(fnc.check_int(out[output_index][0].strip())):
-                                    self.error.append(f"Output index of output {input_index} in transaction {index} in {path} is corrupted!")
-                                    self.tx_valid = False   
-                                # 1) Address
-                                if not(fnc.check_address(out[output_index][1].strip())):
-                                    self.error.append(f"Address of output {output_index} in transaction {index} in {path} is corrupted!")
-                                    self.tx_valid = False 
-                                # 2) Volume
-                                if not(fnc.check_float(out[output_index][2].strip())):                                                   
-                                    self.error.append(f"Volume of output {output_index} in transaction {index} in {path} is corrupted!")
-                                    self.tx_valid = False 
-                                # create output list                                
-                                self.outputs.append([int(out[output_index][0].strip()), str(out[output_index][1].strip()), float(out[output_index][2].strip())])  
+                    output_index = -1
+                    # Iterate through all outputs of this transaction
+                    for o in out:
+                        # print(o)
+                        output_index += 1
+                        # Split output elements
+                        out[output_index] = o.strip().split("|")
+                        # print(out[output_index])
+                        # Check, if all oututs have 3 elements
+                        if(len(out[output_index]) != 3):
+                            self.error.append(f"Output {output_index} of transaction {index} in {path} is corrupted!")
+                            self.tx_valid = False     
+                        else:
+                            # Check all output elements    
+                            # 0) UTXO = Output index
+                            if not(fnc.check_int(out[output_index][0].strip())):
+                                self.error.append(f"Output index of output {input_index} in transaction {index} in {path} is corrupted!")
+                                self.tx_valid = False   
+                            # 1) Address
+                            if not(fnc.check_address(out[output_index][1].strip())):
+                                self.error.append(f"Address of output {output_index} in transaction {index} in {path} is corrupted!")
+                                self.tx_valid = False 
+                            # 2) Volume
+                            if not(fnc.check_float(out[output_index][2].strip())):                                                   
+                                self.error.append(f"Volume of output {output_index} in transaction {index} in {path} is corrupted!")
+                                self.tx_valid = False 
+                            # create output list                                
+                            self.outputs.append([int(out[output_index][0].strip()), str(out[output_index][1].strip()), float(out[output_index][2].strip())])  
 
     # Method to load a transaction from mempool into an transaction object
     # Index is the index of the transactions within the file (from top to bottom 0-x)
@@ -470,8 +596,8 @@ class Transaction():
              # Split header elements                             
              bl_header = bl_header_line.strip().split("|")   
              # print(bl_header)               
-             # if header list does not contain 7 elements
-             if(len(bl_header) != 7):
+             # if header list does not contain 7 elements (8 with block version)
+             if(len(bl_header) not in (7, 8)):
                  # Set transaction as invalid and write error message
                  self.error.append(f"Header of block {block_number} corrupted!")
                  self.tx_valid = False                
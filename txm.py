@@ -0,0 +1,145 @@
+###########
+# Modules #
+###########
+
+# os: for creating the index folder and replacing the index file
+import os
+# exists: check, if file in a directory exists
+# source: https://www.pythontutorial.net/python-basics/python-check-if-file-exists/
+from os.path import exists
+
+#########
+# Class #
+#########
+
+# Transaction index of the blockchain: block number and position in the block of every transaction
+# Used by the blockchain (outputs of transactions, deep validation, node) and by the inclusion proofs (pfm.py)
+# The index is stored in the index folder, so only new blocks need to be indexed at the next start
+# Index file (txindex.idx): for every block the lines Tx ID|Block|Position and at the end #|height|tip hash
+# New blocks are appended to the file, it is only written again, when another program has changed it
+# or the index was built again (e.g. blocks replaced)
+class TxIndex():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    def __init__(self, idx_path):
+        self.idx_path = str(idx_path)
+        self.file_path = f"{self.idx_path}/txindex.idx"
+        # Tx ID -> (block number, position of the transaction in the block)
+        self.txs = {}
+        # Highest block in the index and the hash of its header
+        # Used to check, if the stored index matches the blocks
+        self.height = -1
+        self.tip_hash = ""
+        # Index file loaded (see load())
+        self.loaded = False
+        # Lines of the blocks added since the index was loaded or saved
+        self.changes = []
+        # Size of the index file, when it was read or written
+        # None: the file doesn't contain the index before the new blocks
+        self.file_size = None
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Transaction index with {len(self.txs)} transactions up to block {self.height}"
+        return string
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Method clears the index
+    def clear(self):
+        self.txs = {}
+        self.height = -1
+        self.tip_hash = ""
+        self.changes = []
+        self.file_size = None
+
+    # Method adds the transactions of a block to the index
+    # The block must follow the highest block in the index
+    def add_block(self, block):
+        for position, tx in enumerate(block.tx):
+            self.txs[tx.tx_id] = (block.number, position)
+            self.changes.append(f"{tx.tx_id}|{block.number}|{position}")
+        self.height = block.number
+        self.tip_hash = block.get_header_hash()
+        # End of the block: height|tip hash
+        self.changes.append(f"#|{self.height}|{self.tip_hash}")
+
+    # Returns the position of a transaction: (block number, position in the block)
+    # Returns None if the transaction is not in the index
+    def get_tx(self, tx_id):
+        return self.txs.get(tx_id)
+
+    # Method loads the index from the index file
+    # The lines of an interrupted block at the end are ignored
+    # Returns False if there is no index file or if it is corrupted
+    def load(self):
+        self.clear()
+        self.loaded = True
+        if not(exists(self.file_path)):
+            return False
+        with open(self.file_path, "r") as handle:
+            text = handle.read()
+        # Tx IDs of the block, which is read at the moment
+        block = []
+        size = 0
+        try:
+            for line in text.split("\n")[:-1]:
+                elem = line.split("|")
+                if(elem[0] == "#"):
+                    for tx in block:
+                        self.txs[tx[0]] = (int(tx[1]), int(tx[2]))
+                    self.height = int(elem[1])
+                    self.tip_hash = elem[2]
+                    size += sum(len("|".join(tx)) + 1 for tx in block) + len(line) + 1
+                    block = []
+                else:
+                    block.append(elem)
+        except (ValueError, IndexError):
+            self.clear()
+            return False
+        # The file can only be appended, if it ends with a complete block
+        if(size == len(text)):
+            self.file_size = size
+        return True
+
+    # Method writes the new blocks to the index file
+    # The blocks are appended, if the file still contains the index before these blocks,
+    # otherwise the whole index is written
+    def save(self):
+        if not(len(self.changes)):
+            return
+        os.makedirs(self.idx_path, exist_ok=True)
+        if(self.file_size is not None and exists(self.file_path) and os.path.getsize(self.file_path) == self.file_size):
+            text = "\n".join(self.changes) + "\n"
+            with open(self.file_path, "a") as handle:
+                handle.write(text)
+            self.file_size += len(text)
+        else:
+            self.save_index()
+        self.changes = []
+
+    # Method writes the whole index to the index file
+    # The file is written to a temporary file first and then replaced,
+    # so an interrupted write doesn't destroy the index
+    # Every program uses its own temporary file, so programs can save at the same time
+    def save_index(self):
+        # Tx IDs of every block in the order of the blocks
+        blocks = {}
+        for tx_id in self.txs:
+            blocks.setdefault(self.txs[tx_id][0], []).append(tx_id)
+        lines = []
+        for number in sorted(blocks):
+            for tx_id in blocks[number]:
+                lines.append(f"{tx_id}|{number}|{self.txs[tx_id][1]}")
+        lines.append(f"#|{self.height}|{self.tip_hash}")
+        text = "\n".join(lines) + "\n"
+        with open(f"{self.file_path}.{os.getpid()}.tmp", "w") as handle:
+            handle.write(text)
+        os.replace(f"{self.file_path}.{os.getpid()}.tmp", self.file_path)
+        self.file_size = len(text)
@@ -145,6 +145,17 @@ class User():
                 self.clear_user()
                 return False 
             
+    # Method for login without input prompts (e.g. command line or scripts)
+    # Returns False if the name is not registered or the password is wrong
+    def login_as(self, name, password):
+        if not(self.user_exists(name) and self.user_authorized(name, password)):
+            self.clear_user()
+            return False
+        self.name = name
+        self.password = password
+        self.user_id = self.get_user_id(name)
+        return True
+
     # Method for logout
     # Sets self.name and self.password to None
     def logout(self):
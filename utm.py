@@ -0,0 +1,260 @@
+###########
+# Modules #
+###########
+
+# os: for creating the index folder and replacing the index file
+import os
+# exists: check, if file in a directory exists
+# source: https://www.pythontutorial.net/python-basics/python-check-if-file-exists/
+from os.path import exists
+
+# Minimum number of entries in the log file, before it is merged into the index file
+COMPACT_MIN = 1000
+
+#########
+# Class #
+#########
+
+# UTXO set of the whole blockchain
+# Contains all outputs in blocks, which are not referenced by an input in any block
+# The set is updated block by block and stored in the index folder,
+# so it doesn't need to be rebuilt at every start of the program
+# Index file (utxo.idx): the whole set, log file (utxo.log): the changes of the blocks added since
+# Saving a block appends only its spent and created outputs to the log,
+# the index file is written again when the log has as many entries as the set (see save())
+class UtxoSet():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    def __init__(self, idx_path):
+        self.idx_path = str(idx_path)
+        self.file_path = f"{self.idx_path}/utxo.idx"
+        self.log_path = f"{self.idx_path}/utxo.log"
+        # UTXOs: (Tx ID, Output index) -> [Address, Block, Volume]
+        self.utxos = {}
+        # Address -> dict of outpoints (Tx ID, Output index)
+        # A dict is used instead of a set to keep the order of the outputs
+        self.addr_index = {}
+        # Highest block in the UTXO set and the hash of its header
+        # Used to check, if the stored UTXO set matches the blockchain
+        self.height = -1
+        self.tip_hash = ""
+        # Lines of the log file for the blocks added since the set was loaded or saved
+        self.changes = []
+        # (height, tip hash) before the first of these blocks
+        self.changes_base = None
+        # (height, tip hash) of the set in the files, None if unknown (e.g. set built without the files)
+        self.saved = None
+        # Stamp of the files, when they were read or written (see get_file_stamp())
+        self.file_stamp = None
+        # Number of entries and length in bytes of the log file
+        self.log_count = 0
+        self.log_size = 0
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"UTXO set with {len(self.utxos)} UTXOs up to block {self.height}"
+        return string
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Method clears the UTXO set
+    def clear(self):
+        self.utxos = {}
+        self.addr_index = {}
+        self.height = -1
+        self.tip_hash = ""
+        self.changes = []
+        self.changes_base = None
+        self.saved = None
+        self.file_stamp = None
+        self.log_count = 0
+        self.log_size = 0
+
+    # Method adds an output to the UTXO set
+    def add_utxo(self, tx_id, index, address, block_nr, volume):
+        outpoint = (tx_id, index)
+        self.utxos[outpoint] = [address, block_nr, volume]
+        if(address not in self.addr_index):
+            self.addr_index[address] = {}
+        self.addr_index[address][outpoint] = True
+
+    # Method removes a spent output from the UTXO set
+    # Returns False if the output is not in the UTXO set
+    def spend_utxo(self, tx_id, index):
+        outpoint = (tx_id, index)
+        if(outpoint not in self.utxos):
+            return False
+        else:
+            address = self.utxos.pop(outpoint)[0]
+            del self.addr_index[address][outpoint]
+            if not(len(self.addr_index[address])):
+                del self.addr_index[address]
+            return True
+
+    # Method updates the UTXO set with the transactions of the next block
+    # Inputs remove the referenced outputs, outputs are added as new UTXOs
+    # The changes are kept for the log file (see save())
+    def add_block(self, block):
+        if not(len(self.changes)):
+            self.changes_base = (self.height, self.tip_hash)
+        for tx in block.tx:
+            # inp[0]: Tx ID Output
+            # inp[1]: Index Output (UTXO)
+            for inp in tx.inputs:
+                if(self.spend_utxo(inp[0], int(inp[1]))):
+                    self.changes.append(f"-|{inp[0]}|{int(inp[1])}")
+            # out[0]: Index Output
+            # out[1]: Address
+            # out[2]: Volume
+            for out in tx.outputs:
+                self.add_utxo(tx.tx_id, int(out[0]), out[1], block.number, float(out[2]))
+                self.changes.append(f"+|{tx.tx_id}|{int(out[0])}|{out[1]}|{block.number}|{float(out[2])}")
+        self.height = block.number
+        self.tip_hash = block.get_header_hash()
+        # End of the block: height|tip hash
+        self.changes.append(f"#|{self.height}|{self.tip_hash}")
+
+    # Method returns the UTXO data to an outpoint (Tx ID, Output index)
+    # Returns None if the output is not in the UTXO set (unknown or already spent)
+    def get_utxo(self, tx_id, index):
+        return self.utxos.get((tx_id, index))
+
+    # Method returns a list with all UTXOs of an address:
+    # [Address, Block, Tx ID, Output index, Volume]
+    def get_utxos_for_address(self, address):
+        utxo_list = []
+        for outpoint in self.addr_index.get(address, {}):
+            utxo = self.utxos[outpoint]
+            utxo_list.append([address, utxo[1], outpoint[0], outpoint[1], utxo[2]])
+        return utxo_list
+
+    # Method loads the UTXO set from the index file and the log file
+    # Returns False if there is no index file or if it is corrupted
+    def load(self):
+        self.clear()
+        if not(exists(self.file_path)):
+            return False
+        # Stamp before reading, so a change by another program during the reading is noticed at the next save
+        file_stamp = self.get_file_stamp()
+        with open(self.file_path, "r") as handle:
+            lines = handle.read().split("\n")
+        # First line: height|tip hash
+        head = lines[0].split("|")
+        if(len(head) != 2):
+            self.clear()
+            return False
+        try:
+            height = int(head[0])
+            # Other lines: Tx ID|Output index|Address|Block|Volume
+            for line in lines[1:]:
+                if(line == ""):
+                    continue
+                elem = line.split("|")
+                self.add_utxo(elem[0], int(elem[1]), elem[2], int(elem[3]), float(elem[4]))
+            self.height = height
+            self.tip_hash = head[1]
+            self.load_log()
+        except (ValueError, IndexError):
+            self.clear()
+            return False
+        self.saved = (self.height, self.tip_hash)
+        self.file_stamp = file_stamp
+        return True
+
+    # Method applies the changes in the log file to the UTXO set loaded from the index file
+    # First line: @|height|tip hash of the index file, the log is ignored if it belongs to another index file
+    # Then for every block: -|Tx ID|Output index (spent), +|Tx ID|Output index|Address|Block|Volume (created)
+    # and #|height|tip hash at the end, the changes of an interrupted block at the end are ignored
+    def load_log(self):
+        if not(exists(self.log_path)):
+            return
+        with open(self.log_path, "r") as handle:
+            log = handle.read()
+        # The last element is empty or an interrupted line
+        lines = log.split("\n")[:-1]
+        if(not(len(lines)) or lines[0] != f"@|{self.height}|{self.tip_hash}"):
+            return
+        size = len(lines[0]) + 1
+        block = []
+        for line in lines[1:]:
+            elem = line.split("|")
+            block.append(elem)
+            if(elem[0] == "#"):
+                for change in block[:-1]:
+                    if(change[0] == "-"):
+                        self.spend_utxo(change[1], int(change[2]))
+                    else:
+                        self.add_utxo(change[1], int(change[2]), change[3], int(change[4]), float(change[5]))
+                self.height = int(elem[1])
+                self.tip_hash = elem[2]
+                self.log_count += len(block)
+                size += sum(len("|".join(change)) + 1 for change in block)
+                block = []
+        self.log_size = size
+
+    # Returns a stamp of the index file and the log file, which changes when another program writes them:
+    # (inode, size and modification time of the index file, size of the log file)
+    # Returns None if there is no index file
+    def get_file_stamp(self):
+        if not(exists(self.file_path)):
+            return None
+        stat = os.stat(self.file_path)
+        log_size = os.path.getsize(self.log_path) if(exists(self.log_path)) else 0
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns, log_size)
+
+    # Method writes the UTXO set to the index folder
+    # The changes of the blocks added since the set was loaded or saved are appended to the log file,
+    # if the files still contain the set before these blocks (no other program has written them in the meantime)
+    # Otherwise or when the log has as many entries as the set, the whole set is written to the index file
+    # So saving a block costs time proportional to the block, the index file is only written from time to time
+    def save(self):
+        os.makedirs(self.idx_path, exist_ok=True)
+        if(self.saved == (self.height, self.tip_hash) and not(len(self.changes))):
+            return
+        if(self.saved is not None and len(self.changes) and self.changes_base == self.saved
+           and self.log_count + len(self.changes) <= max(COMPACT_MIN, len(self.utxos))
+           and self.get_file_stamp() == self.file_stamp and self.log_size == self.file_stamp[3]):
+            self.append_log()
+        else:
+            self.save_index()
+        self.changes = []
+        self.changes_base = None
+        self.saved = (self.height, self.tip_hash)
+        self.file_stamp = self.get_file_stamp()
+
+    # Method appends the changes of the new blocks to the log file
+    # A new log file starts with the height and the tip hash of the index file
+    def append_log(self):
+        text = ""
+        if(self.log_size == 0):
+            with open(self.file_path, "r") as handle:
+                text = f"@|{handle.readline().strip()}\n"
+        text += "\n".join(self.changes) + "\n"
+        with open(self.log_path, "a") as handle:
+            handle.write(text)
+        self.log_count += len(self.changes)
+        self.log_size += len(text)
+
+    # Method writes the whole UTXO set to the index file and removes the log file
+    # The file is written to a temporary file first and then replaced,
+    # so an interrupted write doesn't destroy the index
+    # A log file, which is not removed after an interruption, doesn't match the new index file and is ignored
+    # Every program uses its own temporary file, so programs can save at the same time
+    def save_index(self):
+        lines = [f"{self.height}|{self.tip_hash}"]
+        for outpoint in self.utxos:
+            utxo = self.utxos[outpoint]
+            lines.append(f"{outpoint[0]}|{outpoint[1]}|{utxo[0]}|{utxo[1]}|{utxo[2]}")
+        with open(f"{self.file_path}.{os.getpid()}.tmp", "w") as handle:
+            handle.write("\n".join(lines) + "\n")
+        os.replace(f"{self.file_path}.{os.getpid()}.tmp", self.file_path)
+        if(exists(self.log_path)):
+            os.remove(self.log_path)
+        self.log_count = 0
+        self.log_size = 0
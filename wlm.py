@@ -23,12 +23,18 @@ from os.path import exists
 # itemgetter: required to sort a list in a list
 # source: https://www.delftstack.com/de/howto/python/sort-list-of-lists-in-python/
 # from operator import itemgetter
+# os: for checking, if the wallet file was changed
+import os
 # fnc (Module for own functions): Own set of functions
 import fnc
 # bcm (blockchain module). Own module for blockchain
 # from bcm import Blockchain
 # trm (transaction module). Own module for handeling transactions
 from trm import Transaction
+# wsm (wallet scan module): Own module for the UTXOs of the wallet addresses in blocks
+from wsm import WalletScan
+# csm (coin selection module): Own module for choosing the inputs of a transaction
+from csm import CoinSelector
 # usr (User module): Own module for user handling
 # import usr
 # blm (block module): Own module for block class
@@ -60,6 +66,17 @@ class Wallet():
         self.private_key = ""
         self.public_key = ""
         self.address = ""
+        # Keystore: address -> (private key, public key) of all keys in the wallet file
+        # The wallet file is read only once (see get_keys()), None: not loaded yet
+        self.keys = None
+        # (modification time, size) of the wallet file, when it was read
+        self.wlt_stamp = None
+        # Scan of the blocks for the outputs of the wallet addresses
+        # Stored as checkpoint next to the wallet file, loaded at the first scan (see update_scan())
+        self.scan = WalletScan(f"{self.user_path}/{self.user_id}.wsc")
+        self.scan_loaded = False
+        # Coin selection for the inputs of transactions (strategy and maximum number of inputs)
+        self.coin_selector = CoinSelector()
         
     # Print Object as formatted string
     def __str__(self):
@@ -98,6 +115,9 @@ class Wallet():
             print(f"Error: Wallet file for user {self.user_name} not found!")
             return False
         else: 
+            # Load the keystore first, so keys added by another program are not missed
+            if(self.get_keys() is None):
+                return False
             # Create a private/public key pair
             keys = fnc.generate_ECDSA_keys()
             self.private_key = keys[0]
@@ -111,6 +131,9 @@ class Wallet():
                 # Delimiter: |                
                 wlt_string = f"{self.address}|{self.private_key}|{self.public_key}\n"
                 handle.write(wlt_string)  
+            # Add the keys to the keystore, the wallet file doesn't need to be read again
+            self.keys[self.address] = (self.private_key, self.public_key)
+            self.wlt_stamp = self.get_wallet_stamp()
             return True 
         
     # Method returns the address, generated by the method generate_keys()
@@ -125,70 +148,97 @@ class Wallet():
         else: 
             return True 
         
-    # Returns a list with all addresses in the wallet of the loggen in user
-    def get_addr_list(self):
+    # Returns the (modification time, size) of the wallet file
+    # Returns None if the file doesn't exist
+    def get_wallet_stamp(self):
+        path = f"{self.user_path}/{self.user_id}.wlt"
+        if not(exists(path)):
+            return None
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    # Returns the keystore of the logged in user: dict address -> (private key, public key)
+    # The wallet file is only read again, when it was changed by another program (modification time or size)
+    # Returns None if the wallet file is not found or corrupted
+    def get_keys(self):
+        stamp = self.get_wallet_stamp()
+        if(self.keys is not None and stamp == self.wlt_stamp):
+            return self.keys
+        self.keys = None
         # Check if logged in user has a wallet file
         if not(self.check_wallet_file()):
+            return None
+        keys = {}
+        # Open wallet file for reading and get lines
+        with open(f"{self.user_path}/{self.user_id}.wlt", "r") as handle: 
+            lines = handle.read().split("\n")
+        # iterate through lines
+        for line in lines:
+            if(line.strip() == ""):
+                continue
+            # Split line into elements
+            elem = line.strip().split("|")
+            # Check if the list contains 3 elements:
+            # 0: address, 1: private key, 2: public key
+            if(len(elem) != 3):
+                print(f"Error: Wallet file of user \"{self.user_name}\" corrupted!")
+                return None
+            ### Check for address and keys format ############################################
+            # If an address is in the file more than once, the first keys are used
+            keys.setdefault(elem[0].strip(), (elem[1].strip(), elem[2].strip()))
+        self.keys = keys
+        self.wlt_stamp = stamp
+        return self.keys
+
+    # Returns a list with all addresses in the wallet of the loggen in user
+    def get_addr_list(self):
+        keys = self.get_keys()
+        if(keys is None):
             return False
         else:  
-            # Create a list with all addresses in the user wallet
-            addr_list = []
-            # Open wallet file for reading and get lines
-            with open(f"{self.user_path}/{self.user_id}.wlt", "r") as handle: 
-                addr_line = list(handle)   
-            # iterate through lines
-            for addr in addr_line:
-                # Split line into elements
-                addr_elem = addr.split("|")
-                # Check if the list contains 3 elements:
-                # 0: address, 1: private key, 2: public key
-                if(len(addr_elem) != 3):
-                    print(f"Error: Wallet file of user \"{self.name}\" corrupted!")
-                    return False
-                else:
-                    # Add address to address list
-                    ### Check for address format ############################################
-                    addr_list.append(addr_elem[0])
-            return addr_list
+            return list(keys)
         
     # Method returns the Public and the Private key to an address in the user wallet file
     # Returns 0 if the address was not found
     # Or else a tuple of (private key, public key)
     def get_keys_for_address(self, address):
-        # Check if logged in user has a wallet file
-        if not(self.check_wallet_file()):
+        keys = self.get_keys()
+        if(keys is None):
             return False
-        else:  
-            with open(f"{self.user_path}/{self.user_id}.wlt", "r") as handle: 
-                 line = list(handle)   
-            # iterate through lines
-            for l in line:
-                # Split line into elements
-                elem = l.strip().split("|")  
-                # print(elem)                 
-                # Check if the list contains 3 elements:
-                # 0: address, 1: private key, 2: public key
-                if(len(elem) != 3):
-                    print(f"Error: Wallet file of user \"{self.name}\" corrupted!")
-                    return False
-                else:  
-                    # print(elem[0])
-                    # print(address)
-                    # Check the address
-                    if(elem[0].strip() == address.strip()):
-                        # Return tuple of (private key, public key)
-                        # if address was found
-                        ### Check for address and keys format ############################################
-                        return(elem[1].strip(), elem[2].strip())
-            # Return zero if address was NOT found
-            return(0)                        
+        # Return zero if address was NOT found
+        return keys.get(address.strip(), 0)
+
+    # Returns the signing key object (ecdsa.SigningKey) for an address in the user wallet
+    # The signing key is taken from the key cache (see fnc.get_signing_key())
+    # Returns None if the address was not found
+    def get_signing_key(self, address):
+        keys = self.get_keys_for_address(address)
+        if not(keys):
+            return None
+        return fnc.get_signing_key(keys[0])
                   
     # Method clears the UTXO list
     def clear_user_utxos(self):
         self.utxo_user = []  
         
+    # Method brings the scan of the blocks for the wallet addresses up to date
+    # The scan is loaded from the checkpoint next to the wallet file at the first call
+    # and saved again, when it was changed
+    # Only the blocks and the addresses, which are new since the last scan, are scanned (see wsm.py)
+    # Returns False if the wallet file is not found or corrupted
+    def update_scan(self, blockchain):
+        keys = self.get_keys()
+        if(keys is None):
+            return False
+        if not(self.scan_loaded):
+            self.scan.load()
+            self.scan_loaded = True
+        if(self.scan.update(blockchain, keys)):
+            self.scan.save()
+        return True
+
     # Method loads all UTXOs for the logged in user into memory
-    # The data is extracted from the blockchain object, not from the text files
+    # The outputs in blocks are taken from the scan of the wallet (see update_scan())
     # The following information is loaded:
     # 1. Address
     # 2. Block (in which the output is found)
@@ -199,70 +249,34 @@ class Wallet():
     # Or else an UTXO can be double-spent while still in mempool    
     def load_user_utxos(self, blockchain):  
         # Load all transactions in mempool to a list of transaction objects
-        tx_mem = blockchain.load_mempool(self.user_path, self.mem_path, self.block_path)
-        tx_mem_count = len(tx_mem)
-        # print(tx_mem)      
+        tx_mem = blockchain.get_mempool()
         # Clear UTXO list, or else loading will append, not reload
         self.clear_user_utxos()
-        # 1. load all outputs which were send to a users address
-        user_outputs = []
-        # Get a list with all addresses in user wallet
-        addr_list = self.get_addr_list()       
-        # Iterate through all blocks
-        for block in blockchain.blocks:           
-            # Iterate through all transactions of the block
-            for tx in block.tx:  
-                # Iterate through all outputs of the transaction
-                for out in tx.outputs:
-                    # Iterate through all addresses
-                    for addr in addr_list:
-                        # out[0]: Index Output
-                        # out[1]: Address
-                        # out[2]: Volume
-                        if(addr == out[1]):
-                            # user_outputs[0]: Address
-                            # user_outputs[1]: Block
-                            # user_outputs[2]: Tx ID
-                            # user_outputs[3]: Output index
-                            # user_outputs[4]: Volume
-                            user_outputs.append([addr, block.number, tx.tx_id, int(out[0]), float(out[2])]) 
-        # Iterate through all transactions in mempool
-        if(tx_mem_count > 0):
-            for tx in tx_mem:  
-                # Iterate through all outputs of the transaction
-                for out in tx.outputs:
-                    # Iterate through all addresses
-                    for addr in addr_list:
-                        if(addr == out[1]):
-                            user_outputs.append([addr, 'mem', tx.tx_id, int(out[0]), float(out[2])])                         
-        # 2. Check, if one of these outputs are referenced in any inputs (Tx ID and index)
+        # Scan the new blocks for outputs to the wallet addresses
+        if not(self.update_scan(blockchain)):
+            return False
+        # 1. load all unspent outputs which were send to a users address
+        # Outputs in blocks in the order of the blockchain
+        # user_outputs[0]: Address
+        # user_outputs[1]: Block
+        # user_outputs[2]: Tx ID
+        # user_outputs[3]: Output index
+        # user_outputs[4]: Volume
+        user_outputs = self.scan.get_utxos()
+        # Outputs in mempool: hash lookup of the address in the keystore
+        keys = self.get_keys()
+        for tx in tx_mem:  
+            # Iterate through all outputs of the transaction
+            for out in tx.outputs:
+                if(out[1] in keys):
+                    user_outputs.append([out[1], 'mem', tx.tx_id, int(out[0]), float(out[2])])                         
+        # 2. Check, if one of these outputs are referenced in any inputs in mempool (Tx ID and index)
+        # Outputs referenced by inputs in blocks are already removed by the scan
         # If no, the transaction is an UTXO and is appended to the UTXO list
         # If yes, it's a STXO and is not included
-        # Iterate through all user outputs
         for out in user_outputs: 
-            output_found = False
-            # Iterate through all blocks
-            for block in blockchain.blocks:           
-                # Iterate through all transactions of the block
-                for tx in block.tx:  
-                    # Iterate through all inputs of the transaction
-                    for inp in tx.inputs:
-                        # Tx ID: out[2] = inp[0]
-                        # Output index: out[3] = inp[1]
-                        # print(f"TxID: out[2]: {out[2]} = inp[0]: {inp[0]}")
-                        # print(f"Output index: out[3]: {out[3]} = inp[1]: {inp[1]}")
-                        if(out[2].strip() == inp[0].strip() and int(out[3]) == int(inp[1])):
-                            output_found = True                            
-            # Iterate through all transactions in mempool
-            if(tx_mem_count > 0):
-                for tx in tx_mem:                             
-                    # Iterate through all inputs of the transaction
-                    for inp in tx.inputs:  
-                        if(out[2].strip() == inp[0].strip() and int(out[3]) == int(inp[1])):
-                            output_found = True                                                            
-            if not(output_found):
+            if(blockchain.mempool.get_spending_tx(out[2], out[3]) is None):
                 self.utxo_user.append(out)  
-        # print(self.utxo_user)
         
     # Method returns a string of the user UTXO set of the logged in user
     # For printing
@@ -284,11 +298,8 @@ class Wallet():
         
     # Method calculates user balance based on UTXO set
     def get_user_balance(self):
-        balance = 0
-        # Iterate through UTXO set
-        for utxo in self.utxo_user:
-            balance += utxo[4]
-        return balance
+        # Sum of the volumes of the UTXO set in milli-MiC
+        return fnc.sum_volumes(utxo[4] for utxo in self.utxo_user)
     
     # Method for receiving a transaction
     # Creates a wallet address for the logged in user
@@ -303,36 +314,91 @@ class Wallet():
             return False
         
     # Method selects the right UTXOs of a user for a transaction
-    # Right now it has no real system. It just selects UTXOs from the 
-    # beginning of the UTXO set until the transaction volume is reached
-    # When the volume of the UTXO is greater than the tx volume, 
+    # The UTXOs are chosen by the coin selection of the wallet (see csm.py),
+    # as few inputs as possible and without change if there is an exact match
+    # When the volume of the UTXOs is greater than the tx volume, 
     # a change needs to be sent back to the sender
-    # If the sum of all UTXOs of the user is less than the tx volume,
-    # the transaction cannot be done
+    # If the sum of all UTXOs of the user is less than the tx volume
+    # or more inputs than allowed would be needed, the transaction cannot be done
     # Returns a tuple with:
     # 1. List of UTXOs (if empty, not enough coins for the tx)
     # 2. Change
     def get_tx_input(self, sender_volume):
-        # Get user balance
-        total_volume = self.get_user_balance()
-        # If there are not enough coins for the transaction
-        if(sender_volume > total_volume):
-            return([], 0)
-        else:
-            # Creaete an input list
-            inputs = []
-            # Total input volume
-            input_volume = 0
-            # Iterate through UTXO set of user
-            for utxo in self.utxo_user:
-                # utxo[4]: Volume
-                input_volume += utxo[4]
-                inputs.append(utxo)
-                if(input_volume >= sender_volume):
-                    return(inputs, (input_volume - sender_volume))
+        return self.coin_selector.select(self.utxo_user, sender_volume)
                 
+    # Method creates and signs a transaction from the UTXOs of the user
+    # fee: paid to the miner = difference between the inputs and the outputs of the transaction
+    # Returns the transaction object or False if there are not enough coins or the keys can not be loaded
+    def create_tx(self, mem_path, block_path, address, volume, fee = 0.0):
+        # Get possible UTXOs of the user for the transaction (volume and fee)
+        input_utxos = self.get_tx_input(volume + fee)
+        input_count = len(input_utxos[0])
+        # If there are not enough coins for the transaction
+        if(input_count == 0):
+            print("Not enough coins for transaction!")
+            return False
+        # Create a temporary transaction object
+        tx = Transaction(self.user_path, mem_path, block_path)         
+        tx.timestamp = datetime.timestamp(datetime.now())
+        tx.input_count = input_count                                  
+        ### Outputs  
+        # Add output to receiver
+        # outputs[0]: Index Output
+        # outputs[1]: Address
+        # outputs[2]: Volume
+        tx.outputs.append([0, address, volume]) 
+        # If there is a change, an output back to the sender needs to be created
+        change = input_utxos[1]
+        if(change != 0):
+            # Make a new key pair and create the receiving address for the sender 
+            if not(self.generate_keys()):
+                return False   
+            else: 
+                tx.outputs.append([1, self.address, change])                         
+        tx.output_count = len(tx.outputs) 
+        ### Inputs
+        # Iterate through input_utxos
+        for utxo in input_utxos[0]:
+            # utxo[0]: Address
+            # utxo[2]: Tx ID
+            # utxo[3]: Output index
+            # tx.inputs[0]: Tx ID Output
+            # tx.inputs[1]: Index Output (UTXO)
+            # tx.inputs[2]: Public key
+            # tx.inputs[3]: Signature                                           
+            tx.inputs.append([utxo[2], utxo[3], "", ""]) 
+        ### Transaction hash = ID 
+        tx.tx_id = tx.get_tx_id()
+        ### Public key and Signature 
+        # Index for input list
+        input_index = -1
+        # Iterate through input_utxos
+        for utxo in input_utxos[0]:
+            input_index += 1
+            # utxo[0]: Address
+            # tx.inputs[2]: Public key
+            # tx.inputs[3]: Signature
+            # Get keys for UTXO address from user wallet
+            # Return tuple of (private key, public key)
+            keys = self.get_keys_for_address(utxo[0]) 
+            if(keys == 0):
+                print(f"Error: Keys for address {utxo[0]} can not be loaded!")
+                return False
+            else:
+                public_key = keys[1] 
+                # Update inputs list with public key
+                tx.inputs[input_index][2] = public_key
+                # Generate Signature with the signing key from the keystore
+                signature = fnc.sign_ECDSA_sk(self.get_signing_key(utxo[0]), tx.tx_id)
+                # Update inputs list with signature
+                tx.inputs[input_index][3] = signature  
+                # Set transaction status to valid
+                tx.tx_valid = True                    
+        return tx
+
     # Method for sending a transaction
-    def send_tx(self, mem_path, block_path, bc):
+    # fee: paid to the miner = difference between the inputs and the outputs of the transaction
+    def send_tx(self, mem_path, block_path, bc, fee = 0.0):
         # Message for exit menues
         fnc.exit_menu_msg()   
         # Enter address
@@ -341,89 +407,70 @@ class Wallet():
         # Enter voume
         volume = fnc.input_volume("Transaction volume: ")
         if not(volume): return False # Exit input
-        # Get possible UTXOs of the user for the transaction
-        input_utxos = self.get_tx_input(volume)
-        input_count = len(input_utxos[0])
-        # If there are not enough coins for the transaction
-        if(input_count == 0):
-            print("Not enough coins for transaction!")
+        tx = self.create_tx(mem_path, block_path, address, volume, fee)
+        if not(tx): 
             return False
-        else:          
-            # Create a temporary transaction object
-            tx = Transaction(self.user_path, mem_path, block_path)         
-            tx.timestamp = datetime.timestamp(datetime.now())
-            tx.input_count = input_count                                  
-            ### Outputs  
-            # Add output to receiver
-            # outputs[0]: Index Output
-            # outputs[1]: Address
-            # outputs[2]: Volume
-            tx.outputs.append([0, address, volume]) 
-            # If there is a change, an output back to the sender needs to be created
-            change = input_utxos[1]
-            if(change != 0):
-                # Make a new key pair and create the receiving address for the sender 
-                if not(self.generate_keys()):
-                    return False   
-                else: 
-                    tx.outputs.append([1, self.address, change])                         
-            tx.output_count = len(tx.outputs) 
-            ### Inputs
-            # Iterate through input_utxos
-            for utxo in input_utxos[0]:
-                # utxo[0]: Address
-                # utxo[2]: Tx ID
-                # utxo[3]: Output index
-                # tx.inputs[0]: Tx ID Output
-                # tx.inputs[1]: Index Output (UTXO)
-                # tx.inputs[2]: Public key
-                # tx.inputs[3]: Signature                                           
-                tx.inputs.append([utxo[2], utxo[3], "", ""]) 
-            ### Transaction hash = ID 
-            tx.tx_id = tx.get_tx_id()
-            ### Public key and Signature 
-            # Index for input list
-            input_index = -1
-            # Iterate through input_utxos
-            for utxo in input_utxos[0]:
-                input_index += 1
-                # utxo[0]: Address
-                # tx.inputs[2]: Public key
-                # tx.inputs[3]: Signature
-                # Get keys for UTXO address from user wallet
-                # Return tuple of (private key, public key)
-                keys = self.get_keys_for_address(utxo[0]) 
-                if(keys == 0):
-                    print(f"Error: Keys for address {utxo[0]} can not be loaded!")
-                    return False
-                else:
-                    private_key = keys[0]
-                    public_key = keys[1] 
-                    # print(f"Private key: {private_key}")
-                    # print(f"Public key: {public_key}") 
-                    # Update inputs list with public key
-                    tx.inputs[input_index][2] = public_key
-                    # Generate Signature
-                    signature = self.get_tx_signature(tx.tx_id, private_key)
-                    # Update inputs list with signature
-                    tx.inputs[input_index][3] = signature  
-                    # Set transaction status to valid
-                    ##################### Error code could be written here
-                    tx.tx_valid = True                    
-            # Check signature
-            print("Checking signatures....")
-            if not(bc.validate_tx(tx.tx_id, tx.inputs)):
-                print("Signatures not valid!")
-                return False
-            else:
-                print("Transaction signatures valid!")
-                tx_string = tx.get_tx_string()
-                # print(tx_string)                
-                # Write Transaction to mempool
-                tx.tx_to_mempool(tx_string)                 
-            # print(tx)
-            # Delete temporary transaction object
-            del tx            
+        # Check signature
+        print("Checking signatures....")
+        if not(bc.validate_tx(tx.tx_id, tx.inputs)):
+            print("Signatures not valid!")
+            return False
+        else:
+            print("Transaction signatures valid!")
+            # Write Transaction to mempool, if it doesn't conflict with other transactions
+            if(bc.submit_tx(tx)):
+                # Add transaction to the template for the next block
+                bc.template.update(bc)
+        # Delete temporary transaction object
+        del tx            
+
+    # Method sends several payments at once without input prompts (e.g. payouts or load tests)
+    # payments: list of (receiver address, volume)
+    # fee: fee of every transaction
+    # fsync: if True, the function returns when the transactions are written to the disk
+    # All transactions are created and signed first, a payment can use the change of the payment before
+    # Then they are checked and written to mempool in one append (see Blockchain.submit_txs())
+    # Returns a list with [receiver address, volume, Tx ID, status] for every payment
+    # Status: "accepted" or the reason of the rejection
+    def send_batch(self, bc, payments, fee = 0.0, fsync = True):
+        # Blocks of other programs first, so no output is spent twice
+        bc.load_new_blocks()
+        self.load_user_utxos(bc)
+        report = []
+        txs = []
+        for payment in payments:
+            address = str(payment[0])
+            volume = payment[1]
+            if not(fnc.check_address(address)):
+                report.append([address, volume, "", "Not a valid MiC address!"])
+                continue
+            if not(fnc.check_nr(volume)) or float(volume) <= 0 or fnc.get_dec(str(volume)) > 3:
+                report.append([address, volume, "", "Volume must be a positive number with maximum three decimals!"])
+                continue
+            tx = self.create_tx(bc.mem_path, bc.block_path, address, float(volume), fee)
+            if not(tx):
+                report.append([address, volume, "", "Transaction could not be created!"])
+                continue
+            # The inputs are spent, the change can be used by the next payment
+            spent = set((inp[0], int(inp[1])) for inp in tx.inputs)
+            self.utxo_user = [utxo for utxo in self.utxo_user if (utxo[2], int(utxo[3])) not in spent]
+            if(len(tx.outputs) > 1):
+                self.utxo_user.append([tx.outputs[1][1], 'mem', tx.tx_id, 1, tx.outputs[1][2]])
+            txs.append(tx)
+            report.append([address, volume, tx.tx_id, ""])
+        # Check and write all transactions at once
+        status = bc.submit_txs(txs, fsync)
+        n = 0
+        for entry in report:
+            if(entry[3] == ""):
+                entry[3] = status[n]
+                n += 1
+            print(f"{entry[0]} {entry[1]} MiC: {entry[3]}")
+        print(f"{status.count('accepted')} of {len(payments)} transactions written to mempool")
+        # Add the transactions to the template for the next block
+        bc.template.update(bc)
+        self.load_user_utxos(bc)
+        return report
             
         
         
@@ -0,0 +1,200 @@
+###########
+# Modules #
+###########
+
+# os: for replacing the checkpoint file
+import os
+# exists: check, if file in a directory exists
+# source: https://www.pythontutorial.net/python-basics/python-check-if-file-exists/
+from os.path import exists
+
+#########
+# Class #
+#########
+
+# Unspent outputs in blocks, which belong to the addresses of one wallet
+# The blocks are scanned only once: at the next scan only the blocks after the last scanned block are read
+# Addresses are matched with a hash lookup in the keystore of the wallet (no loop through all addresses)
+# The scan is stored as checkpoint next to the wallet file ({user ID}.wsc)
+class WalletScan():
+
+    ###########
+    # Dunders #
+    ###########
+
+    # Constructor: Instance Variables
+    def __init__(self, file_path):
+        self.file_path = str(file_path)
+        # UTXOs of the wallet: (Tx ID, Output index) -> [Address, Block, Volume]
+        self.utxos = {}
+        # Address -> dict of outpoints (Tx ID, Output index)
+        # A dict is used instead of a set to keep the order of the outputs
+        self.addr_index = {}
+        # Highest scanned block and the hash of its header
+        # Used to check, if the scan matches the blockchain
+        self.height = -1
+        self.tip_hash = ""
+        # Number of wallet addresses, which were scanned
+        # The wallet file is append-only, so the addresses after this number are new
+        self.addr_count = 0
+
+    # Print Object as formatted string
+    def __str__(self):
+        string = f"Wallet scan with {len(self.utxos)} UTXOs up to block {self.height}"
+        return string
+
+    ####################
+    # Instance Methods #
+    ####################
+
+    # Method clears the scan
+    def clear(self):
+        self.utxos = {}
+        self.addr_index = {}
+        self.height = -1
+        self.tip_hash = ""
+        self.addr_count = 0
+
+    # Method adds an output to the scan
+    def add_utxo(self, tx_id, index, address, block_nr, volume):
+        outpoint = (tx_id, index)
+        self.utxos[outpoint] = [address, block_nr, volume]
+        if(address not in self.addr_index):
+            self.addr_index[address] = {}
+        self.addr_index[address][outpoint] = True
+
+    # Method removes a spent output from the scan
+    # Returns False if the output is not in the scan
+    def spend_utxo(self, tx_id, index):
+        outpoint = (tx_id, index)
+        if(outpoint not in self.utxos):
+            return False
+        else:
+            address = self.utxos.pop(outpoint)[0]
+            del self.addr_index[address][outpoint]
+            if not(len(self.addr_index[address])):
+                del self.addr_index[address]
+            return True
+
+    # Method scans the transactions of the next block
+    # addresses: addresses of the wallet (dict or set, for the hash lookup)
+    def add_block(self, block, addresses):
+        for tx in block.tx:
+            # inp[0]: Tx ID Output
+            # inp[1]: Index Output (UTXO)
+            for inp in tx.inputs:
+                self.spend_utxo(inp[0], int(inp[1]))
+            # out[0]: Index Output
+            # out[1]: Address
+            # out[2]: Volume
+            for out in tx.outputs:
+                if(out[1] in addresses):
+                    self.add_utxo(tx.tx_id, int(out[0]), out[1], block.number, float(out[2]))
+        self.height = block.number
+        self.tip_hash = block.get_header_hash()
+
+    # Method adds the UTXOs of addresses, which are new in the wallet, from the UTXO set of the blockchain
+    # The UTXO set must be up to date with the scanned blocks
+    def add_addresses(self, addresses, utxo_set):
+        for address in addresses:
+            for utxo in utxo_set.get_utxos_for_address(address):
+                self.add_utxo(utxo[2], utxo[3], address, utxo[1], utxo[4])
+        self.addr_count += len(addresses)
+
+    # Method adds the UTXOs of addresses, which are new in the wallet, by scanning the blocks again
+    # Used, if the UTXO set of the blockchain is not at the last scanned block
+    # blocks: all blocks up to the last scanned block
+    # Outputs of the other addresses are not changed: they are not spent in these blocks or already removed
+    def scan_addresses(self, addresses, blocks):
+        new_addresses = set(addresses)
+        for block in blocks:
+            self.add_block(block, new_addresses)
+        self.addr_count += len(addresses)
+
+    # Method brings the scan up to date with the blockchain
+    # addresses: keystore of the wallet (dict address -> keys, in the order of the wallet file)
+    # If the last scanned block is not part of the blockchain anymore,
+    # the scan is built again from the UTXO set of the blockchain
+    # The UTXO set is only used, if it is at the same block as the scan, otherwise the blocks are scanned
+    # Returns True if the scan was changed
+    def update(self, blockchain, addresses):
+        height = self.height
+        # Check if the scan belongs to this blockchain
+        if(height >= len(blockchain.blocks) or (height >= 0 and blockchain.blocks[height].get_header_hash() != self.tip_hash) or self.addr_count > len(addresses)):
+            self.clear()
+            height = -1
+        if(height == -1 and blockchain.utxo_set.height == len(blockchain.blocks) - 1):
+            # First scan: the UTXOs of all addresses are taken from the UTXO set
+            self.add_addresses(addresses, blockchain.utxo_set)
+            self.height = blockchain.utxo_set.height
+            self.tip_hash = blockchain.utxo_set.tip_hash
+            return True
+        # Scan only the blocks, which are new since the last scan
+        for block in blockchain.blocks[height + 1:]:
+            self.add_block(block, addresses)
+        # Addresses, which are new since the last scan
+        changed = (height != self.height)
+        if(height == -1):
+            # All blocks were scanned with all addresses
+            self.addr_count = len(addresses)
+        elif(self.addr_count < len(addresses)):
+            new_addresses = list(addresses)[self.addr_count:]
+            if(blockchain.utxo_set.height == self.height and blockchain.utxo_set.tip_hash == self.tip_hash):
+                self.add_addresses(new_addresses, blockchain.utxo_set)
+            else:
+                self.scan_addresses(new_addresses, blockchain.blocks[:self.height + 1])
+            changed = True
+        return changed
+
+    # Method returns a list with all UTXOs of the wallet in the order of the blockchain:
+    # [Address, Block, Tx ID, Output index, Volume]
+    def get_utxos(self):
+        utxo_list = []
+        for outpoint in self.utxos:
+            utxo = self.utxos[outpoint]
+            utxo_list.append([utxo[0], utxo[1], outpoint[0], outpoint[1], utxo[2]])
+        utxo_list.sort(key=lambda utxo: utxo[1])
+        return utxo_list
+
+    # Method loads the scan from the checkpoint file
+    # Returns False if there is no checkpoint file or if it is corrupted
+    def load(self):
+        self.clear()
+        if not(exists(self.file_path)):
+            return False
+        with open(self.file_path, "r") as handle:
+            lines = handle.read().split("\n")
+        # First line: height|tip hash|number of addresses
+        head = lines[0].split("|")
+        if(len(head) != 3):
+            self.clear()
+            return False
+        try:
+            height = int(head[0])
+            addr_count = int(head[2])
+            # Other lines: Tx ID|Output index|Address|Block|Volume
+            for line in lines[1:]:
+                if(line == ""):
+                    continue
+                elem = line.split("|")
+                self.add_utxo(elem[0], int(elem[1]), elem[2], int(elem[3]), float(elem[4]))
+        except (ValueError, IndexError):
+            self.clear()
+            return False
+        self.height = height
+        self.tip_hash = head[1]
+        self.addr_count = addr_count
+        return True
+
+    # Method writes the scan to the checkpoint file
+    # The file is written to a temporary file first and then replaced,
+    # so an interrupted write doesn't destroy the checkpoint
+    # Every program uses its own temporary file, so programs can save at the same time
+    def save(self):
+        lines = [f"{self.height}|{self.tip_hash}|{self.addr_count}"]
+        for outpoint in self.utxos:
+            utxo = self.utxos[outpoint]
+            lines.append(f"{outpoint[0]}|{outpoint[1]}|{utxo[0]}|{utxo[1]}|{utxo[2]}")
+        with open(f"{self.file_path}.{os.getpid()}.tmp", "w") as handle:
+            handle.write("\n".join(lines) + "\n")
+        os.replace(f"{self.file_path}.{os.getpid()}.tmp", self.file_path)